@@ -1,42 +1,55 @@
+import importlib
 import streamlit as st
+import pandas as pd
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import configurations
-from config.settings import apply_page_config, apply_custom_css, MENU_OPTIONS
+from config.settings import apply_page_config, apply_custom_css, MENU_OPTIONS, PREDICTION_GRID_ENABLED, PERF_LOG, METRICS_PORT, PROFILE_ENABLED
 
 # Import utilities
-from utils.data_loader import load_model, load_dataset, load_model_evaluation
-from utils.preprocessor import process_data
+from utils.scored_data import load_model, load_model_evaluation, get_scored_dataset, get_aggregate_cube, get_search_index, get_probability_grid, get_scoring_report, get_timeseries
+from utils.instrumentation import configure_logging, start_metrics_server, start_run, finish_run, span, snapshot
 
-# Import pages
-from pages import home, analytics, prediction, analysis, model_info
+# Pages (and the Plotly modules they use) are imported when their menu
+# item is selected, so startup only pays for the page being shown
 
 def main():
-    """Main application"""
+    """Main application (each rerun is timed, see utils.instrumentation)"""
+    configure_logging(PERF_LOG)
+    if METRICS_PORT:
+        start_metrics_server(port=METRICS_PORT)
+    
+    start_run()
+    menu = None
+    try:
+        menu = _render()
+    finally:
+        st.session_state['perf_last_run'] = finish_run(label=menu)
+
+def _render():
+    """Render the sidebar and the selected page; returns the menu item (None if loading failed)"""
 
     # Apply configurations
     apply_page_config()
     apply_custom_css()
     
-    # Load data and model
+    # Load processed and scored data (cached, re-scored only when files change)
+    df_scored = get_scored_dataset()
+    
+    # Load model
     model, scaler, feature_cols = load_model()
-    df = load_dataset()
-    model_eval = load_model_evaluation()
     
     # Check if data and model loaded successfully
-    if df is None or model is None:
+    if df_scored is None or model is None:
         st.error("❌ Failed to load data or model. Please check the file paths.")
         st.info("""
         **Troubleshooting:**
         1. Make sure `clean_dataset.xlsx` exists in `../data/` folder
         2. Make sure model files exist in `../models/` folder
-        3. Run the training notebook (`test.ipynb`) to generate model files
+        3. Run `python -m utils.train` to generate model files
         """)
-        return
-    
-    # Process data
-    df_processed = process_data(df)
+        return None
     
     # Sidebar navigation
     st.sidebar.title("🎓 Navigation")
@@ -52,26 +65,109 @@ def main():
     # Show info in sidebar
     st.sidebar.info(f"""
     **📊 Dataset Info**
-    - Total Mahasiswa: {len(df)}
-    - Dropout Rate: {(df_processed['Target'].sum()/len(df)*100):.1f}%
-    - Avg IPK: {df['IPK'].mean():.2f}
+    - Total Mahasiswa: {len(df_scored)}
+    - Dropout Rate: {(df_scored['Target'].sum()/len(df_scored)*100):.1f}%
+    - Avg IPK: {df_scored['IPK'].mean():.2f}
     """)
     
+    scoring_report = get_scoring_report()
+    if scoring_report is not None:
+        st.sidebar.caption(
+            f"Skor terakhir: {scoring_report['recomputed']:,} baris dihitung ulang, "
+            f"{scoring_report['reused']:,} dipakai ulang ({scoring_report['seconds']:.2f} s)"
+        )
+    
+    _show_performance_panel()
+    
     # Route to appropriate page
     if menu == "🏠 Home":
-        home.show(df, df_processed)
+        _show_page("home", df_scored)
     
     elif menu == "📊 Dashboard Analitik":
-        analytics.show(df, model, scaler)
+        _show_page("analytics", get_aggregate_cube())
     
     elif menu == "🔮 Prediksi Individu":
-        prediction.show(model, scaler)
+        _show_page("prediction", model, scaler, get_probability_grid() if PREDICTION_GRID_ENABLED else None)
     
     elif menu == "📈 Analisis Mahasiswa":
-        analysis.show(df, model, scaler)
+        _show_page("analysis", df_scored, get_search_index(), get_timeseries())
     
     elif menu == "ℹ️ Info Model":
-        model_info.show(model_eval)
+        _show_page("model_info", load_model_evaluation())
+
+    return menu
+
+def _profiling_requested():
+    """Profile this rerun? (DROPOUT_PROFILE or ?profile=1; nothing is imported when off)"""
+    return PROFILE_ENABLED or st.query_params.get('profile', '0').lower() not in ('', '0', 'false')
+
+def _show_page(name, *args):
+    """Import pages.<name> and run its show(*args), under the profiler when requested"""
+    with span(f"page.{name}"):
+        page = importlib.import_module(f"pages.{name}")
+        if not _profiling_requested():
+            page.show(*args)
+            return
+        
+        from utils.profiling import profile_call
+        _, report = profile_call(page.show, *args, label=name)
+    
+    _show_profile_report(report)
+
+def _show_profile_report(report):
+    """Top functions of a profiled page run (see utils.profiling)"""
+    with st.expander(f"🔬 Profil halaman: {report['label']} ({report['seconds']:.2f} s, {report['samples']:,} sampel stack)", expanded=True):
+        if report['profile_path']:
+            st.caption(f"Profil: `{report['profile_path']}` · Collapsed stacks (flame graph): `{report['collapsed_path']}`")
+        else:
+            st.caption("Direktori profil tidak dapat ditulis; hasil hanya ditampilkan di sini.")
+        
+        column_config = {
+            'function': st.column_config.TextColumn('Fungsi', width='large'),
+            'calls': st.column_config.NumberColumn('Panggilan'),
+            'own_s': st.column_config.NumberColumn('Waktu sendiri (s)', format="%.4f"),
+            'cumulative_s': st.column_config.NumberColumn('Kumulatif (s)', format="%.4f")
+        }
+        tab_own, tab_cumulative = st.tabs(["Top 20 — waktu sendiri", "Top 20 — kumulatif"])
+        with tab_own:
+            st.dataframe(pd.DataFrame(report['top_own']), column_config=column_config, hide_index=True, use_container_width=True)
+        with tab_cumulative:
+            st.dataframe(pd.DataFrame(report['top_cumulative']), column_config=column_config, hide_index=True, use_container_width=True)
+
+def _show_performance_panel():
+    """Optional sidebar breakdown of this session's previous rerun and the cache hits / misses"""
+    if not st.sidebar.toggle("⏱️ Panel performa", key="perf_panel"):
+        return
+    
+    run = st.session_state.get('perf_last_run')
+    with st.sidebar.expander("Rerun terakhir", expanded=True):
+        if run is None:
+            st.caption("Belum ada rerun yang tercatat.")
+        else:
+            st.caption(f"{run['label'] or '-'} — total **{run['seconds'] * 1000:,.0f} ms**")
+            st.dataframe(
+                pd.DataFrame({
+                    'Span': ['· ' * s['depth'] + s['name'] for s in run['spans']],
+                    'ms': [s['seconds'] * 1000 for s in run['spans']]
+                }),
+                column_config={'ms': st.column_config.NumberColumn('ms', format="%.1f")},
+                hide_index=True,
+                use_container_width=True
+            )
+            if run['caches']:
+                st.dataframe(
+                    pd.DataFrame([
+                        {'Cache': name, 'Hit': counts['hits'], 'Miss': counts['misses']}
+                        for name, counts in run['caches'].items()
+                    ]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+        
+        totals = snapshot()
+        hits = sum(c['hits'] for c in totals['caches'].values())
+        misses = sum(c['misses'] for c in totals['caches'].values())
+        st.caption(f"Proses ini: {totals['runs']:,} rerun, cache {hits:,} hit / {misses:,} miss")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
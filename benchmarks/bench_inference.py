@@ -0,0 +1,269 @@
+"""
+Benchmark: inference pipeline stages, single-record latency and memory on synthetic cohorts
+
+Generates cohorts with the clean_dataset.xlsx schema (and dtypes) at each
+--sizes and times the stages of scoring them separately:
+
+    preprocess   process_data (fill values, Target, Status_Risk, categories)
+    scale        feature matrix + scaler.transform
+    inference    model.predict_proba
+    risk_level   apply_risk_rules + labels
+    batch        predict_dropout_risk_batch end to end (what batch_predict runs)
+
+Each stage reports the median seconds over --repeat runs, rows/s and the
+peak memory it allocated (tracemalloc, measured in a separate run so it
+does not slow the timed ones). Single-record latency (p50 / p99) is
+measured for predict_dropout_risk with the model and with the
+probability grid. Results are written as JSON tagged with the git commit;
+--compare prints the change against an earlier results file.
+
+Usage:
+    python benchmarks/bench_inference.py [--sizes 1000 10000 100000 1000000] [--models sklearn compiled]
+                                         [--repeat 3] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.data_loader import DATASET_DTYPES, MODEL_PATH, SCALER_PATH, apply_dtypes
+from utils.predictor import (
+    RISK_LEVEL_LABELS, apply_risk_rules, predict_dropout_risk, predict_dropout_risk_batch, to_float64
+)
+from utils.preprocessor import process_data
+
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+MODELS = ['sklearn', 'compiled']
+STAGES = ['preprocess', 'scale', 'inference', 'risk_level', 'batch']
+
+# Roughly the status mix of clean_dataset.xlsx
+STATUS_WEIGHTS = {'AKTIF': 0.55, 'LULUS': 0.25, 'CUTI': 0.06, 'KELUAR': 0.05, 'NON AKTIF': 0.06, 'REGISTRASI': 0.03}
+
+# Share of IPK / Kehadiran cells left empty (exercises the median fill)
+MISSING_RATE = 0.01
+
+def make_cohort(n, seed=42):
+    """Synthetic cohort with the clean_dataset.xlsx columns and DATASET_DTYPES"""
+    rng = np.random.default_rng(seed)
+    ipk = rng.normal(3.0, 0.6, n).clip(0, 4).round(2)
+    kehadiran = rng.beta(6, 1.5, n).round(2)
+    for column in [ipk, kehadiran]:
+        column[rng.random(n) < MISSING_RATE] = np.nan
+
+    df = pd.DataFrame({
+        'No': np.arange(1, n + 1),
+        'NIM': 825_000_000 + np.arange(n),
+        'Nama': pd.Series(np.arange(n)).astype(str).radd('Mahasiswa ').to_numpy(dtype=object),
+        'Status': rng.choice(list(STATUS_WEIGHTS), n, p=list(STATUS_WEIGHTS.values())),
+        'SKS': rng.integers(0, 150, n),
+        'IPK': ipk,
+        'Kehadiran': kehadiran,
+        'Angkatan': rng.integers(2016, 2021, n),
+        'Prodi': rng.choice(['SI', 'TI'], n),
+        'Semester': rng.choice(['GANJIL', 'GENAP'], n)
+    })
+    return apply_dtypes(df, DATASET_DTYPES)
+
+def load_model(kind):
+    if kind == 'sklearn':
+        import joblib
+        return joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
+    from utils.compiled_model import load_compiled_model
+    return load_compiled_model()
+
+def stage_functions(model, scaler):
+    """Stage name -> function(state) that reads and extends the state dict"""
+    def preprocess(state):
+        state['df_processed'] = process_data(state['df'])
+
+    def scale(state):
+        df_processed = state['df_processed']
+        state['ipk'] = to_float64(df_processed['IPK'])
+        state['kehadiran'] = to_float64(df_processed['Kehadiran'])
+        state['status_risk'] = df_processed['Status_Risk'].to_numpy()
+        features = np.column_stack([state['ipk'], state['kehadiran'], state['status_risk']])
+        state['scaled'] = scaler.transform(features)
+
+    def inference(state):
+        state['dropout_prob'] = model.predict_proba(state['scaled'])[:, 1]
+
+    def risk_level(state):
+        _, _, risk_codes = apply_risk_rules(state['ipk'], state['kehadiran'], state['status_risk'], state['dropout_prob'])
+        state['risk_level'] = RISK_LEVEL_LABELS[risk_codes]
+
+    def batch(state):
+        df_processed = state['df_processed']
+        predict_dropout_risk_batch(model, scaler, df_processed['IPK'], df_processed['Kehadiran'], df_processed['Status'])
+
+    return {'preprocess': preprocess, 'scale': scale, 'inference': inference, 'risk_level': risk_level, 'batch': batch}
+
+def time_stages(functions, df, repeat):
+    seconds = {name: [] for name in functions}
+    for _ in range(repeat):
+        state = {'df': df}
+        for name, function in functions.items():
+            start = time.perf_counter()
+            function(state)
+            seconds[name].append(time.perf_counter() - start)
+    return {name: statistics.median(values) for name, values in seconds.items()}
+
+def peak_memory_stages(functions, df):
+    """Peak bytes allocated while each stage runs, on top of what was live before it"""
+    peaks = {}
+    state = {'df': df}
+    tracemalloc.start()
+    try:
+        for name, function in functions.items():
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            function(state)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[name] = peak - before
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def single_record_latency(model, scaler, df, n, grid=None):
+    """p50 / p99 of predict_dropout_risk over the first n valid records (microseconds)"""
+    rows = df[['IPK', 'Kehadiran', 'Status']].dropna().head(n)
+    ipk = to_float64(rows['IPK'])
+    kehadiran = to_float64(rows['Kehadiran'])
+    status = rows['Status'].astype(str).to_numpy()
+
+    latencies = np.empty(len(rows))
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        predict_dropout_risk(model, scaler, ipk[i], kehadiran[i], status[i], grid=grid)
+        latencies[i] = time.perf_counter() - start
+    return {
+        'records': len(rows),
+        'p50_us': round(float(np.percentile(latencies, 50)) * 1e6, 2),
+        'p99_us': round(float(np.percentile(latencies, 99)) * 1e6, 2)
+    }
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+def environment():
+    import sklearn
+    commit, dirty = git_commit()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+def compare(results, baseline):
+    """Print rows/s and latency of results against a baseline results file"""
+    before = {(r['model'], r['rows'], stage): values for r in baseline['stages'] for stage, values in r['stages'].items()}
+    print(f"\nagainst {baseline['environment'].get('commit')} ({baseline['environment'].get('timestamp')}):")
+    print(f"{'model':>9} {'rows':>10} {'stage':>11} {'rows/s before':>14} {'rows/s now':>12} {'change':>8}")
+    for r in results['stages']:
+        for stage, values in r['stages'].items():
+            old = before.get((r['model'], r['rows'], stage))
+            if old is None:
+                continue
+            change = values['rows_per_s'] / old['rows_per_s'] - 1
+            print(f"{r['model']:>9} {r['rows']:>10,} {stage:>11} {old['rows_per_s']:>14,.0f} {values['rows_per_s']:>12,.0f} {change:>+8.1%}")
+
+    before = {(r['model'], r['mode']): r for r in baseline['single_record']}
+    for r in results['single_record']:
+        old = before.get((r['model'], r['mode']))
+        if old is not None:
+            print(f"single record {r['model']}/{r['mode']}: p50 {old['p50_us']:.1f} -> {r['p50_us']:.1f} us, "
+                  f"p99 {old['p99_us']:.1f} -> {r['p99_us']:.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=MODELS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--single', type=int, default=2000, help="Records timed one by one for the latency percentiles")
+    parser.add_argument('--output', type=Path, default=None, help="Results file (default: benchmarks/results/inference-<commit>.json)")
+    parser.add_argument('--compare', type=Path, default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    from utils.probability_grid import build_probability_grid
+
+    results = {'environment': environment(), 'args': {'sizes': args.sizes, 'repeat': args.repeat, 'single': args.single}, 'stages': [], 'single_record': []}
+    cohorts = {n: make_cohort(n) for n in args.sizes}
+
+    print(f"{'model':>9} {'rows':>10} " + ' '.join(f"{stage + ' (s)':>15}" for stage in STAGES) + f" {'rows/s batch':>13} {'peak MB batch':>14}")
+    for kind in args.models:
+        try:
+            model, scaler = load_model(kind)
+        except (OSError, ValueError) as e:
+            print(f"{kind:>9}  skipped: {e}")
+            continue
+        functions = stage_functions(model, scaler)
+
+        for n, df in cohorts.items():
+            seconds = time_stages(functions, df, args.repeat)
+            peaks = peak_memory_stages(functions, df)
+            stages = {
+                stage: {
+                    'seconds': round(seconds[stage], 6),
+                    'rows_per_s': round(n / seconds[stage], 1),
+                    'peak_mb': round(peaks[stage] / 2**20, 2)
+                }
+                for stage in STAGES
+            }
+            results['stages'].append({'model': kind, 'rows': n, 'stages': stages})
+            print(f"{kind:>9} {n:>10,} " + ' '.join(f"{seconds[stage]:>15.4f}" for stage in STAGES)
+                  + f" {stages['batch']['rows_per_s']:>13,.0f} {stages['batch']['peak_mb']:>14.1f}")
+
+        sample = cohorts[min(cohorts)]
+        grid = build_probability_grid(model, scaler)
+        for mode, mode_grid in [('model', None), ('grid', grid)]:
+            latency = single_record_latency(model, scaler, sample, args.single, grid=mode_grid)
+            results['single_record'].append({'model': kind, 'mode': mode, **latency})
+            print(f"{kind:>9} single record ({mode}): p50 {latency['p50_us']:.1f} us, p99 {latency['p99_us']:.1f} us")
+
+    # ru_maxrss is in kB on Linux
+    results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(f"peak RSS of the run: {results['peak_rss_mb']:.1f} MB")
+
+    output = args.output
+    if output is None:
+        commit = results['environment']['commit'] or 'nocommit'
+        output = RESULTS_DIR / f"inference-{commit}{'-dirty' if results['environment']['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"results written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: per-process memory of the model artifacts across replicas
+
+Starts --replicas processes at once (like several Streamlit servers on
+one host) that each load the model and the prediction-form probability
+grid in one of three ways, then score a cohort with them:
+
+    sklearn   joblib.load of best_dropout_model.pkl / scaler.pkl, grid in memory
+    compiled  compiled_model.npz and grid read into process memory
+    mmap      compiled arrays and grid memory-mapped from data/.cache (shared pages)
+
+Resident (RSS), proportional (PSS) and private memory are read from
+/proc/self/smaps_rollup before loading, after loading and after scoring,
+while all replicas are alive, so PSS shows how much of the model each
+replica really pays for.
+
+Usage:
+    python benchmarks/bench_model_memory.py [--replicas 4] [--rows 10000]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import warnings
+from pathlib import Path
+
+warnings.filterwarnings('ignore')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+MODES = ['sklearn', 'compiled', 'mmap']
+
+def memory_kb():
+    """Rss, Pss and private (clean + dirty) memory of this process in kB"""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'rss': maxrss, 'pss': None, 'private': None}
+    return {
+        'rss': fields.get('Rss'),
+        'pss': fields.get('Pss'),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+def replica(mode, rows, grid_key, barrier, results):
+    import numpy as np
+
+    # Everything but the model itself is imported before the first reading
+    from utils.data_loader import MODEL_PATH, SCALER_PATH
+    from utils.compiled_model import load_compiled_model
+    from utils.predictor import predict_dropout_risk_batch
+    from utils.probability_grid import build_probability_grid
+    import joblib
+    # Deliberate: unpickling the sklearn model would import sklearn after the
+    # baseline reading and charge its modules to the model; importing it here
+    # in every mode keeps the 'before' reading comparable across modes
+    import sklearn.ensemble  # noqa: F401
+
+    rng = np.random.default_rng(0)
+    ipk = rng.uniform(0, 4, rows).round(2)
+    kehadiran = rng.uniform(0, 1, rows).round(2)
+    status = rng.choice(['AKTIF', 'CUTI', 'LULUS'], rows).astype(object)
+
+    barrier.wait()
+    before = memory_kb()
+
+    if mode == 'sklearn':
+        model, scaler = joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
+    else:
+        model, scaler = load_compiled_model(mmap=(mode == 'mmap'))
+    grid = build_probability_grid(model, scaler, cache_key=grid_key if mode == 'mmap' else None)
+
+    # Measure while every replica holds its model
+    barrier.wait()
+    loaded = memory_kb()
+
+    result = predict_dropout_risk_batch(model, scaler, ipk, kehadiran, status)
+    del result
+    barrier.wait()
+    scored = memory_kb()
+    barrier.wait()
+
+    results.put({'before': before, 'loaded': loaded, 'scored': scored, 'grid_mapped': isinstance(grid['proba'], np.memmap)})
+
+def run_mode(mode, replicas, rows, grid_key):
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(replicas)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=replica, args=(mode, rows, grid_key, barrier, results)) for _ in range(replicas)]
+    for p in processes:
+        p.start()
+    samples = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    summary = {'mode': mode, 'replicas': replicas, 'grid_mapped': all(s['grid_mapped'] for s in samples)}
+    for key in ['rss', 'pss', 'private']:
+        for stage in ['before', 'loaded', 'scored']:
+            values = [s[stage][key] for s in samples if s[stage][key] is not None]
+            if values:
+                summary[f'{key}_{stage}_kb'] = round(sum(values) / len(values))
+        if f'{key}_loaded_kb' in summary:
+            summary[f'{key}_load_delta_kb'] = summary[f'{key}_loaded_kb'] - summary[f'{key}_before_kb']
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=10_000, help="Rows scored by each replica after loading")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    # Write the memory-mappable copies once, outside the measurement, under
+    # the same grid key the dashboard uses
+    from utils.compiled_model import load_compiled_model
+    from utils.probability_grid import build_probability_grid
+    from utils.scored_data import dataset_fingerprint
+    grid_key = dataset_fingerprint()
+    build_probability_grid(*load_compiled_model(), cache_key=grid_key)
+
+    results = [run_mode(mode, args.replicas, args.rows, grid_key) for mode in args.modes]
+
+    print(f"{'mode':>9} {'RSS before':>11} {'RSS loaded':>11} {'RSS scored':>11} {'PSS +load':>10} {'private +load':>14}  (kB, mean per replica)")
+    for r in results:
+        print(f"{r['mode']:>9} {r.get('rss_before_kb', '-'):>11} {r.get('rss_loaded_kb', '-'):>11} {r.get('rss_scored_kb', '-'):>11} "
+              f"{r.get('pss_load_delta_kb', '-'):>10} {r.get('private_load_delta_kb', '-'):>14}")
+    print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: throughput of shared-memory parallel scoring against the number of workers
+
+Scores one synthetic cohort (bench_inference.make_cohort, processed once)
+in-process with predict_dropout_risk_batch and then with a ParallelScorer
+of each --workers count. Pool start-up (fork + model load) is timed
+separately; the scoring runs report the median seconds over --repeat,
+rows/s, the speedup over one worker and the parallel efficiency
+(speedup / workers). Every parallel result is checked against the
+in-process one. Scaling stops at the number of cores the machine has
+(cpu_count is part of the results).
+
+Usage:
+    python benchmarks/bench_parallel_score.py [--rows 4000000] [--workers 1 2 4 8] [--chunk-size 100000]
+                                              [--model compiled] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from bench_inference import RESULTS_DIR, environment, make_cohort
+from utils.data_loader import read_model
+from utils.parallel_score import DEFAULT_CHUNK_ROWS, ParallelScorer
+from utils.predictor import predict_dropout_risk_batch
+from utils.preprocessor import process_data
+
+def default_workers():
+    """1, 2, 4, ... up to the core count (and the core count itself)"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+def timed_runs(function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), result
+
+def same_result(a, b):
+    return all(np.array_equal(a[key], b[key]) for key in a)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=4_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=None, help="Pool sizes (default: powers of two up to the core count)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--model', choices=['compiled', 'sklearn'], default='compiled')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', type=Path, default=None, help="Results file (default: benchmarks/results/parallel-<commit>.json)")
+    args = parser.parse_args()
+
+    workers = args.workers or default_workers()
+    prefer_compiled = args.model == 'compiled'
+
+    df = process_data(make_cohort(args.rows))
+    columns = (df['IPK'], df['Kehadiran'], df['Status'])
+
+    model, scaler, _ = read_model(prefer_compiled)
+    seconds, expected = timed_runs(lambda: predict_dropout_risk_batch(model, scaler, *columns), args.repeat)
+    results = {
+        'environment': environment(),
+        'args': {'rows': args.rows, 'chunk_size': args.chunk_size, 'model': args.model, 'repeat': args.repeat},
+        'in_process': {'seconds': round(seconds, 6), 'rows_per_s': round(args.rows / seconds, 1)},
+        'parallel': []
+    }
+    print(f"{args.rows:,} rows, {args.model} model, chunks of {args.chunk_size:,}, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'start (s)':>10} {'score (s)':>10} {'rows/s':>12} {'speedup':>8} {'efficiency':>11} {'same':>5}")
+    print(f"{'inline':>8} {'':>10} {seconds:>10.4f} {args.rows / seconds:>12,.0f} {'':>8} {'':>11} {'':>5}")
+
+    one_worker = None
+    for count in workers:
+        start = time.perf_counter()
+        with ParallelScorer(count, args.chunk_size, prefer_compiled) as scorer:
+            scorer.start()
+            startup = time.perf_counter() - start
+            seconds, result = timed_runs(lambda: scorer.score(*columns), args.repeat)
+
+        if count == 1:
+            one_worker = seconds
+        # Speedup and efficiency need a one-worker run to compare with
+        speedup = one_worker / seconds if one_worker else None
+        row = {
+            'workers': count,
+            'startup_s': round(startup, 6),
+            'seconds': round(seconds, 6),
+            'rows_per_s': round(args.rows / seconds, 1),
+            'speedup': round(speedup, 3) if speedup else None,
+            'efficiency': round(speedup / count, 3) if speedup else None,
+            'same_as_in_process': same_result(expected, result)
+        }
+        results['parallel'].append(row)
+        print(f"{count:>8} {startup:>10.3f} {seconds:>10.4f} {row['rows_per_s']:>12,.0f} "
+              f"{row['speedup'] or float('nan'):>8.2f} {row['efficiency'] or float('nan'):>11.0%} {str(row['same_as_in_process']):>5}")
+
+    output = args.output
+    if output is None:
+        commit = results['environment']['commit'] or 'nocommit'
+        output = RESULTS_DIR / f"parallel-{commit}{'-dirty' if results['environment']['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Load test: local scoring service, /predict with and without micro-batching
+
+Starts utils.service in-process on a free port, sends concurrent
+single-record requests from a thread pool and reports throughput,
+client-side latency percentiles and the mean micro-batch size.
+
+Usage:
+    python benchmarks/bench_service.py [--requests 2000] [--concurrency 32] [--max-batch 1 64]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.service import create_server
+
+STATUSES = ['AKTIF', 'LULUS', 'CUTI', 'KELUAR', 'NON AKTIF', 'REGISTRASI']
+
+def make_payloads(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return [
+        json.dumps({
+            'ipk': round(float(rng.uniform(0, 4)), 2),
+            'kehadiran': round(float(rng.uniform(0, 1)), 2),
+            'status': str(rng.choice(STATUSES))
+        }).encode()
+        for _ in range(n)
+    ]
+
+def post(url, body):
+    start = time.perf_counter()
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+def run(max_batch, max_wait_ms, payloads, concurrency):
+    server = create_server(port=0, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    url = f"http://{host}:{port}/predict"
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = np.array(list(pool.map(lambda body: post(url, body), payloads)))
+        wall = time.perf_counter() - start
+        batches = server.metrics.snapshot()['micro_batches']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'max_batch': max_batch,
+        'requests': len(payloads),
+        'req_per_s': len(payloads) / wall,
+        'p50_ms': np.percentile(latencies, 50) * 1000,
+        'p99_ms': np.percentile(latencies, 99) * 1000,
+        'mean_batch': batches['mean_size']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--max-batch', type=int, nargs='+', default=[1, 64])
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.requests)
+
+    print(f"{'max batch':>10} {'requests':>9} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'mean batch':>11}")
+    for max_batch in args.max_batch:
+        r = run(max_batch, args.max_wait_ms, payloads, args.concurrency)
+        print(f"{r['max_batch']:>10} {r['requests']:>9} {r['req_per_s']:>9.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['mean_batch']:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: dashboard startup (imports and first script run) in fresh interpreters
+
+For every run a new Python process is started, so nothing is warm in
+sys.modules (the OS file cache is, after the first repeat):
+
+    import     python -X importtime -c "import app"; total and the slowest
+               top-level packages by cumulative import time
+    first run  streamlit AppTest of app.py up to the first rendered page
+               (Home), plus which heavy libraries that run imported
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 15] [--output startup.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Libraries whose presence after the first run is reported
+HEAVY_MODULES = ['plotly.express', 'plotly.graph_objects', 'matplotlib', 'seaborn', 'sklearn', 'xgboost', 'scipy', 'joblib']
+
+FIRST_RUN_SCRIPT = f"""
+import json, sys, time, warnings
+warnings.filterwarnings('ignore')
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+at = AppTest.from_file({str(BASE_DIR / 'app.py')!r}, default_timeout=300)
+at.run()
+done = time.perf_counter()
+print(json.dumps({{
+    'testing_import_s': ready - start,
+    'first_run_s': done - ready,
+    'exception': bool(at.exception),
+    'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+}}))
+"""
+
+def parse_importtime(stderr):
+    """
+    Cumulative import time (s) per package and the total, from -X importtime output
+
+    A package is charged the cumulative time of every import of it that
+    was triggered by another package (so dependencies it pulls in count
+    towards it, and the totals of nested packages overlap).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip().split('.')[0], int(cumulative_us) / 1e6))
+
+    # Children are printed before the import that triggered them
+    packages = {}
+    total = 0
+    ancestors = []
+    for depth, package, cumulative in reversed(entries):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        if not ancestors:
+            total += cumulative
+        if not ancestors or ancestors[-1][1] != package:
+            packages[package] = packages.get(package, 0) + cumulative
+        ancestors.append((depth, package))
+    return packages, total
+
+def run_import():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+def run_first_paint():
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_RUN_SCRIPT],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Slowest top-level imports listed")
+    parser.add_argument('--output', type=Path, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    import_totals, package_times = [], {}
+    first_runs = []
+    for _ in range(args.repeat):
+        packages, total = run_import()
+        import_totals.append(total)
+        for name, seconds in packages.items():
+            package_times.setdefault(name, []).append(seconds)
+        first_runs.append(run_first_paint())
+
+    slowest = sorted(package_times.items(), key=lambda item: -statistics.median(item[1]))[:args.top]
+    results = {
+        'repeat': args.repeat,
+        'import_app_s': round(statistics.median(import_totals), 4),
+        'first_run_s': round(statistics.median(r['first_run_s'] for r in first_runs), 4),
+        'first_run_exception': any(r['exception'] for r in first_runs),
+        'heavy_modules_after_first_run': first_runs[-1]['loaded'],
+        'slowest_imports_s': {name: round(statistics.median(times), 4) for name, times in slowest}
+    }
+
+    print(f"import app (median of {args.repeat}):       {results['import_app_s']:.3f} s")
+    print(f"first run to Home page (median):  {results['first_run_s']:.3f} s")
+    print(f"heavy modules after first run:    {', '.join(results['heavy_modules_after_first_run']) or '-'}")
+    print(f"\n{'package':<24} {'cumulative (s)':>14}")
+    for name, seconds in results['slowest_imports_s'].items():
+        print(f"{name:<24} {seconds:>14.4f}")
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: peak memory and throughput of streaming batch scoring against the input size
+
+Writes synthetic cohorts (bench_inference.make_cohort, generated and
+appended block by block) as CSV or Parquet files of each --sizes and
+scores every file with python -m utils.batch_score in a fresh process.
+The peak RSS, rows/s and wall time reported by each run are printed;
+with a fixed --chunk-size the peak RSS should stay flat as the input
+grows.
+
+Usage:
+    python benchmarks/bench_streaming.py [--sizes 100000 1000000 4000000] [--format csv]
+                                         [--chunk-size 50000] [--workdir /tmp/streaming]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+warnings.filterwarnings('ignore')
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from bench_inference import make_cohort
+from utils.batch_score import DEFAULT_CHUNK_SIZE
+
+# Rows generated per block while writing an input file
+GENERATE_BLOCK = 250_000
+
+def write_input(path, n, fmt):
+    """Write an n-row cohort to path without holding more than one block in memory"""
+    writer = None
+    try:
+        for block, start in enumerate(range(0, n, GENERATE_BLOCK)):
+            df = make_cohort(min(GENERATE_BLOCK, n - start), seed=block)
+            df['No'] += start
+            df['NIM'] += start
+            if fmt == 'csv':
+                df.to_csv(path, mode='w' if block == 0 else 'a', header=(block == 0), index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 4_000_000])
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workdir', type=Path, default=None, help="Where the input and output files go (default: a temporary directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+
+        print(f"{args.format} input, chunks of {args.chunk_size:,}")
+        print(f"{'rows':>10} {'input MB':>9} {'peak RSS MB':>12} {'rows/s':>12} {'wall (s)':>9}")
+        for n in args.sizes:
+            input_path = workdir / f"cohort-{n}.{args.format}"
+            output_path = workdir / f"scored-{n}.{args.format}"
+            write_input(input_path, n, args.format)
+
+            completed = subprocess.run(
+                [sys.executable, '-m', 'utils.batch_score', str(input_path), str(output_path), '--chunk-size', str(args.chunk_size)],
+                cwd=BASE_DIR, capture_output=True, text=True, check=True
+            )
+            summary = json.loads(completed.stdout)
+            print(f"{n:>10,} {input_path.stat().st_size / 2**20:>9.1f} {summary['peak_rss_mb']:>12.1f} "
+                  f"{summary['rows_per_s']:>12,.0f} {summary['wall_time_s']:>9.2f}")
+
+            input_path.unlink()
+            output_path.unlink()
+
+if __name__ == "__main__":
+    main()
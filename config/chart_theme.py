@@ -1,5 +1,8 @@
-import matplotlib.pyplot as plt
-
 def apply_chart_theme(fig=None):
-    plt.style.use('seaborn-v0_8')
+    """
+    Hook for a shared look of the Plotly charts (currently the Streamlit theme as is)
+    
+    The old matplotlib style call had no effect on Plotly figures and cost
+    a matplotlib import on every page that draws a chart.
+    """
     return fig
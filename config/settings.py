@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 from pathlib import Path
 
@@ -42,4 +43,24 @@ RISK_COLORS = {
     'TINGGI': '#c62828',
     'SEDANG': '#ef6c00',
     'RENDAH': '#2e7d32'
-}
\ No newline at end of file
+}
+
+# Chart payload limits (analysis page scatter)
+CHART_MAX_POINTS = 5000
+CHART_MAX_POINTS_OPTIONS = [1000, 2000, 5000, 10000, 20000]
+CHART_WEBGL_THRESHOLD = 1000
+CHART_DENSITY_BINS = 40
+
+# Precompute the model probability of every Prediksi Individu input
+# (IPK x Kehadiran x Status_Risk lattice) when the model is loaded
+PREDICTION_GRID_ENABLED = True
+
+# Instrumentation (utils.instrumentation): JSON-lines performance log
+# (file path, or '-' for stderr) and the port of the local Prometheus
+# /metrics endpoint (0 = off)
+PERF_LOG = os.environ.get('DROPOUT_PERF_LOG')
+METRICS_PORT = int(os.environ.get('DROPOUT_METRICS_PORT') or 0)
+
+# Profile every rerun of the selected page (utils.profiling); a single
+# session can ask for it with the ?profile=1 query parameter instead
+PROFILE_ENABLED = os.environ.get('DROPOUT_PROFILE', '0').lower() not in ('', '0', 'false')
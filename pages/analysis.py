@@ -1,40 +1,91 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.predictor import batch_predict
-from utils.preprocessor import process_data
+from config.settings import CHART_MAX_POINTS, CHART_MAX_POINTS_OPTIONS, CHART_WEBGL_THRESHOLD, CHART_DENSITY_BINS
+from utils.chart_data import histogram, stratified_sample, density_grid
+from utils.search_index import search
+from utils.timeseries import (
+    TREND_IPK_DROP, TREND_KEHADIRAN_SLOPE, TREND_LOW_STREAK, TREND_WARNING_LABELS, student_history, trend_warnings
+)
+from utils.scored_data import dataset_fingerprint
+from utils.export import EXPORT_FORMATS, available_formats, export_path, export_signature, get_export
+from utils.risk_rules import describe, load_rules, prediction_threshold, threshold
+from utils.instrumentation import timed
 
-def show(df, model, scaler):
-    """Display student analysis page (REVISED)"""
+RISK_LEVEL_COLORS = {'TINGGI': '#f44336', 'SEDANG': '#ff9800', 'RENDAH': '#4caf50'}
+
+# Dropout probability histogram: 50 bins of 2% over 0-100%
+PROBABILITY_EDGES = np.linspace(0, 100, 51)
+
+# Student table: source columns -> displayed names
+TABLE_COLUMNS = {
+    'NIM': 'NIM',
+    'Nama': 'Nama',
+    'Prodi': 'Prodi',
+    'Angkatan_Display': 'Angkatan',
+    'Semester': 'Semester',
+    'Status': 'Status',
+    'IPK': 'IPK',
+    'SKS': 'SKS',
+    'Kehadiran': 'Kehadiran (%)',
+    'Prediction': 'Prediksi',
+    'Risk_Level': 'Level Risiko',
+    'Dropout_Probability': 'Prob. Dropout (%)',
+    'Actual_Dropout': 'Kondisi Aktual'
+}
+
+HIGH_RISK_COLUMNS = {
+    'NIM': 'NIM',
+    'Nama': 'Nama',
+    'Prodi': 'Prodi',
+    'Angkatan_Display': 'Angkatan',
+    'Status': 'Status',
+    'IPK': 'IPK',
+    'Kehadiran': 'Kehadiran (%)',
+    'Dropout_Probability': 'Prob. Dropout (%)',
+    'Actual_Dropout': 'Kondisi Aktual'
+}
+
+TABLE_SORT_OPTIONS = ['Prob. Dropout (%)', 'NIM', 'Nama', 'IPK', 'Kehadiran (%)', 'SKS', 'Angkatan']
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+
+# Trend warning table: trajectory feature / latest-row columns -> displayed names
+TREND_COLUMNS = {
+    'NIM': 'NIM',
+    'Nama': 'Nama',
+    'Prodi': 'Prodi',
+    'Angkatan_Display': 'Angkatan',
+    'n_semesters': 'Jumlah Semester',
+    'ipk': 'IPK',
+    'ipk_delta': 'Δ IPK',
+    'kehadiran': 'Kehadiran (%)',
+    'kehadiran_slope': 'Tren Kehadiran (poin/semester)',
+    'low_streak': 'Semester Rendah Berturut-turut',
+    'Risk_Level': 'Level Risiko',
+    'warnings': 'Peringatan'
+}
+
+RISK_ROW_STYLES = {
+    'TINGGI': 'background-color: #ffebee',
+    'SEDANG': 'background-color: #fff3e0',
+    'RENDAH': 'background-color: #e8f5e9'
+}
+
+def show(df_analysis, search_index=None, timeseries=None):
+    """
+    Display student analysis page (df_analysis is the cached scored dataset,
+    search_index its NIM/Nama index, timeseries its per-student histories)
+    """
     st.title("📈 Analisis Detail Mahasiswa")
     
-    st.markdown("""
+    st.markdown(f"""
     Analisis komprehensif risiko dropout untuk seluruh mahasiswa.
     
-    **Kriteria Dropout**: IPK < 2.0 **DAN** Kehadiran < 70%
+    **Kriteria Dropout**: {describe(load_rules(), 'actual_dropout')}
     """)
     
-    # Convert Angkatan (subtract 4 years for display)
-    df = df.copy()
-    df['Angkatan_Display'] = df['Angkatan'] - 4
-    
-    # Process and predict
-    with st.spinner("Memproses prediksi untuk semua mahasiswa..."):
-        df_processed = process_data(df)
-        predictions, dropout_probs, risk_levels = batch_predict(model, scaler, df_processed)
-        
-        df_analysis = df.copy()
-        df_analysis['Prediction'] = predictions
-        df_analysis['Risk_Level'] = risk_levels
-        df_analysis['Dropout_Probability'] = [p * 100 for p in dropout_probs]  # Convert to percentage
-        
-        # Add actual dropout condition
-        df_analysis['Actual_Dropout'] = df_analysis.apply(
-            lambda row: 'DROPOUT' if (row['Kehadiran'] < 0.7 and row['IPK'] < 2.0) else 'NON-DROPOUT',
-            axis=1
-        )
-    
     # Summary metrics at top
     _display_summary_metrics(df_analysis)
     
@@ -76,15 +127,16 @@ def show(df, model, scaler):
     
     
     # Tabs for different views
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "📋 Data Mahasiswa", 
         "📊 Visualisasi", 
         "📈 Statistik Detail",
-        "🔴 High Risk Students"
+        "🔴 High Risk Students",
+        "📉 Tren & Peringatan Dini"
     ])
     
     with tab1:
-        _display_student_table(df_display)
+        _display_student_table(df_display, search_index)
     
     with tab2:
         _display_visualizations(df_display)
@@ -94,7 +146,14 @@ def show(df, model, scaler):
     
     with tab4:
         _display_high_risk_students(df_display)
+    
+    with tab5:
+        if timeseries is None:
+            st.info("Riwayat semester tidak tersedia.")
+        else:
+            _display_trend_warnings(df_analysis, df_display, timeseries)
 
+@timed()
 def _display_summary_metrics(df_analysis):
     """Display summary metrics at the top"""
     st.subheader("📊 Ringkasan Keseluruhan")
@@ -131,7 +190,7 @@ def _display_summary_metrics(df_analysis):
             f"{total_actual_dropout:,}",
             delta=f"{actual_rate:.1f}%",
             delta_color="inverse",
-            help="Mahasiswa yang memenuhi kriteria dropout (IPK<2.0 & Kehadiran<70%)"
+            help=f"Mahasiswa yang memenuhi kriteria dropout ({describe(load_rules(), 'actual_dropout')})"
         )
     
     with col4:
@@ -152,52 +211,132 @@ def _display_summary_metrics(df_analysis):
         )
 
 def _apply_filters(df, filter_prodi, filter_angkatan, filter_status, filter_risk):
-    """Apply filters to dataframe"""
-    df_filtered = df.copy()
+    """Apply filters to dataframe (one combined mask, no copy when nothing is filtered)"""
+    mask = None
+    
+    for column, selected in [
+        ('Prodi', filter_prodi),
+        ('Angkatan_Display', filter_angkatan),
+        ('Status', filter_status),
+        ('Risk_Level', filter_risk)
+    ]:
+        if 'Semua' not in selected:
+            column_mask = df[column].isin(selected)
+            mask = column_mask if mask is None else mask & column_mask
+    
+    return df if mask is None else df[mask]
+
+def _format_student_table(df):
+    """Select, scale and rename the student table columns"""
+    table = df[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS)
+    table['Kehadiran (%)'] = (table['Kehadiran (%)'] * 100).round(1)
+    table['Prob. Dropout (%)'] = table['Prob. Dropout (%)'].round(1)
+    return table
+
+def _format_high_risk_table(df):
+    """Select, scale and rename the high risk table columns"""
+    table = df[list(HIGH_RISK_COLUMNS)].rename(columns=HIGH_RISK_COLUMNS)
+    table['Kehadiran (%)'] = (table['Kehadiran (%)'] * 100).round(1)
+    return table
+
+def _export_controls(df_rows, key, label, file_name, transform):
+    """
+    Format picker plus a download button for df_rows
+    
+    The file is only written (in chunks, through utils.export) when the
+    user asks for it. Only then is the download button built, so the file
+    is not read into the page on every rerun; once downloaded (or once the
+    selection or data changes) the button goes back to "prepare", which
+    reuses the file already on disk.
+    """
+    col1, col2 = st.columns([1, 2])
     
-    if 'Semua' not in filter_prodi:
-        df_filtered = df_filtered[df_filtered['Prodi'].isin(filter_prodi)]
+    with col1:
+        fmt = st.selectbox("Format", available_formats(), format_func=str.upper, key=f"{key}_format", label_visibility="collapsed")
     
-    if 'Semua' not in filter_angkatan:
-        df_filtered = df_filtered[df_filtered['Angkatan_Display'].isin(filter_angkatan)]
+    extension, mime = EXPORT_FORMATS[fmt]
+    parts = (dataset_fingerprint(), key)
+    path = export_path(export_signature(df_rows, fmt, *parts), fmt)
+    prepared_key = f"{key}_prepared"
     
-    if 'Semua' not in filter_status:
-        df_filtered = df_filtered[df_filtered['Status'].isin(filter_status)]
+    with col2:
+        if st.session_state.get(prepared_key) == str(path) and path.exists():
+            with open(path, 'rb') as f:
+                st.download_button(
+                    label=f"{label} ({fmt.upper()})",
+                    data=f,
+                    file_name=f"{file_name}{extension}",
+                    mime=mime,
+                    key=f"{key}_download",
+                    on_click=st.session_state.pop,
+                    args=(prepared_key, None),
+                    use_container_width=True
+                )
+        elif st.button(f"📦 Siapkan File {fmt.upper()}", help=label, key=f"{key}_prepare", use_container_width=True):
+            try:
+                with st.spinner("Menyiapkan file..."):
+                    st.session_state[prepared_key] = str(get_export(df_rows, fmt, transform, *parts))
+            except ValueError as e:
+                # e.g. more rows than one Excel sheet holds
+                st.error(str(e))
+            else:
+                st.rerun()
+
+def _risk_row_styles(table):
+    """Row background per risk level, built column-wise for the whole page at once"""
+    row_styles = table['Level Risiko'].map(RISK_ROW_STYLES).fillna('').to_numpy(dtype=object)
+    return pd.DataFrame(
+        np.repeat(row_styles[:, None], table.shape[1], axis=1),
+        index=table.index,
+        columns=table.columns
+    )
+
+@timed()
+def _display_student_table(df_display, search_index=None):
+    """Display one sorted page of the student table, styling only the visible rows"""
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
     
-    if 'Semua' not in filter_risk:
-        df_filtered = df_filtered[df_filtered['Risk_Level'].isin(filter_risk)]
+    with col1:
+        query = st.text_input("Cari NIM / Nama", placeholder="contoh: 2020 atau BUDI")
     
-    return df_filtered
-
-def _display_student_table(df_display):
-    """Display student data table with styling"""
-    st.subheader(f"📋 Daftar Mahasiswa ({len(df_display):,} mahasiswa)")
-    
-    df_display_styled = df_display[['NIM', 'Nama', 'Prodi', 'Angkatan_Display', 'Semester', 'Status', 'IPK', 'SKS', 'Kehadiran', 'Prediction', 'Risk_Level', 'Dropout_Probability', 'Actual_Dropout']].copy()
-    
-    df_display_styled['Kehadiran'] = (df_display_styled['Kehadiran'] * 100).round(1)
-    df_display_styled['Dropout_Probability'] = df_display_styled['Dropout_Probability'].round(1)
-    
-    # Rename columns for better display
-    df_display_styled.columns = [
-        'NIM', 'Nama', 'Prodi', 'Angkatan', 'Semester', 'Status',
-        'IPK', 'SKS', 'Kehadiran (%)', 'Prediksi', 'Level Risiko',
-        'Prob. Dropout (%)', 'Kondisi Aktual'
-    ]
-    
-    # Styling function
-    def highlight_risk(row):
-        if row['Level Risiko'] == 'TINGGI':
-            return ['background-color: #ffebee'] * len(row)
-        elif row['Level Risiko'] == 'SEDANG':
-            return ['background-color: #fff3e0'] * len(row)
-        elif row['Level Risiko'] == 'RENDAH':
-            return ['background-color: #e8f5e9'] * len(row)
-        return [''] * len(row)
+    with col2:
+        sort_label = st.selectbox("Urutkan berdasarkan", TABLE_SORT_OPTIONS)
+    
+    with col3:
+        ascending = st.selectbox("Urutan", ["Menurun", "Menaik"]) == "Menaik"
+    
+    with col4:
+        page_size = st.selectbox("Baris per halaman", TABLE_PAGE_SIZES, index=1)
+    
+    # Search through the NIM / Nama index instead of scanning names
+    if search_index is not None:
+        matches = search(search_index, query)
+        if matches is not None:
+            df_display = df_display[df_display.index.isin(matches)]
+    
+    total = len(df_display)
+    st.subheader(f"📋 Daftar Mahasiswa ({total:,} mahasiswa)")
+    
+    if total == 0:
+        st.info("Tidak ada mahasiswa yang cocok dengan pencarian.")
+        return
+    
+    n_pages = (total - 1) // page_size + 1
+    page = st.number_input(f"Halaman (dari {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1)
+    
+    # Sort only the key column, then take the rows of the requested page
+    sort_column = next(col for col, label in TABLE_COLUMNS.items() if label == sort_label)
+    order = df_display[sort_column].sort_values(ascending=ascending, kind='stable', na_position='last').index
+    start = (page - 1) * page_size
+    page_rows = df_display.loc[order[start:start + page_size]]
+    
+    df_display_styled = _format_student_table(page_rows)
+    
+    st.caption(f"Menampilkan {start + 1:,}-{start + len(page_rows):,} dari {total:,} mahasiswa")
     
     # Display styled dataframe
     st.dataframe(
-        df_display_styled.style.apply(highlight_risk, axis=1)
+        df_display_styled.style.apply(_risk_row_styles, axis=None)
         .format({
             'IPK': '{:.2f}',
             'Kehadiran (%)': '{:.1f}',
@@ -205,37 +344,32 @@ def _display_student_table(df_display):
         })
         .set_properties(**{'color': 'black'}),
         use_container_width=True,
-        height=500
+        height=500,
+        hide_index=True
     )
     
-    # Download buttons
+    # Download buttons (files are generated on request)
     col1, col2 = st.columns(2)
     
     with col1:
-        csv = df_display_styled.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Download Data (CSV)",
-            data=csv,
-            file_name='prediksi_dropout_mahasiswa.csv',
-            mime='text/csv',
-            use_container_width=True
+        _export_controls(
+            df_display, 'students', "📥 Download Data",
+            'prediksi_dropout_mahasiswa', _format_student_table
         )
     
     with col2:
         # Export only high risk students
-        high_risk_df = df_display_styled[df_display_styled['Level Risiko'] == 'TINGGI']
-        csv_high = high_risk_df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="🔴 Download High Risk Only (CSV)",
-            data=csv_high,
-            file_name='high_risk_students.csv',
-            mime='text/csv',
-            use_container_width=True
+        _export_controls(
+            df_display[df_display['Risk_Level'] == 'TINGGI'], 'students_high_risk', "🔴 Download High Risk Only",
+            'high_risk_students', _format_student_table
         )
 
+@timed()
 def _display_visualizations(df_display):
     """Display visualizations"""
     st.subheader("📊 Visualisasi Data")
+    rules = load_rules()
+    dropout_threshold = prediction_threshold(rules)
     
     col1, col2 = st.columns(2)
     
@@ -264,23 +398,32 @@ def _display_visualizations(df_display):
         st.plotly_chart(fig_risk, use_container_width=True)
     
     with col2:
-        # Dropout Probability Distribution
-        fig_prob = px.histogram(
-            df_display,
-            x='Dropout_Probability',
-            nbins=50,
+        # Dropout Probability Distribution (binned server-side)
+        centers, widths, counts = histogram(df_display['Dropout_Probability'], PROBABILITY_EDGES)
+        fig_prob = go.Figure(data=[
+            go.Bar(
+                x=centers,
+                y=counts,
+                width=widths,
+                marker_color='#2196F3'
+            )
+        ])
+        
+        fig_prob.update_layout(
             title="Distribusi Probabilitas Dropout",
-            labels={'Dropout_Probability': 'Probabilitas Dropout (%)'},
-            color_discrete_sequence=['#2196F3']
+            xaxis_title='Probabilitas Dropout (%)',
+            yaxis_title='count',
+            bargap=0
         )
         
-        fig_prob.add_vline(
-            x=50, 
-            line_dash="dash", 
-            line_color="red", 
-            line_width=2,
-            annotation_text="Threshold 50%"
-        )
+        if dropout_threshold is not None:
+            fig_prob.add_vline(
+                x=dropout_threshold * 100, 
+                line_dash="dash", 
+                line_color="red", 
+                line_width=2,
+                annotation_text=f"Threshold Dropout {dropout_threshold * 100:g}%"
+            )
         
         fig_prob.update_traces(
             hovertemplate='<b>Probabilitas:</b> %{x:.1f}%<br><b>Jumlah:</b> %{y}<extra></extra>'
@@ -333,67 +476,121 @@ def _display_visualizations(df_display):
         st.plotly_chart(fig_angkatan, use_container_width=True)
     
     # IPK vs Dropout Probability Scatter
-    fig_scatter = px.scatter(
-        df_display,
-        x='IPK',
-        y='Dropout_Probability',
-        color='Risk_Level',
-        size='Kehadiran',
-            hover_data={
-            'NIM': True,
-            'Nama': True,
-            'Prodi': True,
-            'Angkatan_Display': True,
-            'IPK': ':.2f',
-            'Kehadiran': ':.2%',
-            'Dropout_Probability': ':.1f',
-            'Risk_Level': True
-        },
-        title="IPK vs Probabilitas Dropout",
-        labels={
-            'Dropout_Probability': 'Probabilitas Dropout (%)',
-            'IPK': 'IPK',
-            'Risk_Level': 'Level Risiko',
-            'Kehadiran': 'Kehadiran',
-            'Angkatan_Display': 'Angkatan'
-        },
-        color_discrete_map={'TINGGI': '#f44336', 'SEDANG': '#ff9800', 'RENDAH': '#4caf50'}
-    )
-    
-    fig_scatter.add_hline(
-        y=50, 
-        line_dash="dash", 
-        line_color="red",
-        line_width=2,
-        annotation_text="Threshold Dropout 50%"
-    )
+    fig_scatter = _scatter_figure(df_display)
     
-    fig_scatter.add_vline(
-        x=2.0, 
-        line_dash="dash", 
-        line_color="blue",
-        line_width=2,
-        annotation_text="IPK Threshold 2.0"
-    )
+    if dropout_threshold is not None:
+        fig_scatter.add_hline(
+            y=dropout_threshold * 100, 
+            line_dash="dash", 
+            line_color="red",
+            line_width=2,
+            annotation_text=f"Threshold Dropout {dropout_threshold * 100:g}%"
+        )
     
-    fig_scatter.update_traces(
-        hovertemplate=(
-            '<b>%{customdata[1]}</b><br>' +
-            '<b>NIM:</b> %{customdata[0]}<br>' +
-            '<b>Prodi:</b> %{customdata[2]}<br>' +
-            '<b>Angkatan:</b> %{customdata[3]}<br>' +
-            '<b>IPK:</b> %{x:.2f}<br>' +
-            '<b>Dropout Prob:</b> %{y:.1f}%<br>' +
-            '<b>Kehadiran:</b> %{marker.size:.1%}<br>' +
-            '<b>Risk Level:</b> %{fullData.name}' +
-            '<extra></extra>'
+    ipk_threshold = threshold(rules, 'ipk_risk')
+    if ipk_threshold is not None:
+        fig_scatter.add_vline(
+            x=ipk_threshold, 
+            line_dash="dash", 
+            line_color="blue",
+            line_width=2,
+            annotation_text=f"IPK Threshold {ipk_threshold}"
         )
-    )
     
     fig_scatter.update_layout(height=500)
     
     st.plotly_chart(fig_scatter, use_container_width=True)
 
+@timed()
+def _scatter_figure(df_display):
+    """
+    IPK vs dropout probability scatter with a bounded payload
+    
+    Above the selected point count the chart shows a density grid of all
+    students under a stratified sample (per Risk_Level) of the points;
+    large series are drawn with WebGL.
+    """
+    max_points = st.select_slider(
+        "Maks. titik scatter",
+        options=CHART_MAX_POINTS_OPTIONS,
+        value=CHART_MAX_POINTS,
+        help="Di atas jumlah ini, scatter menampilkan sampel per level risiko di atas peta kepadatan seluruh mahasiswa"
+    )
+    
+    total = len(df_display)
+    positions = stratified_sample(df_display, 'Risk_Level', max_points)
+    sample = df_display.iloc[positions]
+    sampled = len(sample) < total
+    
+    fig = go.Figure()
+    
+    if sampled:
+        x_centers, y_centers, counts = density_grid(
+            df_display['IPK'], df_display['Dropout_Probability'],
+            x_range=[0, 4], y_range=[0, 100], nbins=CHART_DENSITY_BINS
+        )
+        fig.add_trace(go.Heatmap(
+            x=x_centers,
+            y=y_centers,
+            z=counts,
+            colorscale='Greys',
+            opacity=0.5,
+            showscale=False,
+            name='Kepadatan',
+            hovertemplate='<b>IPK:</b> %{x:.2f}<br><b>Dropout Prob:</b> %{y:.1f}%<br><b>Jumlah:</b> %{z}<extra></extra>'
+        ))
+    
+    scatter_trace = go.Scattergl if len(sample) > CHART_WEBGL_THRESHOLD else go.Scatter
+    kehadiran_max = max(float(sample['Kehadiran'].max()), 1e-9) if len(sample) else 1
+    
+    for level, color in RISK_LEVEL_COLORS.items():
+        level_data = sample[sample['Risk_Level'] == level]
+        if len(level_data) == 0:
+            continue
+        
+        fig.add_trace(scatter_trace(
+            x=level_data['IPK'],
+            y=level_data['Dropout_Probability'],
+            mode='markers',
+            name=level,
+            marker={
+                'color': color,
+                'size': level_data['Kehadiran'],
+                'sizemode': 'area',
+                'sizeref': 2 * kehadiran_max / 20 ** 2,
+                'sizemin': 2
+            },
+            customdata=np.column_stack([
+                level_data['NIM'], level_data['Nama'], level_data['Prodi'],
+                level_data['Angkatan_Display'], level_data['Kehadiran']
+            ]),
+            hovertemplate=(
+                '<b>%{customdata[1]}</b><br>' +
+                '<b>NIM:</b> %{customdata[0]}<br>' +
+                '<b>Prodi:</b> %{customdata[2]}<br>' +
+                '<b>Angkatan:</b> %{customdata[3]}<br>' +
+                '<b>IPK:</b> %{x:.2f}<br>' +
+                '<b>Dropout Prob:</b> %{y:.1f}%<br>' +
+                '<b>Kehadiran:</b> %{customdata[4]:.1%}<br>' +
+                '<b>Risk Level:</b> %{fullData.name}' +
+                '<extra></extra>'
+            )
+        ))
+    
+    title = "IPK vs Probabilitas Dropout"
+    if sampled:
+        title += f" (sampel {len(sample):,} dari {total:,} mahasiswa)"
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title='IPK',
+        yaxis_title='Probabilitas Dropout (%)',
+        legend_title_text='Level Risiko'
+    )
+    
+    return fig
+
+@timed()
 def _display_detailed_statistics(df_display):
     """Display detailed statistics"""
     st.subheader("📈 Statistik Detail")
@@ -423,6 +620,7 @@ def _display_detailed_statistics(df_display):
                 # Detail by Prodi
                 st.markdown("**Distribusi per Prodi:**")
                 prodi_counts = level_data['Prodi'].value_counts()
+                prodi_counts = prodi_counts[prodi_counts > 0]
                 for prodi, count in prodi_counts.items():
                     pct = count / len(level_data) * 100
                     st.write(f"- {prodi}: {count} mahasiswa ({pct:.1f}%)")
@@ -454,11 +652,12 @@ def _display_detailed_statistics(df_display):
     
     st.dataframe(angkatan_summary.sort_index(ascending=False), use_container_width=True)
 
+@timed()
 def _display_high_risk_students(df_display):
     """Display high risk students with priority"""
     st.subheader("🔴 Mahasiswa Berisiko Tinggi - PRIORITAS INTERVENSI")
     
-    high_risk = df_display[df_display['Risk_Level'] == 'TINGGI'].copy()
+    high_risk = df_display[df_display['Risk_Level'] == 'TINGGI']
     
     if len(high_risk) == 0:
         st.success("✅ Tidak ada mahasiswa dengan risiko tinggi!")
@@ -487,8 +686,8 @@ def _display_high_risk_students(df_display):
             
             with col2:
                 st.markdown(f"""
-                **IPK:** {student['IPK']:.2f} {'❌' if student['IPK'] < 2.0 else '✅'}  
-                **Kehadiran:** {student['Kehadiran']*100:.1f}% {'❌' if student['Kehadiran'] < 0.7 else '✅'}
+                **IPK:** {student['IPK']:.2f} {'❌' if student['IPK_Risk'] else '✅'}  
+                **Kehadiran:** {student['Kehadiran']*100:.1f}% {'❌' if student['Kehadiran_Risk'] else '✅'}
                 """)
             
             with col3:
@@ -502,17 +701,7 @@ def _display_high_risk_students(df_display):
     # All High Risk Table
     st.markdown(f"### 📋 Semua Mahasiswa Risiko Tinggi ({len(high_risk):,})")
     
-    high_risk_display = high_risk_sorted[[
-        'NIM', 'Nama', 'Prodi', 'Angkatan_Display', 'Status',
-        'IPK', 'Kehadiran', 'Dropout_Probability', 'Actual_Dropout'
-    ]].copy()
-    
-    high_risk_display['Kehadiran'] = (high_risk_display['Kehadiran'] * 100).round(1)
-    
-    high_risk_display.columns = [
-        'NIM', 'Nama', 'Prodi', 'Angkatan', 'Status',
-        'IPK', 'Kehadiran (%)', 'Prob. Dropout (%)', 'Kondisi Aktual'
-    ]
+    high_risk_display = _format_high_risk_table(high_risk_sorted)
     
     st.dataframe(
         high_risk_display.style.format({
@@ -564,11 +753,108 @@ def _display_high_risk_students(df_display):
         """)
     
     # Download high risk list
-    csv_high = high_risk_display.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Download Daftar High Risk (CSV)",
-        data=csv_high,
-        file_name=f'high_risk_students_{pd.Timestamp.now().strftime("%Y%m%d")}.csv',
-        mime='text/csv',
-        use_container_width=True
+    _export_controls(
+        high_risk_sorted, 'high_risk', "📥 Download Daftar High Risk",
+        f'high_risk_students_{pd.Timestamp.now().strftime("%Y%m%d")}', _format_high_risk_table
+    )
+
+@timed()
+def _display_trend_warnings(df_analysis, df_display, timeseries):
+    """Early warnings from each student's semester trajectory (latest semester within the filters)"""
+    st.subheader("📉 Peringatan Dini Berbasis Tren")
+    rules = load_rules()
+    st.caption(
+        f"Dihitung dari riwayat semester tiap mahasiswa: IPK turun ≥ {TREND_IPK_DROP:.2f} dari semester sebelumnya, "
+        f"tren kehadiran ≤ {TREND_KEHADIRAN_SLOPE * 100:.0f} poin per semester, atau "
+        f"≥ {TREND_LOW_STREAK} semester terakhir berturut-turut dengan "
+        f"{describe(rules, 'ipk_risk')} atau {describe(rules, 'kehadiran_risk')}."
+    )
+    
+    features = timeseries['features']
+    if len(df_display) < len(df_analysis):
+        # Students whose latest semester passes the filters
+        features = features[np.isin(features['last_row'], df_display.index)]
+    
+    flags = trend_warnings(features)
+    warned = flags.any(axis=1).to_numpy()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Mahasiswa Dipantau", f"{len(features):,}")
+    col2.metric(TREND_WARNING_LABELS['ipk_drop'], f"{int(flags['ipk_drop'].sum()):,}")
+    col3.metric(TREND_WARNING_LABELS['kehadiran_decline'], f"{int(flags['kehadiran_decline'].sum()):,}")
+    col4.metric(TREND_WARNING_LABELS['low_streak'], f"{int(flags['low_streak'].sum()):,}")
+    
+    if not warned.any():
+        st.success("✅ Tidak ada mahasiswa dengan tren memburuk!")
+        return
+    
+    warned_features = features[warned]
+    warned_flags = flags[warned]
+    latest = df_analysis.loc[warned_features['last_row'], ['Nama', 'Prodi', 'Angkatan_Display', 'Risk_Level']]
+    
+    labels = np.full(len(warned_flags), '', dtype=object)
+    for key, label in TREND_WARNING_LABELS.items():
+        labels = np.where(warned_flags[key], np.where(labels == '', label, labels + ', ' + label), labels)
+    
+    table = warned_features.assign(
+        Nama=latest['Nama'].to_numpy(),
+        Prodi=latest['Prodi'].to_numpy(),
+        Angkatan_Display=latest['Angkatan_Display'].to_numpy(),
+        Risk_Level=latest['Risk_Level'].to_numpy(),
+        kehadiran=warned_features['kehadiran'] * 100,
+        kehadiran_slope=warned_features['kehadiran_slope'] * 100,
+        warnings=labels
+    ).reset_index()
+    table = table.sort_values(['low_streak', 'kehadiran_slope'], ascending=[False, True], kind='stable')
+    
+    st.warning(f"⚠️ **{len(table):,} mahasiswa** menunjukkan tren memburuk.")
+    st.dataframe(
+        table[list(TREND_COLUMNS)].rename(columns=TREND_COLUMNS),
+        use_container_width=True,
+        hide_index=True,
+        height=400,
+        column_config={
+            'IPK': st.column_config.NumberColumn(format='%.2f'),
+            'Δ IPK': st.column_config.NumberColumn(format='%+.2f'),
+            'Kehadiran (%)': st.column_config.NumberColumn(format='%.1f'),
+            'Tren Kehadiran (poin/semester)': st.column_config.NumberColumn(format='%+.1f')
+        }
+    )
+    
+    # Semester history of one student (sliced from the time-series store)
+    st.markdown("#### 📈 Riwayat Semester Mahasiswa")
+    nim_query = st.text_input(
+        "NIM", value=str(table['NIM'].iloc[0]), key='trend_nim',
+        help="Riwayat IPK dan kehadiran per semester"
+    )
+    try:
+        history = student_history(timeseries, int(nim_query.strip()))
+    except ValueError:
+        history = None
+    
+    if history is None or history.empty:
+        st.info("NIM tidak ditemukan.")
+        return
+    
+    periods = history['Tahun'].astype(str) + ' ' + history['Semester']
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=periods, y=history['Kehadiran'] * 100, name='Kehadiran (%)',
+        mode='lines+markers', line=dict(color='#1976d2')
+    ))
+    fig.add_trace(go.Scatter(
+        x=periods, y=history['IPK'], name='IPK',
+        mode='lines+markers', line=dict(color='#ef6c00'), yaxis='y2'
+    ))
+    kehadiran_threshold = threshold(load_rules(), 'kehadiran_risk')
+    if kehadiran_threshold is not None:
+        fig.add_hline(y=kehadiran_threshold * 100, line_dash='dash', line_color='#1976d2', opacity=0.5)
+    fig.update_layout(
+        title=f"{nim_query.strip()} - {df_analysis.at[history.index[-1], 'Nama']}",
+        xaxis_title="Semester",
+        yaxis=dict(title="Kehadiran (%)", range=[0, 105]),
+        yaxis2=dict(title="IPK", range=[0, 4.1], overlaying='y', side='right'),
+        height=400,
+        legend=dict(orientation='h', y=-0.25)
     )
+    st.plotly_chart(fig, use_container_width=True)
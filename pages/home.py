@@ -1,16 +1,19 @@
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
 from config.chart_theme import apply_chart_theme
 
-def show(df, df_processed):
+# Number formats of the count tables (column_config instead of a pandas
+# Styler, which would import matplotlib on the first page)
+COUNT_TABLE_COLUMNS = {
+    'Jumlah': st.column_config.NumberColumn(format='localized'),
+    'Persentase': st.column_config.NumberColumn(format='%.1f%%')
+}
+
+def show(df):
     """Display home page"""
     st.title("🎓 Dashboard Prediksi Risiko Dropout Mahasiswa")
     st.markdown("### Sistem Prediksi Berbasis Machine Learning")
     
-    df = df.copy()
-    df['Angkatan_Display'] = df['Angkatan'] - 4
-    
     st.markdown("""
     Dashboard ini dirancang untuk membantu institusi pendidikan dalam:
     - 📊 Memantau status dan performa mahasiswa
@@ -31,11 +34,11 @@ def show(df, df_processed):
         st.metric("Total Mahasiswa", f"{len(df):,}")
 
     with col2:
-        dropout_rate = (df_processed['Target'].sum() / len(df)) * 100
+        dropout_rate = (df['Target'].sum() / len(df)) * 100
         st.metric(
             "Dropout Rate",
             f"{dropout_rate:.1f}%",
-            delta=f"{df_processed['Target'].sum()} mahasiswa",
+            delta=f"{df['Target'].sum()} mahasiswa",
             delta_color="inverse"
         )
 
@@ -100,9 +103,10 @@ def show(df, df_processed):
         status_df['Persentase'] = (status_df['Jumlah'] / status_df['Jumlah'].sum() * 100).round(1)
 
         st.dataframe(
-            status_df.style.format({'Jumlah': '{:,}', 'Persentase': '{:.1f}%'}),
+            status_df,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config=COUNT_TABLE_COLUMNS
         )
 
     # ===============================
@@ -147,9 +151,10 @@ def show(df, df_processed):
         prodi_df['Persentase'] = (prodi_df['Jumlah'] / prodi_df['Jumlah'].sum() * 100).round(1)
 
         st.dataframe(
-            prodi_df.style.format({'Jumlah': '{:,}', 'Persentase': '{:.1f}%'}),
+            prodi_df,
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config=COUNT_TABLE_COLUMNS
         )
 
     # ===============================
@@ -3,6 +3,11 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from utils.risk_rules import RISK_LEVELS, describe, describe_risk_levels, load_rules, probability_bands
+from utils.instrumentation import timed
+
+# Risk levels as named on this page
+LEVEL_NAMES = {'RENDAH': 'Low Risk', 'SEDANG': 'Medium Risk', 'TINGGI': 'High Risk'}
 
 # ============================================================
 # PAGE WRAPPER
@@ -39,6 +44,7 @@ def show(model_eval):
 # ============================================================
 # 1. OVERVIEW
 # ============================================================
+@timed()
 def _show_overview(model_eval):
     st.markdown("""
     ### 🤖 Tentang Model Machine Learning
@@ -54,12 +60,14 @@ def _show_overview(model_eval):
     col1, col2 = st.columns(2)
 
     # --- LEFT COLUMN ---
+    rules = load_rules()
+
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         ### 📊 Features yang Digunakan
         **3 fitur utama:**
-        1. **IPK** — Dropout jika < 2.0  
-        2. **Kehadiran** — Dropout jika < 70%  
+        1. **IPK** — Dropout jika {describe(rules, 'ipk_risk')}  
+        2. **Kehadiran** — Dropout jika {describe(rules, 'kehadiran_risk')}  
         3. **Status Risk** — 1 = Risiko tinggi
 
         Total Features: **3**
@@ -67,9 +75,9 @@ def _show_overview(model_eval):
 
     # --- RIGHT COLUMN ---
     with col2:
-        st.markdown("""
+        st.markdown(f"""
         ### 🎯 Target Variable
-        Dropout = IPK < 2.0 **AND** Kehadiran < 70%
+        Dropout = {describe(rules, 'actual_dropout')}
 
         **Preprocessing:**
         - Scaling (StandardScaler)
@@ -140,6 +148,7 @@ def _show_overview(model_eval):
 # ============================================================
 # 2. PERFORMANCE METRICS
 # ============================================================
+@timed()
 def _show_performance_metrics(model_eval):
     st.subheader("📊 Penjelasan Metrik Evaluasi Model")
 
@@ -229,6 +238,7 @@ def _show_performance_metrics(model_eval):
 # ============================================================
 # 3. MODEL COMPARISON
 # ============================================================
+@timed()
 def _show_model_comparison(model_eval):
     st.subheader("📈 Model Comparison (Visual & Interpretasi)")
 
@@ -320,6 +330,7 @@ Grafik radar juga menunjukkan konsistensi model-tree (RF, GB, XGB) yang mendekat
 # ============================================================
 # 4. 7 MODEL EVALUATION (WARNA-WARNI)
 # ============================================================
+@timed()
 def _show_7_models_evaluation(model_eval):
     st.subheader("📚 Evaluasi 7 Algoritma Machine Learning")
 
@@ -360,10 +371,13 @@ def _show_7_models_evaluation(model_eval):
         use_container_width=True
     )
 
+    _show_training_timings(models)
+
 # ============================
 # PENJELASAN TABEL (CAPTION)
 # ============================
-    st.markdown("""
+    rules = load_rules()
+    st.markdown(f"""
 ### 📝 Interpretasi Tabel Perbandingan 7 Model
 
 Tabel di atas menunjukkan performa masing-masing algoritma berdasarkan 5 metrik utama:
@@ -381,8 +395,8 @@ Beberapa model seperti **Random Forest, Gradient Boosting, XGBoost, bahkan SVM**
 2. **Kelas sangat seimbang setelah SMOTE**, sehingga model tidak bias.
 3. **Hubungan antar fitur bersifat non-linear yang cocok untuk model tree-based dan boosting**.
 4. Model ensemble seperti Random Forest & XGBoost sangat mudah mempelajari pola dropout yang jelas:
-   - IPK < 2.0  
-   - Kehadiran < 70%  
+   - {describe(rules, 'ipk_risk')}  
+   - {describe(rules, 'kehadiran_risk')}  
    - Status-risk = 1  
    Pola ini sangat *deterministic* sehingga model bisa belajar dengan sempurna.
 
@@ -554,10 +568,39 @@ Model lain juga kuat, tetapi **Random Forest** adalah yang:
 ➡ paling aman digunakan di produksi
 """)
 
+def _show_training_timings(models):
+    """Fit / predict times per model (only in evaluations written by utils.train)"""
+    rows = []
+    for name, metrics in models.items():
+        timings = metrics.get("timings")
+        if timings:
+            rows.append({
+                "Model": name,
+                "Fit (s)": timings.get("fit_s"),
+                "Predict (s)": timings.get("predict_s"),
+                "Rata-rata Fit CV (s)": timings.get("cv_fit_mean_s"),
+                "Rata-rata Predict CV (s)": timings.get("cv_predict_mean_s")
+            })
+    if not rows:
+        return
+
+    st.markdown("### ⏱️ Waktu Training & Prediksi")
+    st.dataframe(
+        pd.DataFrame(rows),
+        column_config={
+            col: st.column_config.NumberColumn(col, format="%.4f")
+            for col in ["Fit (s)", "Predict (s)", "Rata-rata Fit CV (s)", "Rata-rata Predict CV (s)"]
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption("Fit dan predict pada data test; kolom CV adalah rata-rata dari 5 fold cross-validation.")
+
 # ============================================================
 # 5. BUSINESS RULES
 # ============================================================
 def _show_business_rules():
+    rules = load_rules()
     st.subheader("🎯 Business Rules (Aturan Sistem Prediksi)")
 
     st.markdown("""
@@ -569,18 +612,22 @@ def _show_business_rules():
 
     # -------------------------------------------------------------------
     st.markdown("### 🧩 1. Aturan Dasar Dropout (Deterministic Rule)")
-    st.code("""
-Dropout = (IPK < 2.0) AND (Kehadiran < 70%)
-    """)
+    st.markdown(f"> Dropout = {describe(rules, 'actual_dropout')}")
     st.caption("Aturan ini digunakan sebagai dasar label pada dataset.")
 
     # -------------------------------------------------------------------
     st.markdown("### 📊 2. Kategori Risiko Prediksi")
 
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Low Risk", "0.00 – 0.30")
-    col2.metric("Medium Risk", "0.31 – 0.70")
-    col3.metric("High Risk", "0.71 – 1.00")
+    bands = probability_bands(rules)
+    for col, (level, low, high) in zip(st.columns(len(bands)), bands):
+        col.metric(LEVEL_NAMES.get(level, level), f"{low:.2f} – {high:.2f}")
+    st.caption("Rentang probabilitas dropout model untuk mahasiswa yang tidak tertangkap aturan lain.")
+
+    # Risk level rules are tried in order, the first match decides
+    levels = describe_risk_levels(rules) + [(RISK_LEVELS[rules['default_level']], "selain itu")]
+    st.markdown("**Urutan aturan level risiko** (aturan pertama yang terpenuhi):\n\n" + "\n".join(
+        f"{i}. **{level}**: {text}" for i, (level, text) in enumerate(levels, 1)
+    ))
 
     st.markdown("""
     Kategori risiko digunakan untuk mempermudah pihak akademik dalam mengambil tindakan.
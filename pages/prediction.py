@@ -1,15 +1,35 @@
 import streamlit as st
 import plotly.graph_objects as go
 from utils.predictor import predict_dropout_risk
+from utils.risk_rules import (
+    RISK_LEVELS, condition, describe, describe_prediction, describe_risk_levels, load_rules,
+    prediction_threshold, probability_bands
+)
+from utils.instrumentation import timed
 
-def show(model, scaler):
-    """Display individual prediction page (REVISED)"""
+# Gauge / what-if colors of the risk levels
+LEVEL_COLORS = {'TINGGI': '#f44336', 'SEDANG': '#ff9800', 'RENDAH': '#4caf50'}
+
+def _probability_colorscale(rules):
+    """Heatmap colorscale with one flat color per probability band of the risk rules"""
+    colorscale = []
+    for level, low, high in probability_bands(rules):
+        colorscale += [[low, LEVEL_COLORS[level]], [high, LEVEL_COLORS[level]]]
+    return colorscale
+
+def show(model, scaler, grid=None):
+    """Display individual prediction page (REVISED)
+    
+    grid (optional) is the precomputed probability grid; predictions and
+    the what-if chart are then read from it instead of the model.
+    """
     st.title("🔮 Prediksi Risiko Dropout Individu")
+    rules = load_rules()
     
-    st.markdown("""
+    st.markdown(f"""
     Masukkan data mahasiswa untuk memprediksi risiko dropout.
     
-    **Kriteria Dropout**: IPK < 2.0 **DAN** Kehadiran < 70%
+    **Kriteria Dropout**: {describe(rules, 'actual_dropout')}
     """)
     
     col1, col2 = st.columns(2)
@@ -36,12 +56,13 @@ def show(model, scaler):
         kehadiran = st.slider("Kehadiran (%)", 0, 100, 80, 1) / 100
         
         # Show warning if criteria met
-        if ipk < 2.0 and kehadiran < 0.7:
+        env = {'ipk': ipk, 'kehadiran': kehadiran}
+        if condition(rules, 'actual_dropout', env):
             st.error("⚠️ **WARNING**: Memenuhi kriteria dropout!")
-        elif ipk < 2.0:
-            st.warning("⚠️ IPK di bawah standar minimum (2.0)")
-        elif kehadiran < 0.7:
-            st.warning("⚠️ Kehadiran di bawah 70%")
+        elif condition(rules, 'ipk_risk', env):
+            st.warning(f"⚠️ IPK di bawah standar minimum ({describe(rules, 'ipk_risk')})")
+        elif condition(rules, 'kehadiran_risk', env):
+            st.warning(f"⚠️ Kehadiran di bawah standar ({describe(rules, 'kehadiran_risk')})")
     
     st.markdown("---")
     
@@ -49,13 +70,59 @@ def show(model, scaler):
         with st.spinner("Memproses prediksi..."):
             result = predict_dropout_risk(
                 model, scaler, 
-                ipk, kehadiran, status
+                ipk, kehadiran, status,
+                grid=grid
             )
             
             _display_prediction_result(result, nim, nama, prodi, angkatan)
+    
+    if grid is not None:
+        _display_what_if(grid, ipk, kehadiran, status)
 
+@timed()
+def _display_what_if(grid, ipk, kehadiran, status):
+    """Dropout probability over every IPK x Kehadiran input for the chosen status"""
+    st.markdown("### 🧭 Simulasi What-If")
+    st.caption(
+        f"Probabilitas dropout model untuk semua kombinasi IPK dan Kehadiran dengan status **{status}**. "
+        "Titik putih menandai input saat ini."
+    )
+    
+    rules = load_rules()
+    status_risk = 1 if status.upper() in rules['high_risk_statuses'] else 0
+    surface = grid['proba'][:, :, status_risk, 1] * 100
+    
+    fig = go.Figure(go.Heatmap(
+        x=grid['kehadiran'] * 100,
+        y=grid['ipk'],
+        z=surface.round(1),
+        colorscale=_probability_colorscale(rules),
+        zmin=0,
+        zmax=100,
+        colorbar={'title': 'Prob. (%)'},
+        hovertemplate='Kehadiran: %{x:.0f}%<br>IPK: %{y:.2f}<br>Probabilitas: %{z:.1f}%<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[kehadiran * 100],
+        y=[ipk],
+        mode='markers',
+        marker={'size': 14, 'color': 'white', 'line': {'color': 'black', 'width': 2}},
+        name='Input saat ini',
+        hoverinfo='skip'
+    ))
+    fig.update_layout(
+        xaxis_title="Kehadiran (%)",
+        yaxis_title="IPK",
+        height=450,
+        showlegend=False
+    )
+    
+    st.plotly_chart(fig, use_container_width=True)
+
+@timed()
 def _display_prediction_result(result, nim, nama, prodi, angkatan):
     """Display prediction results (REVISED)"""
+    rules = load_rules()
     st.success("✅ Prediksi Berhasil!")
     
     # Student info
@@ -127,6 +194,21 @@ def _display_prediction_result(result, nim, nama, prodi, angkatan):
     # Probability Gauge
     st.markdown("### 📊 Visualisasi Probabilitas")
     
+    gauge = {
+        'axis': {'range': [None, 100], 'tickwidth': 1},
+        'steps': [
+            {'range': [low * 100, high * 100], 'color': LEVEL_COLORS[level]}
+            for level, low, high in probability_bands(rules)
+        ]
+    }
+    cutoff = prediction_threshold(rules)
+    if cutoff is not None:
+        gauge['threshold'] = {
+            'line': {'color': "red", 'width': 4},
+            'thickness': 0.75,
+            'value': cutoff * 100
+        }
+    
     fig = go.Figure(go.Indicator(
         mode="gauge+number+delta",
         value=result['dropout_probability'] * 100,
@@ -134,19 +216,7 @@ def _display_prediction_result(result, nim, nama, prodi, angkatan):
         title={'text': "Probabilitas Dropout (%)", 'font': {'size': 24}},
         delta={'reference': 50, 'increasing': {'color': "red"}},
         number={'font': {'size': 40}},
-        gauge={
-            'axis': {'range': [None, 100], 'tickwidth': 1},
-            'steps': [
-                {'range': [0, 40], 'color': '#4caf50'},
-                {'range': [40, 70], 'color': '#ff9800'},
-                {'range': [70, 100], 'color': '#f44336'}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': 75
-            }
-        }
+        gauge=gauge
     ))
     
     fig.update_layout(
@@ -225,20 +295,21 @@ def _display_prediction_result(result, nim, nama, prodi, angkatan):
     
     # Additional insights
     with st.expander("📌 Penjelasan Hasil Prediksi"):
+        # Risk level rules are tried in order, the first match decides
+        levels = describe_risk_levels(rules) + [(RISK_LEVELS[rules['default_level']], "selain itu")]
+        risk_levels = "\n        ".join(f"{i}. **{level}**: {text}" for i, (level, text) in enumerate(levels, 1))
         st.markdown(f"""
         **Model Prediction Probability**: {details['model_prob']}
         
         **Business Rule**: 
-        - Dropout = IPK < 2.0 **DAN** Kehadiran < 70%
+        - Dropout = {describe(rules, 'actual_dropout')}
         - Kondisi aktual: **{details['business_rule']}**
         
         **Logika Prediksi**:
         - Model menggunakan 3 features: IPK, Kehadiran, Status Risk
-        - Threshold probability: 75% untuk klasifikasi dropout
+        - RISIKO DROPOUT jika {describe_prediction(rules)}
         - Enhanced logic: Business rule + Model probability
         
-        **Risk Level Determination**:
-        - **TINGGI**: Dropout probability > 70% ATAU memenuhi business rule
-        - **SEDANG**: Dropout probability 40-70%
-        - **RENDAH**: Dropout probability < 40%
+        **Risk Level Determination** (aturan pertama yang terpenuhi):
+        {risk_levels}
         """)
\ No newline at end of file
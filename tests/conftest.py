@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.data_loader import MODEL_PATH, SCALER_PATH
+
+# Rows on and next to every threshold of the risk rules, plus the inputs
+# the dashboard data really contains: missing values, lowercase and
+# missing statuses, Kehadiran in percent
+EDGE_ROWS = [
+    # IPK, Kehadiran, Status
+    (2.0, 0.7, 'AKTIF'),
+    (1.99, 0.69, 'AKTIF'),
+    (1.99, 0.7, 'cuti'),
+    (2.0, 0.69, 'Keluar'),
+    (1.99, 0.69, 'NON AKTIF'),
+    (1.99, 0.69, 'non aktif'),
+    (0.0, 0.0, 'CUTI'),
+    (4.0, 1.0, 'LULUS'),
+    (2.75, 0.85, 'REGISTRASI'),
+    (3.5, 0.5, 'lulus'),
+    (1.5, 0.3, None),
+    (3.0, 0.9, np.nan),
+    (np.nan, 0.4, 'AKTIF'),
+    (1.2, np.nan, 'CUTI'),
+    (1.5, 65.0, 'AKTIF'),
+    (3.2, 85.0, 'KELUAR'),
+    (0.5, 0.1, 'TIDAK DIKENAL'),
+]
+
+def pytest_configure(config):
+    # The scaler is fitted with feature names but scored with plain arrays
+    config.addinivalue_line('filterwarnings', 'ignore:X does not have valid feature names')
+
+def make_cohort(n_random=300, seed=0):
+    """Raw student frame (clean_dataset.xlsx columns): EDGE_ROWS then n_random random rows"""
+    rng = np.random.default_rng(seed)
+    ipk, kehadiran, status = (list(column) for column in zip(*EDGE_ROWS))
+    ipk += list(rng.uniform(0, 4, n_random).round(2))
+    kehadiran += list(rng.uniform(0, 1, n_random).round(2))
+    status += list(rng.choice(['AKTIF', 'LULUS', 'CUTI', 'KELUAR', 'NON AKTIF', 'aktif', 'cuti'], n_random))
+
+    n = len(ipk)
+    return pd.DataFrame({
+        'No': np.arange(1, n + 1),
+        'NIM': np.arange(2_100_000, 2_100_000 + n),
+        'Nama': [f"Mahasiswa {i}" for i in range(n)],
+        'Status': pd.Series(status, dtype=object),
+        'SKS': rng.integers(0, 145, n),
+        'IPK': ipk,
+        'Kehadiran': kehadiran,
+        'Angkatan': rng.choice([2020, 2021, 2022], n),
+        'Prodi': rng.choice(['SI', 'TI'], n),
+        'Semester': rng.choice(['GANJIL', 'GENAP'], n)
+    })
+
+@pytest.fixture
+def cohort():
+    return make_cohort()
+
+@pytest.fixture(scope='session')
+def sklearn_model():
+    """(model, scaler) unpickled from models/"""
+    import joblib
+    return joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
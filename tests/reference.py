@@ -0,0 +1,134 @@
+"""
+The original per-row scoring code, kept as the reference the vectorized,
+compiled, incremental and rule-driven paths must agree with
+
+predict_dropout_risk / batch_predict / process_data are the baseline
+implementations with the hard-coded policy (IPK < 2.0, Kehadiran < 70%,
+CUTI / KELUAR / NON AKTIF, the 0.05 / 0.3 / 0.4 / 0.7 / 0.75 cut-offs).
+The only change is that process_data gives a missing status
+Status_Risk 0 where the original raised.
+"""
+import numpy as np
+import pandas as pd
+
+HIGH_RISK_STATUSES = ['CUTI', 'KELUAR', 'NON AKTIF']
+KEHADIRAN_THRESHOLD = 0.7
+IPK_THRESHOLD = 2.0
+
+STATUS_MAPPING = {
+    'AKTIF': 0,
+    'LULUS': 1,
+    'CUTI': 2,
+    'KELUAR': 3,
+    'NON AKTIF': 4,
+    'REGISTRASI': 5
+}
+
+def risk_rules(ipk, kehadiran, status_risk, dropout_prob):
+    """(actual_dropout, final_prediction, risk_level) of one student"""
+    actual_dropout = (kehadiran < KEHADIRAN_THRESHOLD and ipk < IPK_THRESHOLD)
+
+    if actual_dropout and dropout_prob > 0.05:
+        final_prediction = 1
+    elif dropout_prob > 0.75:
+        final_prediction = 1
+    else:
+        final_prediction = 0
+
+    if actual_dropout:
+        if dropout_prob > 0.3 or status_risk == 1:
+            risk_level = 'TINGGI'
+        else:
+            risk_level = 'SEDANG'
+    else:
+        if dropout_prob > 0.7:
+            risk_level = 'TINGGI'
+        elif dropout_prob > 0.4:
+            risk_level = 'SEDANG'
+        else:
+            risk_level = 'RENDAH'
+
+    return actual_dropout, final_prediction, risk_level
+
+def predict_dropout_risk(model, scaler, ipk, kehadiran, status):
+    if kehadiran > 1:
+        kehadiran = kehadiran / 100
+
+    status_risk = 1 if status.upper() in HIGH_RISK_STATUSES else 0
+
+    features = np.array([[ipk, kehadiran, status_risk]])
+    probability = model.predict_proba(scaler.transform(features))[0]
+
+    actual_dropout, final_prediction, risk_level = risk_rules(ipk, kehadiran, status_risk, probability[1])
+    return {
+        'prediction': 'RISIKO DROPOUT' if final_prediction == 1 else 'TIDAK BERISIKO',
+        'actual_dropout_condition': actual_dropout,
+        'dropout_probability': float(probability[1]),
+        'safe_probability': float(probability[0]),
+        'risk_level': risk_level
+    }
+
+def batch_predict(model, scaler, df_processed):
+    predictions = []
+    dropout_probs = []
+    risk_levels = []
+
+    for _, row in df_processed.iterrows():
+        try:
+            result = predict_dropout_risk(model, scaler, row['IPK'], row['Kehadiran'], row['Status'])
+            predictions.append(result['prediction'])
+            dropout_probs.append(result['dropout_probability'])
+            risk_levels.append(result['risk_level'])
+        except Exception:
+            predictions.append('UNKNOWN')
+            dropout_probs.append(0)
+            risk_levels.append('UNKNOWN')
+
+    return predictions, dropout_probs, risk_levels
+
+def categorize_ipk(ipk):
+    if pd.isna(ipk):
+        return 0
+    if ipk >= 3.5:
+        return 4
+    elif ipk >= 3.0:
+        return 3
+    elif ipk >= 2.75:
+        return 2
+    elif ipk >= 2.0:
+        return 1
+    else:
+        return 0
+
+def process_data(df):
+    df_processed = df.copy()
+
+    for col in ['IPK', 'SKS', 'Kehadiran']:
+        if col in df_processed.columns:
+            df_processed[col] = df_processed[col].fillna(df_processed[col].median())
+
+    df_processed['Target'] = df_processed.apply(
+        lambda row: 1 if (row['Kehadiran'] < KEHADIRAN_THRESHOLD and row['IPK'] < IPK_THRESHOLD) else 0,
+        axis=1
+    )
+    df_processed['Status_Encoded'] = df_processed['Status'].map(STATUS_MAPPING)
+    df_processed['Status_Risk'] = df_processed['Status'].apply(
+        lambda x: 1 if isinstance(x, str) and x.upper() in HIGH_RISK_STATUSES else 0
+    )
+    df_processed['IPK_Category'] = df_processed['IPK'].apply(categorize_ipk)
+    df_processed['IPK_Risk'] = (df_processed['IPK'] < IPK_THRESHOLD).astype(int)
+    df_processed['Kehadiran_Category'] = pd.cut(
+        df_processed['Kehadiran'],
+        bins=[0, 0.5, 0.7, 0.85, 1.0],
+        labels=[0, 1, 2, 3],
+        include_lowest=True
+    )
+    df_processed['Kehadiran_Category'] = pd.to_numeric(df_processed['Kehadiran_Category'], errors='coerce').fillna(0).astype(int)
+    df_processed['Kehadiran_Risk'] = (df_processed['Kehadiran'] < KEHADIRAN_THRESHOLD).astype(int)
+    df_processed['Risk_Score'] = (
+        df_processed['IPK_Risk'] * 2 +
+        df_processed['Kehadiran_Risk'] * 2 +
+        df_processed['Status_Risk'] * 1
+    ).clip(upper=4)
+
+    return df_processed
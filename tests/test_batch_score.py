@@ -0,0 +1,48 @@
+"""Streaming batch scoring (user-011 / user-024) of xlsx, csv and parquet inputs"""
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from utils.batch_score import iter_input_chunks, run
+from utils.data_loader import read_model
+from utils.scoring import score_dataset
+
+@pytest.fixture
+def inputs(cohort, tmp_path):
+    """The cohort as csv, parquet and xlsx (with Angkatan stored as text, like clean_dataset.xlsx)"""
+    paths = {fmt: tmp_path / f"cohort.{fmt}" for fmt in ['csv', 'parquet', 'xlsx']}
+    cohort.to_csv(paths['csv'], index=False)
+    cohort.to_parquet(paths['parquet'], index=False)
+    cohort.assign(Angkatan=cohort['Angkatan'].astype(str)).to_excel(paths['xlsx'], index=False)
+    return paths
+
+def test_xlsx_chunks_have_numeric_columns(inputs):
+    for chunk in iter_input_chunks(inputs['xlsx'], chunk_size=100):
+        for col in ['No', 'NIM', 'SKS', 'IPK', 'Kehadiran', 'Angkatan']:
+            assert pd.api.types.is_numeric_dtype(chunk[col]), col
+
+@pytest.mark.parametrize('chunk_size', [1, 50, 1000])
+def test_xlsx_scores_like_csv_and_parquet(inputs, tmp_path, chunk_size):
+    results = {
+        fmt: run(path, tmp_path / f"scored-{fmt}.csv", chunk_size=chunk_size)
+        for fmt, path in inputs.items()
+    }
+
+    for key in ['rows', 'fill_values', 'risk_levels', 'predictions', 'summary']:
+        assert results['xlsx'][key] == results['csv'][key] == results['parquet'][key], key
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "scored-xlsx.csv"),
+        pd.read_csv(tmp_path / "scored-csv.csv")
+    )
+
+def test_summary_matches_in_memory_scoring(inputs, cohort, tmp_path):
+    model, scaler, _ = read_model()
+    df_scored = score_dataset(model, scaler, cohort)
+
+    result = run(inputs['xlsx'], tmp_path / "scored.parquet", chunk_size=64)
+
+    assert result['rows'] == len(cohort)
+    assert result['risk_levels'] == dict(Counter(df_scored['Risk_Level']))
+    assert result['summary']['total'] == len(cohort)
+    assert result['summary']['predicted_dropout'] == int((df_scored['Prediction'] == 'RISIKO DROPOUT').sum())
@@ -0,0 +1,55 @@
+"""NumPy-compiled forest and scaler (user-013 / user-015) against sklearn"""
+import numpy as np
+import pytest
+
+from utils.compiled_model import compile_model, CompiledForest, CompiledScaler, load_compiled_model
+from utils.predictor import predict_dropout_risk_batch
+from utils.probability_grid import GRID_IPK, GRID_KEHADIRAN
+
+def features():
+    """The whole 0.01 input lattice plus random, out-of-range and missing inputs"""
+    ipk, kehadiran, status_risk = np.meshgrid(GRID_IPK, GRID_KEHADIRAN, [0, 1], indexing='ij')
+    lattice = np.column_stack([ipk.ravel(), kehadiran.ravel(), status_risk.ravel()])
+
+    rng = np.random.default_rng(0)
+    extra = np.column_stack([
+        rng.uniform(-1, 5, 5000),
+        rng.uniform(-0.5, 1.5, 5000),
+        rng.integers(0, 2, 5000)
+    ])
+    extra[::7, 0] = np.nan
+    extra[::11, 1] = np.nan
+    return np.vstack([lattice, extra])
+
+@pytest.mark.parametrize('mmap', [False, True], ids=['in-memory', 'mmap'])
+def test_compiled_probabilities_match_sklearn(sklearn_model, mmap):
+    model, scaler = sklearn_model
+    forest, compiled_scaler = load_compiled_model(mmap=mmap)
+    X = features()
+
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_array_equal(compiled_scaler.transform(X), scaler.transform(X))
+    np.testing.assert_array_equal(forest.predict_proba(compiled_scaler.transform(X)), expected)
+    np.testing.assert_array_equal(forest.traverse_proba(compiled_scaler.transform(X)), expected)
+    np.testing.assert_array_equal(forest.predict(compiled_scaler.transform(X)), model.predict(scaler.transform(X)))
+
+def test_compile_model_in_memory(sklearn_model):
+    model, scaler = sklearn_model
+    arrays = compile_model(model, scaler)
+    forest, compiled_scaler = CompiledForest(arrays), CompiledScaler(arrays)
+    X = features()[::13]
+
+    np.testing.assert_array_equal(
+        forest.predict_proba(compiled_scaler.transform(X)),
+        model.predict_proba(scaler.transform(X))
+    )
+
+def test_compiled_batch_scoring_matches_sklearn(sklearn_model, cohort):
+    model, scaler = sklearn_model
+    compiled = load_compiled_model(mmap=False)
+    columns = (cohort['IPK'].fillna(2.5), cohort['Kehadiran'].fillna(0.8), cohort['Status'])
+
+    expected = predict_dropout_risk_batch(model, scaler, *columns)
+    actual = predict_dropout_risk_batch(*compiled, *columns)
+    for key in expected:
+        np.testing.assert_array_equal(actual[key], expected[key], err_msg=key)
@@ -0,0 +1,33 @@
+"""Chunked exports (user-010)"""
+import pandas as pd
+import pytest
+
+from utils import export
+from utils.export import iter_chunks, write_chunks, write_export
+
+@pytest.fixture
+def small_sheet(monkeypatch):
+    """An Excel sheet of 10 rows (header included)"""
+    monkeypatch.setattr(export, 'XLSX_MAX_ROWS', 10)
+
+def test_formats_round_trip(cohort, tmp_path):
+    df = cohort[['NIM', 'IPK', 'Status']]
+    for fmt, read in [('csv', pd.read_csv), ('xlsx', pd.read_excel), ('parquet', pd.read_parquet)]:
+        path = write_export(df, tmp_path / f"out.{fmt}", fmt, chunk_size=7)
+        assert len(read(path)) == len(df), fmt
+
+def test_xlsx_fills_the_sheet_exactly(cohort, tmp_path, small_sheet):
+    path = write_export(cohort.iloc[:9], tmp_path / "out.xlsx", 'xlsx', chunk_size=4)
+    assert len(pd.read_excel(path)) == 9
+
+def test_xlsx_over_the_row_limit_is_refused(cohort, tmp_path, small_sheet):
+    with pytest.raises(ValueError, match='csv or parquet'):
+        write_export(cohort.iloc[:10], tmp_path / "out.xlsx", 'xlsx')
+    # csv has no limit
+    assert write_export(cohort.iloc[:10], tmp_path / "out.csv", 'csv').exists()
+
+def test_streamed_xlsx_over_the_row_limit_leaves_no_file(cohort, tmp_path, small_sheet):
+    path = tmp_path / "out.xlsx"
+    with pytest.raises(ValueError, match='csv or parquet'):
+        write_chunks(iter_chunks(cohort, chunk_size=4), path, 'xlsx')
+    assert list(tmp_path.iterdir()) == []
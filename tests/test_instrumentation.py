@@ -0,0 +1,30 @@
+"""Metrics endpoint (user-021)"""
+import logging
+import socket
+
+import pytest
+
+from utils import instrumentation
+from utils.instrumentation import LOGGER_NAME, start_metrics_server
+
+@pytest.fixture
+def fresh_server_state(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_metrics_server', None)
+    monkeypatch.setattr(instrumentation, '_metrics_server_failed', False)
+
+def test_failed_bind_is_logged_once_and_not_retried(fresh_server_state, monkeypatch, caplog):
+    with socket.socket() as taken:
+        taken.bind(('127.0.0.1', 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+
+        with caplog.at_level(logging.WARNING, logger=LOGGER_NAME):
+            assert start_metrics_server(port=port) is None
+
+        # A later call (the next rerun) does not try to bind again
+        def fail(*args, **kwargs):
+            raise AssertionError("bind retried")
+        monkeypatch.setattr(instrumentation, 'ThreadingHTTPServer', fail)
+        assert start_metrics_server(port=port) is None
+
+    assert len(caplog.records) == 1 and 'metrics_server_failed' in caplog.records[0].getMessage()
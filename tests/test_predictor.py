@@ -0,0 +1,81 @@
+"""Vectorized scoring (user-001 / user-002) against the original per-row code"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import reference
+from utils.data_loader import apply_schema
+from utils.predictor import batch_predict, predict_dropout_risk, predict_dropout_risk_batch
+from utils.preprocessor import process_data
+from utils.probability_grid import build_probability_grid
+from utils.scoring import score_dataset
+
+FEATURE_COLUMNS = [
+    'Target', 'Status_Encoded', 'Status_Risk', 'IPK_Category',
+    'IPK_Risk', 'Kehadiran_Category', 'Kehadiran_Risk', 'Risk_Score'
+]
+
+def test_batch_predict_matches_per_row(sklearn_model, cohort):
+    model, scaler = sklearn_model
+    df_processed = process_data(cohort)
+
+    predictions, probabilities, risk_levels = batch_predict(model, scaler, df_processed)
+    expected = reference.batch_predict(model, scaler, df_processed)
+
+    assert predictions == expected[0]
+    assert probabilities == expected[1]
+    assert risk_levels == expected[2]
+    # None and NaN statuses cannot be scored
+    assert predictions[10] == predictions[11] == 'UNKNOWN'
+
+def test_batch_matches_single_predictions(sklearn_model, cohort):
+    model, scaler = sklearn_model
+    df_processed = process_data(cohort).iloc[:40]
+    result = predict_dropout_risk_batch(model, scaler, df_processed['IPK'], df_processed['Kehadiran'], df_processed['Status'])
+
+    for i, row in enumerate(df_processed.itertuples()):
+        if not isinstance(row.Status, str):
+            continue
+        single = predict_dropout_risk(model, scaler, row.IPK, row.Kehadiran, row.Status)
+        for key in ['prediction', 'actual_dropout_condition', 'dropout_probability', 'safe_probability', 'risk_level']:
+            assert result[key][i] == single[key], (i, key)
+
+def test_single_prediction_matches_baseline(sklearn_model):
+    model, scaler = sklearn_model
+    grid = build_probability_grid(model, scaler)
+
+    for ipk, kehadiran, status in [(2.0, 0.7, 'AKTIF'), (1.99, 0.69, 'cuti'), (3.14159, 0.555, 'LULUS'), (1.5, 65, 'KELUAR')]:
+        expected = reference.predict_dropout_risk(model, scaler, ipk, kehadiran, status)
+        for result in [predict_dropout_risk(model, scaler, ipk, kehadiran, status),
+                       predict_dropout_risk(model, scaler, ipk, kehadiran, status, grid=grid)]:
+            assert {key: result[key] for key in expected} == pytest.approx(expected, abs=1e-6)
+            assert result['risk_level'] == expected['risk_level']
+            assert result['prediction'] == expected['prediction']
+
+@pytest.mark.parametrize('schema', [False, True], ids=['float64', 'typed'])
+def test_process_data_matches_per_row(cohort, schema):
+    df = apply_schema(cohort) if schema else cohort
+    actual = process_data(df)
+    expected = reference.process_data(cohort)
+
+    for col in FEATURE_COLUMNS:
+        np.testing.assert_array_equal(
+            actual[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float), err_msg=col
+        )
+
+def test_process_data_in_place(cohort):
+    expected = process_data(cohort)
+    df = cohort.copy()
+    result = process_data(df, copy=False)
+
+    assert result is df
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_score_dataset_matches_per_row(sklearn_model, cohort):
+    model, scaler = sklearn_model
+    df_scored = score_dataset(model, scaler, apply_schema(cohort))
+    predictions, probabilities, risk_levels = reference.batch_predict(model, scaler, reference.process_data(cohort))
+
+    assert df_scored['Prediction'].tolist() == predictions
+    assert df_scored['Risk_Level'].tolist() == risk_levels
+    np.testing.assert_array_equal(df_scored['Dropout_Probability'].to_numpy(), np.array(probabilities) * 100)
@@ -0,0 +1,141 @@
+"""Declarative risk rules (user-025) against the hard-coded policy they replaced"""
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+import reference
+from utils.predictor import RISK_LEVEL_LABELS, apply_risk_rules
+from utils.preprocessor import process_data
+from utils.risk_rules import (
+    RULES_PATH, RISK_LEVELS, compile_rules, describe, describe_risk_levels, load_rules,
+    prediction_threshold, probability_bands, risk_level_codes, threshold
+)
+
+# Every cut-off of the policy and the values just around it
+IPK_VALUES = [0.0, 1.99, 2.0, 2.01, 4.0]
+KEHADIRAN_VALUES = [0.0, 0.69, 0.7, 0.71, 1.0]
+PROBABILITIES = sorted({
+    p + d for p in [0.0, 0.05, 0.3, 0.4, 0.7, 0.75, 1.0] for d in [-1e-9, 0.0, 1e-9] if 0 <= p + d <= 1
+})
+
+def shipped_spec():
+    with open(RULES_PATH) as f:
+        return json.load(f)
+
+def cases():
+    """Every combination of the boundary inputs as columns"""
+    rows = list(itertools.product(IPK_VALUES, KEHADIRAN_VALUES, [0, 1], PROBABILITIES))
+    return [np.array(column) for column in zip(*rows)]
+
+def test_shipped_spec_matches_hard_coded_rules():
+    ipk, kehadiran, status_risk, probability = cases()
+    actual_dropout, final_prediction, risk_codes = apply_risk_rules(ipk, kehadiran, status_risk, probability)
+
+    expected = [reference.risk_rules(*row) for row in zip(ipk, kehadiran, status_risk, probability)]
+    np.testing.assert_array_equal(actual_dropout, [row[0] for row in expected])
+    np.testing.assert_array_equal(final_prediction.astype(int), [row[1] for row in expected])
+    np.testing.assert_array_equal(RISK_LEVEL_LABELS[risk_codes], [row[2] for row in expected])
+
+def test_scalar_and_array_paths_agree():
+    rules = load_rules()
+    ipk, kehadiran, status_risk, probability = cases()
+    codes = risk_level_codes(rules, {'ipk': ipk, 'kehadiran': kehadiran, 'status_risk': status_risk, 'dropout_prob': probability})
+
+    for i in range(len(ipk)):
+        inputs = (float(ipk[i]), float(kehadiran[i]), int(status_risk[i]), float(probability[i]))
+        code = risk_level_codes(rules, dict(zip(['ipk', 'kehadiran', 'status_risk', 'dropout_prob'], inputs)))
+        assert RISK_LEVELS[code] == reference.risk_rules(*inputs)[2]
+        assert code == codes[i]
+
+def test_process_data_columns_match_hard_coded_rules(cohort):
+    actual = process_data(cohort)
+    expected = reference.process_data(cohort)
+
+    for col in ['Target', 'Status_Risk', 'IPK_Risk', 'Kehadiran_Risk', 'Risk_Score']:
+        np.testing.assert_array_equal(actual[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+
+def test_load_rules_compiles_the_spec_file():
+    spec = shipped_spec()
+    rules = load_rules()
+
+    assert rules['digest'] == compile_rules(spec)['digest']
+    assert rules['high_risk_statuses'] == reference.HIGH_RISK_STATUSES
+
+def test_changed_spec_changes_the_policy(tmp_path):
+    spec = shipped_spec()
+    spec['conditions']['ipk_risk']['value'] = 2.5
+    path = tmp_path / 'risk_rules.json'
+    path.write_text(json.dumps(spec))
+
+    rules = load_rules(path)
+    args = (np.array([2.2, 2.6]), np.array([0.5, 0.5]), np.array([0, 0]), np.array([0.1, 0.1]))
+
+    assert rules['digest'] != load_rules()['digest']
+    assert apply_risk_rules(*args)[0].tolist() == [False, False]
+    assert apply_risk_rules(*args, rules)[0].tolist() == [True, False]
+
+@pytest.mark.parametrize('name, expr, message', [
+    ('ipk_risk', {'column': 'dropout_prob', 'op': '>', 'value': 0.5}, 'ipk_risk .* dropout_prob'),
+    ('actual_dropout', {'all': ['ipk_risk', 'model_risk']}, 'actual_dropout .* dropout_prob'),
+    ('kehadiran_risk', {'any': [{'column': 'kehadiran', 'op': '<', 'value': 0.7}, {'column': 'status_risk', 'op': '==', 'value': 1}]},
+     'kehadiran_risk .* status_risk'),
+])
+def test_required_conditions_reject_other_inputs(name, expr, message):
+    spec = shipped_spec()
+    # A helper condition on the model probability, used through its name
+    conditions = {'model_risk': {'not': {'column': 'dropout_prob', 'op': '<=', 'value': 0.5}}}
+    conditions.update(spec['conditions'])
+    conditions[name] = expr
+    spec['conditions'] = conditions
+
+    with pytest.raises(ValueError, match=message):
+        compile_rules(spec)
+
+def test_risk_score_rejects_the_model_probability():
+    spec = shipped_spec()
+    spec['conditions']['model_risk'] = {'column': 'dropout_prob', 'op': '>', 'value': 0.5}
+    spec['risk_score']['weights']['model_risk'] = 1
+
+    with pytest.raises(ValueError, match='model_risk .* dropout_prob'):
+        compile_rules(spec)
+
+def test_other_conditions_may_use_the_model_probability():
+    spec = shipped_spec()
+    spec['conditions']['model_risk'] = {'all': ['actual_dropout', {'column': 'dropout_prob', 'op': '>', 'value': 0.5}]}
+    spec['risk_level']['rules'].insert(0, {'level': 'TINGGI', 'when': 'model_risk'})
+
+    rules = compile_rules(spec)
+    assert rules['risk_levels'][0][1]({'ipk': 1.0, 'kehadiran': 0.5, 'status_risk': 0, 'dropout_prob': 0.6})
+
+def test_ui_values_of_the_shipped_spec():
+    rules = load_rules()
+
+    assert threshold(rules, 'ipk_risk') == reference.IPK_THRESHOLD
+    assert threshold(rules, 'kehadiran_risk') == reference.KEHADIRAN_THRESHOLD
+    assert threshold(rules, 'actual_dropout') is None
+    assert prediction_threshold(rules) == 0.75
+    assert probability_bands(rules) == [('RENDAH', 0.0, 0.4), ('SEDANG', 0.4, 0.7), ('TINGGI', 0.7, 1.0)]
+    assert describe(rules, 'actual_dropout') == 'IPK < 2.0 **DAN** Kehadiran < 70%'
+    assert [level for level, _ in describe_risk_levels(rules)] == ['TINGGI', 'SEDANG', 'TINGGI', 'SEDANG']
+
+def test_ui_values_follow_the_spec():
+    spec = shipped_spec()
+    # The probability part of the shipped prediction rule (the analysis charts' threshold line)
+    spec['prediction']['any'][1]['value'] = 0.9
+    assert prediction_threshold(compile_rules(spec)) == 0.9
+
+    spec['prediction'] = {'column': 'dropout_prob', 'op': '>=', 'value': 0.6}
+    spec['risk_level']['rules'] = [
+        {'level': 'SEDANG', 'when': {'column': 'dropout_prob', 'op': '>', 'value': 0.2}},
+        {'level': 'TINGGI', 'when': {'column': 'dropout_prob', 'op': '>', 'value': 0.5}}
+    ]
+    rules = compile_rules(spec)
+
+    assert prediction_threshold(rules) == 0.6
+    # The TINGGI rule never matches: SEDANG comes first
+    assert probability_bands(rules) == [('RENDAH', 0.0, 0.2), ('SEDANG', 0.2, 1.0)]
+
+    spec['prediction'] = {'all': ['actual_dropout', {'column': 'dropout_prob', 'op': '>', 'value': 0.05}]}
+    assert prediction_threshold(compile_rules(spec)) is None
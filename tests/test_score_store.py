@@ -0,0 +1,68 @@
+"""Incremental re-scoring through the score store (user-017) against full scoring"""
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import apply_schema
+from utils.score_store import read_score_store, score_dataset_incremental
+from utils.scoring import score_dataset
+
+KEY = 'test-key'
+
+def test_first_run_scores_everything(sklearn_model, cohort, tmp_path):
+    model, scaler = sklearn_model
+    store_path = tmp_path / 'store.parquet'
+    df = apply_schema(cohort)
+
+    df_scored, report = score_dataset_incremental(model, scaler, df, store_path=store_path, key=KEY)
+
+    pd.testing.assert_frame_equal(df_scored, score_dataset(model, scaler, df))
+    assert report['reused'] == 0 and report['recomputed'] == len(df)
+    assert report['store_written']
+    assert len(read_score_store(store_path, KEY)) == len(df)
+
+def test_rerun_matches_full_scoring(sklearn_model, cohort, tmp_path):
+    model, scaler = sklearn_model
+    store_path = tmp_path / 'store.parquet'
+    score_dataset_incremental(model, scaler, apply_schema(cohort), store_path=store_path, key=KEY)
+
+    # Change inputs of a few students, drop some, add new ones and repeat a key
+    changed = cohort.copy()
+    changed.loc[20, 'IPK'] = 1.0
+    changed.loc[21, 'Kehadiran'] = 0.2
+    changed.loc[22, 'Status'] = 'cuti'
+    changed.loc[23, 'Status'] = None
+    new_rows = cohort.iloc[30:35].assign(NIM=cohort['NIM'] + 10_000)
+    duplicate = cohort.iloc[[40]].assign(IPK=3.9)
+    changed = pd.concat([changed.drop(index=[50, 51]), new_rows, duplicate], ignore_index=True)
+    df = apply_schema(changed)
+
+    df_scored, report = score_dataset_incremental(model, scaler, df, store_path=store_path, key=KEY)
+
+    pd.testing.assert_frame_equal(df_scored, score_dataset(model, scaler, df))
+    # 4 changed, 5 new and the 2 rows sharing a key are re-scored, plus the
+    # rows with a missing IPK / Kehadiran if the filled-in median moved
+    assert 11 <= report['recomputed'] <= 13
+    assert report['reused'] == len(df) - report['recomputed']
+
+def test_unchanged_rerun_reuses_every_row(sklearn_model, cohort, tmp_path):
+    model, scaler = sklearn_model
+    store_path = tmp_path / 'store.parquet'
+    df = apply_schema(cohort)
+    score_dataset_incremental(model, scaler, df, store_path=store_path, key=KEY)
+
+    df_scored, report = score_dataset_incremental(model, scaler, df, store_path=store_path, key=KEY)
+
+    pd.testing.assert_frame_equal(df_scored, score_dataset(model, scaler, df))
+    assert report['recomputed'] == 0
+    assert not report['store_written']
+
+def test_other_scoring_key_discards_the_store(sklearn_model, cohort, tmp_path):
+    model, scaler = sklearn_model
+    store_path = tmp_path / 'store.parquet'
+    df = apply_schema(cohort)
+    score_dataset_incremental(model, scaler, df, store_path=store_path, key=KEY)
+
+    _, report = score_dataset_incremental(model, scaler, df, store_path=store_path, key='other-model')
+
+    assert report['reused'] == 0
+    assert np.all(read_score_store(store_path, 'other-model')['Key_Hash'].diff().dropna() >= 0)
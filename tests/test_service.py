@@ -0,0 +1,61 @@
+"""Scoring service (user-012) request handling"""
+import http.client
+import json
+import threading
+
+import pytest
+
+from utils.predictor import predict_dropout_risk
+from utils.service import MAX_BODY_BYTES, create_server
+
+@pytest.fixture(scope='module')
+def service(sklearn_model):
+    model, scaler = sklearn_model
+    server = create_server(port=0, model=model, scaler=scaler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def post(server, path, body, content_length=None):
+    """(status, JSON payload) of a POST; content_length overrides the header (body is then not sent)"""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest('POST', path)
+        connection.putheader('Content-Type', 'application/json')
+        if content_length is None:
+            data = json.dumps(body).encode()
+            connection.putheader('Content-Length', str(len(data)))
+            connection.endheaders(data)
+        else:
+            connection.putheader('Content-Length', content_length)
+            connection.endheaders()
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+def test_predict_matches_predict_dropout_risk(service, sklearn_model):
+    status, payload = post(service, '/predict', {'ipk': 1.8, 'kehadiran': 0.6, 'status': 'cuti'})
+    expected = predict_dropout_risk(*sklearn_model, 1.8, 0.6, 'cuti')
+
+    assert status == 200
+    assert payload['risk_level'] == expected['risk_level']
+    assert payload['dropout_probability'] == expected['dropout_probability']
+
+def test_batch_rejects_invalid_records(service):
+    status, payload = post(service, '/predict/batch', {'students': [{'ipk': 3.0}]})
+    assert status == 400 and 'Missing field' in payload['error']
+
+@pytest.mark.parametrize('content_length, expected_status', [
+    (str(MAX_BODY_BYTES + 1), 413),
+    (str(10 ** 12), 413),
+    ('-1', 400),
+    ('abc', 400),
+])
+def test_bad_content_length_is_refused_before_reading(service, content_length, expected_status):
+    # The body is never sent: the answer must not wait for it
+    status, payload = post(service, '/predict/batch', None, content_length=content_length)
+    assert status == expected_status
+    assert 'error' in payload
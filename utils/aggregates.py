@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+from utils.predictor import to_float64
+from utils.instrumentation import timed
+
+# Group-by dimensions of the aggregate cube
+CUBE_DIMENSIONS = ['Prodi', 'Angkatan_Display', 'Status', 'Risk_Level']
+
+# Columns with count / sum / sum of squares per cube cell
+CUBE_MEASURES = ['IPK', 'Kehadiran', 'SKS', 'Dropout_Probability']
+
+# Histogram bin width per column: the precision the data is recorded at,
+# so means, histograms and quartiles derived from the cube are exact
+HISTOGRAM_STEPS = {
+    'IPK': 0.01,
+    'Kehadiran': 0.01,
+    'SKS': 1
+}
+
+@timed()
+def build_cube(df):
+    """
+    Build the aggregate cube of a scored dataset
+
+    One cell per observed (Prodi, Angkatan_Display, Status, Risk_Level)
+    combination, holding the row count, sum and sum of squares of every
+    measure, plus a fine histogram of IPK, Kehadiran and SKS per cell.
+
+    Returns:
+    --------
+    dict : 'cells' (DataFrame, one row per cell), 'levels' (dimension
+           values), 'histograms' ({column: {'values', 'counts'}}, counts
+           is an (n_cells, n_bins) array aligned with 'cells')
+    """
+    codes = []
+    levels = {}
+    for dim in CUBE_DIMENSIONS:
+        dim_codes, dim_levels = pd.factorize(df[dim], sort=True, use_na_sentinel=False)
+        codes.append(dim_codes)
+        levels[dim] = np.asarray(dim_levels)
+
+    shape = tuple(max(len(levels[dim]), 1) for dim in CUBE_DIMENSIONS)
+    flat = np.ravel_multi_index(codes, shape)
+    cell_ids, cell = np.unique(flat, return_inverse=True)
+    n_cells = len(cell_ids)
+
+    cells = pd.DataFrame({
+        dim: levels[dim][dim_codes]
+        for dim, dim_codes in zip(CUBE_DIMENSIONS, np.unravel_index(cell_ids, shape))
+    })
+    cells['count'] = np.bincount(cell, minlength=n_cells)
+    for col in CUBE_MEASURES:
+        values = to_float64(df[col])
+        cells[f'{col}_sum'] = np.bincount(cell, weights=values, minlength=n_cells)
+        cells[f'{col}_sumsq'] = np.bincount(cell, weights=values * values, minlength=n_cells)
+
+    histograms = {}
+    for col, step in HISTOGRAM_STEPS.items():
+        values = to_float64(df[col])
+        start = np.floor(values.min() / step) * step if len(values) else 0.0
+        bins = np.floor((values - start) / step + 1e-6).astype(int)
+        n_bins = bins.max() + 1 if len(bins) else 1
+        counts = np.bincount(cell * n_bins + bins, minlength=n_cells * n_bins)
+        histograms[col] = {
+            'values': (start + np.arange(n_bins) * step).round(6),
+            'counts': counts.reshape(n_cells, n_bins).astype(np.int32)
+        }
+
+    return {'cells': cells, 'levels': levels, 'histograms': histograms}
+
+def merge_cubes(cubes):
+    """
+    Combine the cubes of disjoint row sets into the cube of all their rows
+
+    Cells with the same dimension values are added up and the histograms
+    are realigned on one value grid, so a file too large for memory can be
+    aggregated chunk by chunk (merge the running cube with each new one).
+    None entries are skipped.
+    """
+    cubes = [cube for cube in cubes if cube is not None]
+    if len(cubes) == 1:
+        return cubes[0]
+    sum_columns = ['count'] + [f'{col}_{stat}' for col in CUBE_MEASURES for stat in ['sum', 'sumsq']]
+
+    all_cells = pd.concat([cube['cells'] for cube in cubes], ignore_index=True)
+    grouped = all_cells.groupby(CUBE_DIMENSIONS, dropna=False, sort=True)
+    cells = grouped[sum_columns].sum().reset_index()
+    # Merged cell of every input cell, in input order
+    cell = grouped.ngroup().to_numpy()
+
+    levels = {
+        dim: np.asarray(pd.factorize(cells[dim], sort=True, use_na_sentinel=False)[1])
+        for dim in CUBE_DIMENSIONS
+    }
+
+    histograms = {}
+    for col, step in HISTOGRAM_STEPS.items():
+        # Bin values as multiples of step, the grid every cube shares
+        firsts = [int(round(cube['histograms'][col]['values'][0] / step)) for cube in cubes]
+        lasts = [first + cube['histograms'][col]['counts'].shape[1] for first, cube in zip(firsts, cubes)]
+        low = min(firsts)
+        counts = np.zeros((len(cells), max(lasts) - low), dtype=np.int64)
+
+        offset = 0
+        for first, last, cube in zip(firsts, lasts, cubes):
+            n_cells = len(cube['cells'])
+            # A cube has each cell once, so the fancy-indexed add is safe
+            counts[cell[offset:offset + n_cells], first - low:last - low] += cube['histograms'][col]['counts']
+            offset += n_cells
+
+        histograms[col] = {
+            'values': ((low + np.arange(counts.shape[1], dtype=float)) * step).round(6),
+            'counts': counts
+        }
+
+    return {'cells': cells, 'levels': levels, 'histograms': histograms}
+
+def cube_mask(cube, **filters):
+    """Boolean mask over cube cells, e.g. cube_mask(cube, Prodi=['SI'], Angkatan_Display=[2016])"""
+    cells = cube['cells']
+    mask = np.ones(len(cells), dtype=bool)
+    for dim, selected in filters.items():
+        mask &= cells[dim].isin(selected).to_numpy()
+    return mask
+
+def cube_summary(cube, mask, by):
+    """
+    Count, mean and standard deviation of every measure per group
+
+    by is a dimension name or a list of them; the result has the group
+    columns, 'count', '<measure>_mean' and '<measure>_std'.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    sum_columns = ['count'] + [f'{col}_{stat}' for col in CUBE_MEASURES for stat in ['sum', 'sumsq']]
+
+    grouped = cube['cells'][mask].groupby(by, observed=True, sort=True)[sum_columns].sum().reset_index()
+    count = grouped['count'].to_numpy(dtype=float)
+    for col in CUBE_MEASURES:
+        mean = grouped[f'{col}_sum'] / count
+        variance = grouped[f'{col}_sumsq'] / count - mean ** 2
+        grouped[f'{col}_mean'] = mean
+        grouped[f'{col}_std'] = np.sqrt(np.clip(variance, 0, None))
+
+    return grouped.drop(columns=sum_columns[1:])
+
+def cube_totals(cube, mask):
+    """Overall count and mean of every measure over the selected cells"""
+    cells = cube['cells'][mask]
+    count = int(cells['count'].sum())
+    totals = {'count': count}
+    for col in CUBE_MEASURES:
+        totals[f'{col}_mean'] = cells[f'{col}_sum'].sum() / count if count else float('nan')
+    return totals
+
+def cube_histogram(cube, mask, col, nbins=30):
+    """Histogram of col over the selected cells with nbins equal-width bins: (edges, counts)"""
+    hist = cube['histograms'][col]
+    counts = hist['counts'][mask].sum(axis=0)
+    values = hist['values']
+
+    observed = np.flatnonzero(counts)
+    if len(observed) == 0:
+        return np.array([0.0, 1.0]), np.zeros(1, dtype=int)
+
+    low, high = values[observed[0]], values[observed[-1]]
+    if low == high:
+        high = low + 1
+    edges = np.linspace(low, high, nbins + 1)
+    binned, _ = np.histogram(values, bins=edges, weights=counts)
+    return edges, binned.astype(int)
+
+def _weighted_quantile(values, cumulative, q):
+    """Linear-interpolated quantile of a sorted value list with repeat counts"""
+    position = q * (cumulative[-1] - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, cumulative[-1] - 1)
+    v_lower = values[np.searchsorted(cumulative, lower, side='right')]
+    v_upper = values[np.searchsorted(cumulative, upper, side='right')]
+    return v_lower + (v_upper - v_lower) * (position - lower)
+
+def cube_box_stats(cube, mask, by, col):
+    """
+    Box-plot statistics of col per value of dimension `by`
+
+    Returns a DataFrame with by, count, min, q1, median, q3, max and mean,
+    computed from the cube histograms (whiskers go to min/max).
+    """
+    hist = cube['histograms'][col]
+    values = hist['values']
+    cells = cube['cells'][mask]
+    counts = hist['counts'][mask]
+
+    rows = []
+    for group, positions in cells.groupby(by, observed=True, sort=True).indices.items():
+        group_counts = counts[positions].sum(axis=0)
+        observed = np.flatnonzero(group_counts)
+        if len(observed) == 0:
+            continue
+        group_values = values[observed]
+        cumulative = np.cumsum(group_counts[observed])
+        rows.append({
+            by: group,
+            'count': int(cumulative[-1]),
+            'min': group_values[0],
+            'q1': _weighted_quantile(group_values, cumulative, 0.25),
+            'median': _weighted_quantile(group_values, cumulative, 0.5),
+            'q3': _weighted_quantile(group_values, cumulative, 0.75),
+            'max': group_values[-1],
+            'mean': float(np.dot(group_values, group_counts[observed]) / cumulative[-1])
+        })
+
+    return pd.DataFrame(rows, columns=[by, 'count', 'min', 'q1', 'median', 'q3', 'max', 'mean'])
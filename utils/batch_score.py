@@ -0,0 +1,298 @@
+"""
+Headless batch scoring of a student file (no Streamlit, no web server)
+
+Reads an xlsx / csv / parquet file with at least the IPK, Kehadiran and
+Status columns chunk by chunk, scores every chunk with the saved model and
+writes the scored rows (the columns of the dashboard's scored dataset) to
+csv, xlsx or parquet, chosen by the output extension. A JSON run summary
+with rows/sec, wall time and the analysis page's summary statistics
+(kept up to date chunk by chunk) is printed at the end.
+
+Every stage holds one chunk at a time and the summary only keeps counts
+and an aggregate cube, so peak memory depends on the chunk size, not on
+the size of the input.
+
+Usage:
+    python -m utils.batch_score INPUT OUTPUT [--chunk-size 50000] [--workers 4] [--summary run.json]
+"""
+import argparse
+import json
+import resource
+import time
+import warnings
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import build_cube, cube_summary, cube_totals, merge_cubes, CUBE_DIMENSIONS, CUBE_MEASURES
+from utils.data_loader import ANGKATAN_DISPLAY_OFFSET, DATASET_DTYPES, read_model
+from utils.export import format_from_path, write_chunks
+from utils.preprocessor import FILL_COLUMNS
+from utils.predictor import to_float64
+from utils.scoring import score_dataset
+
+# The scaler is fitted with feature names but scored with plain arrays
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+REQUIRED_COLUMNS = ['IPK', 'Kehadiran', 'Status']
+
+# Rows read, scored and written per step (bounds the memory footprint)
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Model and scaler of the current process (loaded once per worker)
+_model = None
+
+# Columns stored as numbers in the dataset schema (an xlsx cell keeps
+# whatever type it was typed as, e.g. an Angkatan entered as text)
+NUMERIC_COLUMNS = [col for col, dtype in DATASET_DTYPES.items() if dtype.startswith(('int', 'float'))]
+
+def iter_input_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """
+    Yield the rows of an xlsx / csv / parquet file as DataFrames of at most chunk_size rows
+
+    columns (optional) limits the columns read; names not in the file are ignored.
+    xlsx cells of NUMERIC_COLUMNS are parsed as numbers (unparseable ones
+    become NaN), so the chunks have the dtypes the csv reader infers.
+    """
+    fmt = format_from_path(path)
+    wanted = None if columns is None else set(columns)
+
+    if fmt == 'csv':
+        usecols = None if wanted is None else (lambda col: col in wanted)
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=usecols)
+
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        names = [name for name in parquet_file.schema_arrow.names if wanted is None or name in wanted]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=names):
+            yield batch.to_pandas()
+
+    else:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = [str(name) if name is not None else '' for name in next(rows, ())]
+            keep = [i for i, name in enumerate(header) if name and (wanted is None or name in wanted)]
+            names = [header[i] for i in keep]
+            while True:
+                block = list(islice(rows, chunk_size))
+                if not block:
+                    break
+                chunk = pd.DataFrame(
+                    [[row[i] if i < len(row) else None for i in keep] for row in block],
+                    columns=names
+                )
+                for col in NUMERIC_COLUMNS:
+                    if col in chunk.columns:
+                        chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+                yield chunk.dropna(how='all')
+        finally:
+            wb.close()
+
+def _median_of_counts(counts):
+    """Median of the values a value -> count Series stands for (what np.nanmedian gives)"""
+    counts = counts.sort_index()
+    values = counts.index.to_numpy(dtype=float)
+    cumulative = np.cumsum(counts.to_numpy())
+    n = cumulative[-1]
+    lower = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+    upper = values[np.searchsorted(cumulative, n // 2, side='right')]
+    return (lower + upper) / 2
+
+def compute_fill_values(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Whole-file medians of the columns process_data fills
+
+    Only those columns are read, so every chunk is later filled with the
+    same values the dashboard would use for the full file. Only the count
+    of each distinct value is kept; IPK, SKS and Kehadiran are recorded at
+    a fixed precision, so that stays small however many rows there are.
+    """
+    counts = {}
+    for chunk in iter_input_chunks(path, chunk_size, columns=FILL_COLUMNS):
+        for col in chunk.columns:
+            chunk_counts = pd.Series(to_float64(pd.to_numeric(chunk[col], errors='coerce'))).value_counts()
+            counts[col] = chunk_counts if col not in counts else counts[col].add(chunk_counts, fill_value=0)
+
+    return {col: float(_median_of_counts(col_counts)) for col, col_counts in counts.items() if len(col_counts)}
+
+def _load_worker_model():
+    global _model
+    if _model is None:
+        model, scaler, _ = read_model()
+        _model = (model, scaler)
+
+def _score_chunk(chunk, fill_values):
+    _load_worker_model()
+    model, scaler = _model
+    return score_dataset(model, scaler, chunk, copy=False, fill_values=fill_values)
+
+def _checked(chunks):
+    for chunk in chunks:
+        missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+        yield chunk
+
+def score_chunks(chunks, fill_values=None, workers=1):
+    """
+    Score an iterable of chunks, yielding the scored chunks in input order
+
+    With workers > 1 the chunks are scored in a process pool; at most two
+    chunks per worker are in flight, so memory stays bounded.
+    """
+    chunks = _checked(chunks)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield _score_chunk(chunk, fill_values)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_model) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk, fill_values))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _cube_frame(chunk):
+    """The build_cube columns of a scored chunk (dimensions the input lacks are NaN, missing measures 0)"""
+    frame = pd.DataFrame(index=chunk.index)
+    for dim in CUBE_DIMENSIONS:
+        if dim in chunk.columns:
+            frame[dim] = chunk[dim]
+        elif dim == 'Angkatan_Display' and 'Angkatan' in chunk.columns:
+            frame[dim] = pd.to_numeric(chunk['Angkatan'], errors='coerce') - ANGKATAN_DISPLAY_OFFSET
+        else:
+            frame[dim] = np.nan
+    for col in CUBE_MEASURES:
+        values = pd.to_numeric(chunk[col], errors='coerce') if col in chunk.columns else 0
+        frame[col] = pd.Series(values, index=chunk.index, dtype=float).fillna(0)
+    return frame
+
+def new_summary():
+    """Empty running summary (see update_summary)"""
+    return {'rows': 0, 'chunks': 0, 'risk_levels': Counter(), 'predictions': Counter(), 'actual_dropout': 0, 'cube': None}
+
+def update_summary(summary, chunk):
+    """Add a scored chunk to a running summary; its size does not grow with the rows added"""
+    summary['rows'] += len(chunk)
+    summary['chunks'] += 1
+    if len(chunk) == 0:
+        return
+    summary['risk_levels'].update(chunk['Risk_Level'].value_counts().to_dict())
+    summary['predictions'].update(chunk['Prediction'].value_counts().to_dict())
+    summary['actual_dropout'] += int((chunk['Actual_Dropout'] == 'DROPOUT').sum())
+    summary['cube'] = merge_cubes([summary['cube'], build_cube(_cube_frame(chunk))])
+
+def summarized(scored_chunks, summary):
+    """Pass scored chunks through, adding each one to the running summary"""
+    for chunk in scored_chunks:
+        update_summary(summary, chunk)
+        yield chunk
+
+def summary_statistics(summary):
+    """
+    The analysis page's summary statistics of everything added so far
+
+    Returns:
+    --------
+    dict : 'total', 'predicted_dropout', 'actual_dropout', 'high_risk',
+           'avg_dropout_probability' (in %), 'by_risk_level' ({level:
+           count and average IPK, Kehadiran and probability}) and
+           'by_prodi' ({prodi: {level: count}})
+    """
+    statistics = {
+        'total': summary['rows'],
+        'predicted_dropout': summary['predictions'].get('RISIKO DROPOUT', 0),
+        'actual_dropout': summary['actual_dropout'],
+        'high_risk': summary['risk_levels'].get('TINGGI', 0),
+        'avg_dropout_probability': None,
+        'by_risk_level': {},
+        'by_prodi': {}
+    }
+    cube = summary['cube']
+    if cube is None:
+        return statistics
+
+    mask = np.ones(len(cube['cells']), dtype=bool)
+    statistics['avg_dropout_probability'] = round(float(cube_totals(cube, mask)['Dropout_Probability_mean']), 4)
+    for row in cube_summary(cube, mask, 'Risk_Level').itertuples(index=False):
+        statistics['by_risk_level'][str(row.Risk_Level)] = {
+            'count': int(row.count),
+            'avg_ipk': round(float(row.IPK_mean), 4),
+            'avg_kehadiran': round(float(row.Kehadiran_mean), 4),
+            'avg_dropout_probability': round(float(row.Dropout_Probability_mean), 4)
+        }
+    for row in cube_summary(cube, mask, ['Prodi', 'Risk_Level']).itertuples(index=False):
+        statistics['by_prodi'].setdefault(str(row.Prodi), {})[str(row.Risk_Level)] = int(row.count)
+    return statistics
+
+def run(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Score input_path into output_path
+
+    Returns:
+    --------
+    dict : run summary (rows, chunks, risk level / prediction counts,
+           summary_statistics, wall time, rows per second and peak RSS)
+    """
+    start = time.perf_counter()
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    output_fmt = format_from_path(output_path)
+
+    fill_values = compute_fill_values(input_path, chunk_size)
+    fill_time = time.perf_counter() - start
+
+    summary = new_summary()
+    scored = score_chunks(iter_input_chunks(input_path, chunk_size), fill_values, workers)
+    write_chunks(summarized(scored, summary), output_path, output_fmt)
+
+    wall_time = time.perf_counter() - start
+    return {
+        'input': str(input_path),
+        'output': str(output_path),
+        'rows': summary['rows'],
+        'chunks': summary['chunks'],
+        'chunk_size': chunk_size,
+        'workers': workers,
+        'fill_values': {col: round(value, 6) for col, value in fill_values.items()},
+        'risk_levels': dict(summary['risk_levels']),
+        'predictions': dict(summary['predictions']),
+        'summary': summary_statistics(summary),
+        'fill_pass_s': round(fill_time, 3),
+        'wall_time_s': round(wall_time, 3),
+        'rows_per_s': round(summary['rows'] / wall_time, 1) if wall_time > 0 else None,
+        # ru_maxrss is in kB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a student file with the dropout model, without Streamlit")
+    parser.add_argument('input', type=Path, help="Input file (.xlsx, .csv or .parquet)")
+    parser.add_argument('output', type=Path, help="Output file (.xlsx, .csv or .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="Scoring processes (default: 1, in-process)")
+    parser.add_argument('--summary', type=Path, default=None, help="Also write the run summary to this JSON file")
+    args = parser.parse_args()
+
+    summary = run(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers)
+
+    if args.summary is not None:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=4)
+    print(json.dumps(summary, indent=4))
+
+if __name__ == "__main__":
+    main()
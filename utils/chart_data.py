@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from utils.predictor import to_float64
+from utils.instrumentation import timed
+
+def histogram(values, edges):
+    """
+    Pre-binned histogram of values over fixed bin edges
+
+    Returns:
+    --------
+    tuple : (bin centers, bin widths, counts) - nbins numbers each,
+            whatever the number of values
+    """
+    edges = np.asarray(edges, dtype=float)
+    values = to_float64(values)
+    counts, _ = np.histogram(values[~np.isnan(values)], bins=edges)
+    return (edges[:-1] + edges[1:]) / 2, np.diff(edges), counts
+
+@timed()
+def stratified_sample(df, by, max_points, random_state=0):
+    """
+    Positions of at most max_points rows, sampled per value of `by`
+
+    Every group gets an equal share of the budget (unused share goes to
+    the larger groups), so small groups such as the TINGGI risk level are
+    kept whole. The sample is deterministic for a given random_state.
+    """
+    if len(df) <= max_points:
+        return np.arange(len(df))
+
+    codes, _ = pd.factorize(df[by], use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes)
+    starts = np.cumsum(sizes) - sizes
+
+    quota = np.zeros(len(sizes), dtype=int)
+    remaining = max_points
+    while remaining > 0:
+        open_groups = np.flatnonzero(quota < sizes)
+        share = remaining // len(open_groups) if len(open_groups) else 0
+        if share == 0:
+            break
+        take = np.minimum(sizes[open_groups] - quota[open_groups], share)
+        quota[open_groups] += take
+        remaining -= take.sum()
+
+    rng = np.random.default_rng(random_state)
+    picks = [
+        order[start + rng.choice(size, n, replace=False)]
+        for start, size, n in zip(starts, sizes, quota)
+        if n > 0
+    ]
+    return np.sort(np.concatenate(picks)) if picks else np.zeros(0, dtype=int)
+
+@timed()
+def density_grid(x, y, x_range, y_range, nbins=40):
+    """
+    2D point counts on an nbins x nbins grid
+
+    Returns:
+    --------
+    tuple : (x centers, y centers, counts) - counts has shape
+            (nbins, nbins) indexed [y, x], empty cells are NaN
+    """
+    x = to_float64(x)
+    y = to_float64(y)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    counts, x_edges, y_edges = np.histogram2d(
+        x[valid], y[valid], bins=nbins, range=[x_range, y_range]
+    )
+    counts = counts.T
+    counts[counts == 0] = np.nan
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts
@@ -0,0 +1,328 @@
+"""
+NumPy-only inference for the trained Random Forest and scaler
+
+compile_model() flattens the fitted trees of best_dropout_model.pkl and
+the scaler.pkl transform into plain arrays (node features, thresholds,
+children, leaf class fractions, scaler mean/scale). CompiledForest and
+CompiledScaler reproduce predict_proba / transform exactly with NumPy, so
+they can be passed wherever the sklearn objects are used
+(predict_dropout_risk, predict_dropout_risk_batch) without importing sklearn.
+
+Because the forest only splits on a few distinct thresholds per feature,
+the feature space falls into a small grid of cells in which every tree
+takes the same path. The compile step traverses one point per cell and
+stores the cell probabilities, so prediction is a searchsorted per
+feature plus one gather; the array traversal is kept for forests whose
+grid would be too large.
+
+The .npz is unpacked once into plain .npy files under data/.cache and
+loaded with mmap_mode='r', so every process on the host (Streamlit
+replicas, batch workers, the scoring service) maps the same read-only
+pages from the OS page cache instead of holding its own copy.
+
+Usage:
+    python -m utils.compiled_model      # write models/compiled_model.npz and verify it
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+from utils.data_loader import CACHE_DIR, COMPILED_MODEL_PATH, MODEL_PATH, SCALER_PATH, file_digest
+
+# Rows traversed per block (bounds the (rows, trees) node index arrays)
+TRAVERSAL_BLOCK_ROWS = 65_536
+
+# Largest threshold grid precomputed at compile time (cells)
+MAX_GRID_CELLS = 1 << 20
+
+# Unpacked .npy copies of compiled_model.npz (one folder per .npz digest)
+MMAP_DIR = CACHE_DIR / "compiled_model"
+
+def _source_digests():
+    digests = {}
+    for name, path in [('model', MODEL_PATH), ('scaler', SCALER_PATH)]:
+        stat = path.stat()
+        digests[name] = file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+    return digests
+
+def compile_model(model, scaler):
+    """
+    Flatten a fitted RandomForestClassifier and StandardScaler into arrays
+
+    Nodes of all trees are concatenated; children are global node indices
+    (-1 for leaves) and roots holds the first node of each tree. Leaf values
+    are the class fractions sklearn's predict_proba returns for each tree.
+    """
+    features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        if np.allclose(normalizer, 1.0):
+            # sklearn >= 1.4 stores class fractions and returns them as they are
+            normalizer[:] = 1.0
+        normalizer[normalizer == 0.0] = 1.0
+
+        roots.append(offset)
+        features.append(tree.feature.astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(tree.children_left >= 0, tree.children_left + offset, -1).astype(np.int32))
+        rights.append(np.where(tree.children_right >= 0, tree.children_right + offset, -1).astype(np.int32))
+        missing = getattr(tree, 'missing_go_to_left', None)
+        missing_left.append(np.zeros(tree.node_count, dtype=bool) if missing is None else missing.astype(bool))
+        values.append(value / normalizer)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'missing_go_to_left': np.concatenate(missing_left),
+        'value': np.concatenate(values),
+        'roots': np.array(roots, dtype=np.int32),
+        'max_depth': np.int32(max_depth),
+        'classes': np.asarray(model.classes_),
+        'scaler_mean': np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_), dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_), dtype=np.float64),
+        'feature_names': np.asarray(getattr(scaler, 'feature_names_in_', []), dtype=str)
+    }
+    arrays.update(_threshold_grid(CompiledForest(arrays), scaler.n_features_in_))
+    return arrays
+
+def _bin_representatives(edges):
+    """
+    One float32-representable value per bin of sorted thresholds
+
+    Bin k holds edges[k-1] < x <= edges[k] (the last bin x > edges[-1]) and
+    one extra bin holds NaN, matching np.searchsorted(edges, x, 'left').
+    """
+    edges32 = edges.astype(np.float32)
+    upper = np.where(edges32.astype(np.float64) > edges, np.nextafter(edges32, np.float32(-np.inf)), edges32)
+    last = edges32[-1:] if len(edges) else np.zeros(1, dtype=np.float32)
+    if len(edges) and last[0] <= edges[-1]:
+        last = np.nextafter(last, np.float32(np.inf))
+    return np.concatenate([upper, last, [np.float32(np.nan)]]).astype(np.float64)
+
+def _threshold_grid(forest, n_features):
+    """Probabilities of every threshold cell, or an empty grid if there would be too many"""
+    edges = [np.unique(forest.threshold[forest.feature == j]) for j in range(n_features)]
+    shape = tuple(len(e) + 2 for e in edges)
+    if int(np.prod(shape)) > MAX_GRID_CELLS:
+        return {'grid_edges': np.zeros(0), 'grid_shape': np.zeros(0, dtype=np.int64), 'grid_proba': np.zeros((0, 0))}
+
+    points = np.meshgrid(*[_bin_representatives(e) for e in edges], indexing='ij')
+    X = np.column_stack([p.ravel() for p in points])
+    return {
+        'grid_edges': np.concatenate(edges),
+        'grid_shape': np.array(shape, dtype=np.int64),
+        'grid_proba': forest.traverse_proba(X)
+    }
+
+class CompiledScaler:
+    """StandardScaler.transform on plain arrays"""
+
+    def __init__(self, arrays):
+        self.mean_ = arrays['scaler_mean']
+        self.scale_ = arrays['scaler_scale']
+        self.n_features_in_ = len(self.mean_)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return (X - self.mean_) / self.scale_
+
+class CompiledForest:
+    """RandomForestClassifier.predict_proba / predict from the compiled arrays"""
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.missing_go_to_left = arrays['missing_go_to_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.classes_ = arrays['classes']
+        self.n_estimators = len(self.roots)
+
+        # Threshold grid (absent while compiling, empty if it was too large)
+        shape = arrays.get('grid_shape', np.zeros(0, dtype=np.int64))
+        self.grid_shape = tuple(int(n) for n in shape)
+        bounds = np.cumsum([0] + [n - 2 for n in self.grid_shape])
+        self.grid_edges = [arrays['grid_edges'][a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        self.grid_proba = arrays.get('grid_proba')
+
+    def _leaf_nodes(self, X):
+        """(rows, trees) leaf node index of every row in every tree"""
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.where(internal, feature, 0)]
+            go_left = np.where(np.isnan(x), self.missing_go_to_left[node], x <= self.threshold[node])
+            node = np.where(internal, np.where(go_left, self.left[node], self.right[node]), node)
+        return node
+
+    def traverse_proba(self, X):
+        """predict_proba by walking every tree (vectorized over rows and trees)"""
+        # Trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        proba = np.zeros((len(X), self.value.shape[1]))
+        for start in range(0, len(X), TRAVERSAL_BLOCK_ROWS):
+            leaves = self._leaf_nodes(X[start:start + TRAVERSAL_BLOCK_ROWS])
+            block = proba[start:start + TRAVERSAL_BLOCK_ROWS]
+            # Same accumulation order as sklearn (tree by tree), so sums match bit for bit
+            for t in range(self.n_estimators):
+                block += self.value[leaves[:, t]]
+        proba /= self.n_estimators
+        return proba
+
+    def predict_proba(self, X):
+        if not self.grid_shape:
+            return self.traverse_proba(X)
+
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        bins = []
+        for j, edges in enumerate(self.grid_edges):
+            column = X[:, j]
+            bins.append(np.where(np.isnan(column), len(edges) + 1, np.searchsorted(edges, column, side='left')))
+        return self.grid_proba[np.ravel_multi_index(bins, self.grid_shape)]
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+def save_compiled_model(model, scaler, path=COMPILED_MODEL_PATH):
+    """Compile model and scaler and write them (plus the source SHA-1s) to an .npz file"""
+    arrays = compile_model(model, scaler)
+    arrays['sources'] = np.array(json.dumps(_source_digests()))
+    tmp_path = path.with_name(path.stem + '.tmp.npz')
+    np.savez(tmp_path, **arrays)
+    tmp_path.replace(path)
+    return path
+
+def unpack_compiled_model(path=COMPILED_MODEL_PATH, mmap_dir=MMAP_DIR):
+    """
+    Folder with the arrays of an .npz as separate .npy files (memory-mappable)
+
+    The folder is named after the .npz digest and written atomically, so
+    concurrent processes either reuse it or race to create identical copies.
+    Folders of older .npz versions are removed.
+    """
+    stat = path.stat()
+    digest = file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+    target = mmap_dir / digest
+    if target.is_dir():
+        return target
+
+    mmap_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=mmap_dir)
+    try:
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(tmp_dir, [name for name in archive.namelist() if name.endswith('.npy')])
+        os.replace(tmp_dir, target)
+    except OSError:
+        # Another process created it first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not target.is_dir():
+            raise
+
+    for old in mmap_dir.iterdir():
+        if old.is_dir() and old.name != digest and not old.name.startswith('.tmp-'):
+            shutil.rmtree(old, ignore_errors=True)
+    return target
+
+def _read_arrays(path, mmap):
+    if mmap:
+        try:
+            folder = unpack_compiled_model(path)
+            return {file.stem: np.load(file, mmap_mode='r', allow_pickle=False) for file in folder.glob('*.npy')}
+        except OSError:
+            # Read-only cache directory etc. -- load the .npz into memory instead
+            pass
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def load_compiled_model(path=COMPILED_MODEL_PATH, check_sources=True, mmap=True):
+    """
+    (CompiledForest, CompiledScaler) from an .npz written by save_compiled_model
+
+    With mmap=True the arrays are read-only memory maps of the unpacked
+    .npy files (see unpack_compiled_model). Raises FileNotFoundError if
+    there is no .npz and ValueError if it was compiled from a different
+    model.pkl / scaler.pkl than the current ones.
+    """
+    arrays = _read_arrays(path, mmap)
+    if check_sources and json.loads(str(arrays['sources'])) != _source_digests():
+        raise ValueError(f"{path.name} is out of date with the model artifacts")
+    return CompiledForest(arrays), CompiledScaler(arrays)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the Random Forest and scaler into NumPy arrays")
+    parser.add_argument('--rows', type=int, default=100_000, help="Random rows used to verify the compiled model")
+    args = parser.parse_args()
+
+    import joblib
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    path = save_compiled_model(model, scaler)
+    forest, compiled_scaler = load_compiled_model(path)
+    X_single = np.array([[3.1, 0.85, 0]])
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(0, 4, args.rows).round(2),
+        rng.uniform(0, 1, args.rows).round(2),
+        rng.integers(0, 2, args.rows)
+    ]).astype(np.float64)
+    X[::97, 0] = np.nan
+
+    start = time.perf_counter()
+    expected = model.predict_proba(scaler.transform(X))
+    sklearn_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = forest.predict_proba(compiled_scaler.transform(X))
+    compiled_time = time.perf_counter() - start
+
+    traversed = forest.traverse_proba(compiled_scaler.transform(X))
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        model.predict_proba(scaler.transform(X_single))
+    sklearn_single = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        forest.predict_proba(compiled_scaler.transform(X_single))
+    compiled_single = (time.perf_counter() - start) / 1000
+
+    print(json.dumps({
+        'output': str(path),
+        'trees': forest.n_estimators,
+        'nodes': int(len(forest.feature)),
+        'grid_cells': int(np.prod(forest.grid_shape)) if forest.grid_shape else 0,
+        'rows_checked': args.rows,
+        'max_abs_diff': float(np.abs(expected - actual).max()),
+        'max_abs_diff_traversal': float(np.abs(expected - traversed).max()),
+        'sklearn_s': round(sklearn_time, 4),
+        'compiled_s': round(compiled_time, 4),
+        'sklearn_single_record_us': round(sklearn_single * 1e6, 1),
+        'compiled_single_record_us': round(compiled_single * 1e6, 1)
+    }, indent=4))
+
+if __name__ == "__main__":
+    main()
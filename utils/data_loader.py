@@ -1,37 +1,174 @@
-import streamlit as st
 import pandas as pd
-import joblib
 import json
+import hashlib
+from functools import lru_cache
 from pathlib import Path
+from utils.instrumentation import timed
 
 # ambil root project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-@st.cache_resource
-def load_model():
+DATA_PATH = BASE_DIR / "data" / "clean_dataset.xlsx"
+INGESTED_DATA_PATH = BASE_DIR / "data" / "clean_dataset.parquet"
+MODEL_PATH = BASE_DIR / "models" / "best_dropout_model.pkl"
+SCALER_PATH = BASE_DIR / "models" / "scaler.pkl"
+FEATURE_COLUMNS_PATH = BASE_DIR / "models" / "feature_columns.json"
+MODEL_EVALUATION_PATH = BASE_DIR / "models" / "model_evaluation.json"
+
+# NumPy export of the model and scaler (python -m utils.compiled_model)
+COMPILED_MODEL_PATH = BASE_DIR / "models" / "compiled_model.npz"
+
+# Columnar copies of the Excel workbooks, rebuilt whenever the source changes
+CACHE_DIR = BASE_DIR / "data" / ".cache"
+
+# Canonical schema of the student dataset (used in memory and in the Parquet files)
+DATASET_DTYPES = {
+    'No': 'int32',
+    'NIM': 'int64',
+    'Nama': 'object',
+    'Status': 'category',
+    'SKS': 'int16',
+    'IPK': 'float32',
+    'Kehadiran': 'float32',
+    'Angkatan': 'int16',
+    'Prodi': 'category',
+    'Semester': 'category'
+}
+
+# Angkatan is shown four years earlier than the sheet year
+ANGKATAN_DISPLAY_OFFSET = 4
+
+@lru_cache(maxsize=64)
+def file_digest(path, mtime_ns, size):
+    """SHA-1 of a file's content (mtime and size are part of the cache key)"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _source_stamp(path):
+    stat = Path(path).stat()
+    return {
+        'source_mtime_ns': str(stat.st_mtime_ns),
+        'source_size': str(stat.st_size),
+        'source_sha1': file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+    }
+
+def apply_dtypes(df, dtypes):
+    """Cast the columns of df that appear in dtypes (ints with missing values become float32)"""
+    casts = {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith('int') and df[col].isna().any():
+            dtype = 'float32'
+        casts[col] = dtype
+    return df.astype(casts)
+
+def apply_schema(df):
+    """Cast df to DATASET_DTYPES and add the precomputed Angkatan_Display column"""
+    df = apply_dtypes(df, DATASET_DTYPES)
+    if 'Angkatan' in df.columns:
+        df['Angkatan_Display'] = df['Angkatan'] - ANGKATAN_DISPLAY_OFFSET
+    return df
+
+def read_excel_cached(path, dtypes=None, cache_dir=CACHE_DIR):
+    """
+    Read an Excel workbook through a persistent Parquet cache
+    
+    The first read converts the workbook to `<cache_dir>/<name>.parquet`,
+    storing the source mtime, size and SHA-1 in the Parquet metadata.
+    Later reads (in any process) use the Parquet file while the source
+    still matches, and fall back to the Excel parse otherwise. Works
+    without pyarrow, only slower.
+    """
+    path = Path(path)
+    dtypes = dtypes or {}
     try:
-        model = joblib.load(BASE_DIR / "models" / "best_dropout_model.pkl")
-        scaler = joblib.load(BASE_DIR / "models" / "scaler.pkl")
-        with open(BASE_DIR / "models" / "feature_columns.json") as f:
-            feature_cols = json.load(f)
-        return model, scaler, feature_cols
-    except Exception as e:
-        st.error(f"❌ Error loading model: {e}")
-        return None, None, None
-
-@st.cache_data
-def load_dataset():
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return apply_dtypes(pd.read_excel(path), dtypes)
+    
+    cache_path = Path(cache_dir) / f"{path.name}.parquet"
+    stat = path.stat()
+    
+    if cache_path.exists():
+        try:
+            metadata = pq.read_schema(cache_path).metadata or {}
+            cached = {k.decode(): v.decode() for k, v in metadata.items() if k.startswith(b'source_')}
+            fresh = (
+                cached.get('source_mtime_ns') == str(stat.st_mtime_ns)
+                and cached.get('source_size') == str(stat.st_size)
+            )
+            # mtime alone changes on checkout/copy; fall back to the content hash
+            if not fresh and cached.get('source_size') == str(stat.st_size):
+                fresh = cached.get('source_sha1') == _source_stamp(path)['source_sha1']
+            if fresh:
+                return apply_dtypes(pd.read_parquet(cache_path), dtypes)
+        except Exception:
+            pass
+    
+    df = apply_dtypes(pd.read_excel(path), dtypes)
+    
     try:
-        return pd.read_excel(BASE_DIR / "data" / "clean_dataset.xlsx")
-    except Exception as e:
-        st.error(f"❌ Error loading data: {e}")
-        return None
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata.update({k.encode(): v.encode() for k, v in _source_stamp(path).items()})
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        tmp_path.replace(cache_path)
+    except Exception:
+        # Read-only data directory etc. -- the Excel result is still valid
+        pass
+    
+    return df
 
-@st.cache_data
-def load_model_evaluation():
-    try:
-        with open(BASE_DIR / "models" / "model_evaluation.json") as f:
-            return json.load(f)
-    except:
-        st.warning("⚠️ Model evaluation not found.")
-        return None
+@timed()
+def read_dataset():
+    """
+    Read the clean dataset without Streamlit
+    
+    Prefers the Parquet file written by utils.ingest when it is at least as
+    new as clean_dataset.xlsx, otherwise reads the workbook (Parquet-cached).
+    """
+    if INGESTED_DATA_PATH.exists() and (
+        not DATA_PATH.exists()
+        or INGESTED_DATA_PATH.stat().st_mtime_ns >= DATA_PATH.stat().st_mtime_ns
+    ):
+        return apply_schema(pd.read_parquet(INGESTED_DATA_PATH))
+    return apply_schema(read_excel_cached(DATA_PATH, DATASET_DTYPES))
+
+@timed()
+def read_model(prefer_compiled=True):
+    """
+    Load the model, scaler and feature columns (raises if an artifact is missing)
+    
+    Uses the NumPy-compiled model from utils.compiled_model when it exists
+    and matches the pickles, which avoids importing sklearn and memory-maps
+    its arrays (shared by all processes on the host); otherwise unpickles
+    the sklearn objects.
+    """
+    with open(FEATURE_COLUMNS_PATH) as f:
+        feature_cols = json.load(f)
+    
+    if prefer_compiled and COMPILED_MODEL_PATH.exists():
+        from utils.compiled_model import load_compiled_model
+        try:
+            model, scaler = load_compiled_model(COMPILED_MODEL_PATH)
+            return model, scaler, feature_cols
+        except (ValueError, KeyError, OSError):
+            pass
+    
+    import joblib
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    return model, scaler, feature_cols
+
+@timed()
+def read_model_evaluation():
+    """Load the model evaluation report (raises if it is missing)"""
+    with open(MODEL_EVALUATION_PATH) as f:
+        return json.load(f)
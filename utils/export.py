@@ -0,0 +1,180 @@
+import hashlib
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+from utils.data_loader import CACHE_DIR
+from utils.instrumentation import timed
+
+EXPORT_DIR = CACHE_DIR / "exports"
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet')
+}
+
+# Rows serialised per step, so only one chunk is ever formatted in memory
+EXPORT_CHUNK_SIZE = 50_000
+
+# Export files kept on disk (older ones are removed)
+EXPORT_MAX_FILES = 20
+
+# Rows in one Excel sheet, header included
+XLSX_MAX_ROWS = 1_048_576
+
+def available_formats():
+    """Export formats usable in this environment (Parquet needs pyarrow)"""
+    formats = ['csv', 'xlsx']
+    if importlib.util.find_spec('pyarrow') is not None:
+        formats.append('parquet')
+    return formats
+
+def export_signature(df, fmt, *parts):
+    """Key of an export: the selected rows (index labels), the format and any extra parts"""
+    h = hashlib.sha1(np.ascontiguousarray(df.index.to_numpy(dtype=np.int64)).tobytes())
+    h.update(f"{fmt};{len(df.columns)};".encode())
+    for part in parts:
+        h.update(f"{part};".encode())
+    return h.hexdigest()
+
+def export_path(signature, fmt):
+    """Where the export with this signature is (or will be) written"""
+    return EXPORT_DIR / f"{signature}{EXPORT_FORMATS[fmt][0]}"
+
+def check_row_limit(n_rows, fmt):
+    """Raise ValueError if n_rows data rows (plus the header) do not fit in one file of fmt"""
+    if fmt == 'xlsx' and n_rows + 1 > XLSX_MAX_ROWS:
+        raise ValueError(
+            f"{n_rows:,} rows do not fit in one Excel sheet (at most {XLSX_MAX_ROWS - 1:,}); "
+            "export as csv or parquet instead"
+        )
+
+def iter_chunks(df, transform=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield consecutive row slices of df, passed through transform if given"""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        yield transform(chunk) if transform is not None else chunk
+
+def _write_csv(chunks, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=(i == 0))
+
+def _write_xlsx(chunks, path):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    rows = 0
+    try:
+        for i, chunk in enumerate(chunks):
+            # Streamed chunks have no known total: stop before the sheet overflows
+            rows += len(chunk)
+            check_row_limit(rows, 'xlsx')
+            if i == 0:
+                ws.append(list(chunk.columns))
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                ws.append(row)
+    except BaseException:
+        # Finish the sheet's row stream now rather than when it is collected
+        ws.close()
+        raise
+    wb.save(path)
+
+def _write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            elif not table.schema.equals(writer.schema):
+                # e.g. an int column that has missing values in this chunk only
+                table = table.select(writer.schema.names).cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+_WRITERS = {
+    'csv': _write_csv,
+    'xlsx': _write_xlsx,
+    'parquet': _write_parquet
+}
+
+def format_from_path(path):
+    """Export format matching a file extension (.csv, .xlsx, .parquet)"""
+    suffix = Path(path).suffix.lower()
+    for fmt, (extension, _) in EXPORT_FORMATS.items():
+        if suffix == extension:
+            return fmt
+    raise ValueError(f"Unsupported file type: {suffix or path}")
+
+def write_chunks(chunks, path, fmt):
+    """
+    Write an iterable of DataFrame chunks (same columns) to one file
+
+    Chunks are consumed one at a time, so a generator keeps memory bounded.
+    The file is written to a temporary name and moved into place; a
+    failed write (e.g. too many rows for xlsx) leaves no file behind.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        _WRITERS[fmt](chunks, tmp_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    tmp_path.replace(path)
+    return path
+
+def write_export(df, path, fmt, transform=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write df to path in the given format, one chunk at a time
+
+    transform (e.g. column selection and renaming) is applied per chunk,
+    so df can be a slice of the shared scored dataset without copying it.
+    """
+    check_row_limit(len(df), fmt)
+    if len(df) == 0:
+        chunks = [transform(df) if transform is not None else df]
+    else:
+        chunks = iter_chunks(df, transform, chunk_size)
+    return write_chunks(chunks, path, fmt)
+
+@timed()
+def get_export(df, fmt, transform=None, *parts):
+    """
+    Path of the export of df in fmt, writing it only if it does not exist yet
+
+    parts (e.g. the dataset fingerprint, the table layout) are part of the
+    file key, so a changed dataset never reuses an old export.
+    """
+    path = export_path(export_signature(df, fmt, *parts), fmt)
+    if not path.exists():
+        write_export(df, path, fmt, transform)
+        _prune_exports()
+    return path
+
+def _prune_exports(keep=EXPORT_MAX_FILES):
+    files = sorted(
+        (p for p in EXPORT_DIR.glob('*') if p.suffix != '.tmp'),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for old in files[keep:]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,203 @@
+"""
+Ingestion of the raw "DAFTAR IPK {SI,TI} {GANJIL,GENAP}.xlsx" workbooks
+
+Every workbook has one sheet per Angkatan (sheet name = year) with the
+columns NO., N I M, NAMA MAHASISWA, DAFTAR CUTI, SKS KUMULATIF, I P K and
+KEHADIRAN under a blank first row. Prodi and Semester come from the file
+name. The result has the clean_dataset.xlsx schema:
+
+    No, NIM, Nama, Status, SKS, IPK, Kehadiran, Angkatan, Prodi, Semester
+
+Usage:
+    python -m utils.ingest [--workers 4] [--excel] [--full]
+"""
+import argparse
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from utils.data_loader import (
+    BASE_DIR, CACHE_DIR, DATA_PATH, DATASET_DTYPES, INGESTED_DATA_PATH, apply_dtypes, file_digest
+)
+
+RAW_DIR = BASE_DIR / "data"
+RAW_PATTERN = "DAFTAR IPK *.xlsx"
+RAW_NAME_RE = re.compile(r"DAFTAR IPK (?P<prodi>\w+) (?P<semester>GANJIL|GENAP)$", re.IGNORECASE)
+
+# Per-workbook Parquet partitions and the manifest used for incremental runs
+PARTITION_DIR = CACHE_DIR / "ingest"
+MANIFEST_PATH = PARTITION_DIR / "manifest.json"
+
+# Raw headers (upper-cased, spaces and dots removed) -> dataset columns
+COLUMN_MAP = {
+    'NO': 'No',
+    'NIM': 'NIM',
+    'NAMAMAHASISWA': 'Nama',
+    'NAMA': 'Nama',
+    'DAFTARCUTI': 'Status',
+    'STATUS': 'Status',
+    'SKSKUMULATIF': 'SKS',
+    'SKS': 'SKS',
+    'IPK': 'IPK',
+    'KEHADIRAN': 'Kehadiran'
+}
+
+SEMESTER_ORDER = ['GANJIL', 'GENAP']
+
+# A student appears once per Angkatan sheet and semester
+DEDUP_KEY = ['NIM', 'Angkatan', 'Semester']
+
+def _normalize_header(value):
+    return re.sub(r"[\s.]", "", str(value)).upper()
+
+def _clean_text(values):
+    # Stripped strings; blank cells stay missing (astype(str) would make them 'nan')
+    return values.astype(str).str.strip().where(values.notna())
+
+def _normalize_sheet(raw, angkatan, prodi, semester):
+    """Turn one raw sheet (read with header=None) into the dataset schema"""
+    headers = raw.head(20).apply(lambda col: col.map(_normalize_header))
+    header_rows = headers.index[(headers == 'NIM').any(axis=1)]
+    if len(header_rows) == 0:
+        return pd.DataFrame(columns=list(DATASET_DTYPES))
+
+    header_row = header_rows[0]
+    columns = [COLUMN_MAP.get(h) for h in headers.loc[header_row]]
+    keep = [i for i, col in enumerate(columns) if col is not None]
+
+    df = raw.iloc[header_row + 1:, keep]
+    df.columns = [columns[i] for i in keep]
+
+    # Drop blank and footer rows (anything without a numeric NIM)
+    df = df[pd.to_numeric(df['NIM'], errors='coerce').notna()].copy()
+
+    df['Nama'] = _clean_text(df['Nama'])
+    df['Status'] = _clean_text(df['Status']).str.upper()
+    for col in ['No', 'NIM', 'SKS', 'IPK', 'Kehadiran']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['Angkatan'] = angkatan
+    df['Prodi'] = prodi
+    df['Semester'] = semester
+
+    return df[list(DATASET_DTYPES)]
+
+def read_workbook(path):
+    """Read every Angkatan sheet of one raw workbook (runs in a worker process)"""
+    path = Path(path)
+    match = RAW_NAME_RE.match(path.stem)
+    if match is None:
+        raise ValueError(f"Unrecognised workbook name: {path.name}")
+    prodi = match['prodi'].upper()
+    semester = match['semester'].upper()
+
+    sheets = pd.read_excel(path, sheet_name=None, header=None)
+    frames = [
+        _normalize_sheet(raw, int(name), prodi, semester)
+        for name, raw in sheets.items()
+        if str(name).strip().isdigit()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def _file_stamp(path):
+    stat = path.stat()
+    return {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha1': file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+    }
+
+def _sort_key(path):
+    match = RAW_NAME_RE.match(path.stem)
+    semester = match['semester'].upper()
+    return (match['prodi'].upper(), SEMESTER_ORDER.index(semester) if semester in SEMESTER_ORDER else len(SEMESTER_ORDER))
+
+def find_workbooks(raw_dir=RAW_DIR):
+    """Raw workbooks in dataset order (Prodi, then GANJIL before GENAP)"""
+    paths = [p for p in Path(raw_dir).glob(RAW_PATTERN) if RAW_NAME_RE.match(p.stem)]
+    return sorted(paths, key=_sort_key)
+
+def ingest(raw_dir=RAW_DIR, output_path=INGESTED_DATA_PATH, workers=None, full=False, excel_path=None):
+    """
+    Build the clean dataset from the raw workbooks
+
+    Only workbooks that are new or changed since the last run are parsed
+    (in parallel, one process per workbook); the others are read back
+    from their Parquet partitions. Returns (dataset, summary dict).
+    """
+    start = time.perf_counter()
+    workbooks = find_workbooks(raw_dir)
+    if not workbooks:
+        raise FileNotFoundError(f"No '{RAW_PATTERN}' workbooks in {raw_dir}")
+
+    manifest = {}
+    if MANIFEST_PATH.exists() and not full:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+
+    stamps = {p.name: _file_stamp(p) for p in workbooks}
+    partitions = {p.name: PARTITION_DIR / f"{p.stem}.parquet" for p in workbooks}
+    stale = [
+        p for p in workbooks
+        if manifest.get(p.name, {}).get('sha1') != stamps[p.name]['sha1']
+        or not partitions[p.name].exists()
+    ]
+
+    PARTITION_DIR.mkdir(parents=True, exist_ok=True)
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers or min(len(stale), 8)) as pool:
+            for path, df in zip(stale, pool.map(read_workbook, stale)):
+                df.to_parquet(partitions[path.name], index=False)
+                manifest[path.name] = stamps[path.name]
+
+    # Forget workbooks that were removed from the data directory
+    manifest = {name: manifest[name] for name in stamps}
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    df = pd.concat([pd.read_parquet(partitions[p.name]) for p in workbooks], ignore_index=True)
+    rows_read = len(df)
+    df = df.drop_duplicates(subset=DEDUP_KEY, keep='last').reset_index(drop=True)
+    df = apply_dtypes(df, DATASET_DTYPES)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(output_path, index=False)
+    if excel_path is not None:
+        df.to_excel(excel_path, index=False)
+
+    summary = {
+        'workbooks': len(workbooks),
+        'parsed': [p.name for p in stale],
+        'reused': len(workbooks) - len(stale),
+        'rows_read': rows_read,
+        'duplicates_dropped': rows_read - len(df),
+        'rows': len(df),
+        'output': str(output_path),
+        'wall_time_s': round(time.perf_counter() - start, 3)
+    }
+    return df, summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the clean dataset from the raw DAFTAR IPK workbooks")
+    parser.add_argument('--raw-dir', type=Path, default=RAW_DIR)
+    parser.add_argument('--output', type=Path, default=INGESTED_DATA_PATH)
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: one per changed workbook, max 8)")
+    parser.add_argument('--full', action='store_true', help="Re-parse every workbook, ignoring the manifest")
+    parser.add_argument('--excel', action='store_true', help=f"Also rewrite {DATA_PATH.name}")
+    args = parser.parse_args()
+
+    _, summary = ingest(
+        raw_dir=args.raw_dir,
+        output_path=args.output,
+        workers=args.workers,
+        full=args.full,
+        excel_path=DATA_PATH if args.excel else None
+    )
+    print(json.dumps(summary, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Lightweight timing spans, cache hit / miss counters and their exports (standard library only)
+
+Instrumented code runs inside span(name) (or a function decorated with
+@timed()). Every span is
+
+    - added to process-wide totals: call count, total seconds and a latency
+      histogram per span name, rendered as Prometheus text by render_prometheus()
+      and served by start_metrics_server()
+    - recorded in the current run (between start_run() and finish_run(), one
+      Streamlit rerun), which the dashboard shows in its performance panel
+    - logged as a JSON line on the 'dropout.perf' logger at DEBUG level;
+      finish_run() logs one INFO line per run (see configure_logging)
+
+Memoized builders are called through cached_call(name, ...) and call
+cache_miss() in their body, so a call that did not run the body counts
+as a hit. Runs and spans are tracked per thread (one Streamlit session
+runs its script in one thread).
+"""
+import bisect
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOGGER_NAME = 'dropout.perf'
+
+# Upper bounds (s) of the span latency histogram buckets
+SPAN_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(LOGGER_NAME)
+
+_lock = threading.Lock()
+_local = threading.local()
+_started = time.time()
+
+# name -> [count, total seconds, per-bucket counts (last one is +Inf)]
+_spans = {}
+# name -> [hits, misses]
+_caches = {}
+_runs = 0
+
+_metrics_server = None
+# Set when the bind failed, so reruns do not try again
+_metrics_server_failed = False
+
+def _record_span(name, seconds):
+    with _lock:
+        entry = _spans.get(name)
+        if entry is None:
+            entry = _spans[name] = [0, 0.0, [0] * (len(SPAN_BUCKETS) + 1)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2][bisect.bisect_left(SPAN_BUCKETS, seconds)] += 1
+
+class span:
+    """
+    Context manager timing a block under name
+
+    Cheap enough for per-request code: two perf_counter calls and a lock.
+    """
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        run = getattr(_local, 'run', None)
+        if run is not None:
+            run['depth'] += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        seconds = end - self.start
+        _record_span(self.name, seconds)
+
+        run = getattr(_local, 'run', None)
+        depth = 0
+        if run is not None:
+            run['depth'] -= 1
+            depth = run['depth']
+            run['spans'].append({
+                'name': self.name,
+                'depth': depth,
+                'offset_s': self.start - run['start'],
+                'seconds': seconds
+            })
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({'event': 'span', 'span': self.name, 'seconds': round(seconds, 6), 'depth': depth}))
+        return False
+
+def timed(name=None):
+    """Decorator running the function inside span(name), default '<module>.<function>'"""
+    def decorator(function):
+        span_name = name or f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def cached_call(name, function, *args, **kwargs):
+    """Call a memoized function under span('cache.<name>'), counting a hit unless its body called cache_miss()"""
+    stack = getattr(_local, 'cache_stack', None)
+    if stack is None:
+        stack = _local.cache_stack = []
+    stack.append(False)
+    try:
+        with span(f"cache.{name}"):
+            result = function(*args, **kwargs)
+    finally:
+        missed = stack.pop()
+    record_cache(name, hit=not missed)
+    return result
+
+def cache_miss():
+    """Mark the innermost cached_call as a miss (call at the start of the memoized body)"""
+    stack = getattr(_local, 'cache_stack', None)
+    if stack:
+        stack[-1] = True
+
+def record_cache(name, hit):
+    with _lock:
+        entry = _caches.setdefault(name, [0, 0])
+        entry[0 if hit else 1] += 1
+
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        entry = run['caches'].setdefault(name, {'hits': 0, 'misses': 0})
+        entry['hits' if hit else 'misses'] += 1
+
+def start_run(label=None):
+    """Start collecting the spans and cache lookups of this thread (one rerun)"""
+    _local.run = {'label': label, 'start': time.perf_counter(), 'depth': 0, 'spans': [], 'caches': {}}
+
+def finish_run(label=None):
+    """
+    Stop collecting and return the run
+
+    Returns:
+    --------
+    dict : 'label', 'seconds', 'spans' (name, depth, offset_s, seconds in
+           start order) and 'caches' ({name: {'hits', 'misses'}}); None if
+           no run was started
+    """
+    global _runs
+    run = getattr(_local, 'run', None)
+    _local.run = None
+    if run is None:
+        return None
+
+    run['seconds'] = time.perf_counter() - run.pop('start')
+    run.pop('depth')
+    run['spans'].sort(key=lambda s: s['offset_s'])
+    if label is not None:
+        run['label'] = label
+    with _lock:
+        _runs += 1
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'event': 'run',
+            'label': run['label'],
+            'seconds': round(run['seconds'], 6),
+            'spans': [{'span': s['name'], 'depth': s['depth'], 'seconds': round(s['seconds'], 6)} for s in run['spans']],
+            'caches': run['caches']
+        }))
+    return run
+
+def snapshot():
+    """Process-wide totals: {'runs', 'uptime_s', 'spans': {name: {count, total_s}}, 'caches': {name: {hits, misses}}}"""
+    with _lock:
+        return {
+            'runs': _runs,
+            'uptime_s': round(time.time() - _started, 1),
+            'spans': {name: {'count': entry[0], 'total_s': entry[1]} for name, entry in _spans.items()},
+            'caches': {name: {'hits': entry[0], 'misses': entry[1]} for name, entry in _caches.items()}
+        }
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_prometheus():
+    """Prometheus text exposition of the process-wide totals"""
+    with _lock:
+        spans = {name: (entry[0], entry[1], list(entry[2])) for name, entry in sorted(_spans.items())}
+        caches = {name: tuple(entry) for name, entry in sorted(_caches.items())}
+        runs = _runs
+
+    lines = [
+        '# HELP dropout_span_seconds Time spent in instrumented functions and pages.',
+        '# TYPE dropout_span_seconds histogram'
+    ]
+    for name, (count, total, buckets) in spans.items():
+        cumulative = 0
+        for bound, bucket in zip(SPAN_BUCKETS + ('+Inf',), buckets):
+            cumulative += bucket
+            lines.append(f'dropout_span_seconds_bucket{{span="{_label(name)}",le="{bound}"}} {cumulative}')
+        lines.append(f'dropout_span_seconds_sum{{span="{_label(name)}"}} {total:.9f}')
+        lines.append(f'dropout_span_seconds_count{{span="{_label(name)}"}} {count}')
+
+    lines += [
+        '# HELP dropout_cache_requests_total Lookups of memoized builders by result.',
+        '# TYPE dropout_cache_requests_total counter'
+    ]
+    for name, (hits, misses) in caches.items():
+        lines.append(f'dropout_cache_requests_total{{cache="{_label(name)}",result="hit"}} {hits}')
+        lines.append(f'dropout_cache_requests_total{{cache="{_label(name)}",result="miss"}} {misses}')
+
+    lines += [
+        '# HELP dropout_runs_total Completed dashboard reruns.',
+        '# TYPE dropout_runs_total counter',
+        f'dropout_runs_total {runs}',
+        '# HELP dropout_process_start_time_seconds Start time of the process since the epoch.',
+        '# TYPE dropout_process_start_time_seconds gauge',
+        f'dropout_process_start_time_seconds {_started:.3f}'
+    ]
+    return '\n'.join(lines) + '\n'
+
+def configure_logging(destination=None, level=logging.INFO):
+    """
+    Write the 'dropout.perf' records as JSON lines to destination
+
+    destination is a file path or '-' for stderr; None leaves logging
+    alone. Only the first call adds a handler.
+    """
+    if destination is None or getattr(logger, '_configured', False):
+        return
+    handler = logging.StreamHandler(sys.stderr) if destination == '-' else logging.FileHandler(destination)
+    handler.setFormatter(logging.Formatter('{"ts": "%(asctime)s", "record": %(message)s}'))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    logger._configured = True
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(host='127.0.0.1', port=0):
+    """
+    Serve render_prometheus() on http://host:port/metrics from a daemon thread
+
+    Started once per process; later calls return the running server.
+    Returns None if the port cannot be bound (e.g. another replica has it);
+    the failure is logged once and not retried in this process.
+    """
+    global _metrics_server, _metrics_server_failed
+    with _lock:
+        if _metrics_server is not None or _metrics_server_failed:
+            return _metrics_server
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            _metrics_server_failed = True
+            logger.warning(json.dumps({'event': 'metrics_server_failed', 'host': host, 'port': port, 'error': str(e)}))
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        _metrics_server = server
+        return server
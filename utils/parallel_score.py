@@ -0,0 +1,211 @@
+"""
+Parallel scoring of very large cohorts with a process pool and shared memory
+
+ParallelScorer.score() prepares the feature columns once in the calling
+process (prepare_batch_inputs, as predict_dropout_risk_batch does), copies
+them into one shared-memory block and splits the rows into chunks of
+chunk_size. Each pool worker loads the model once (read_model, so the
+compiled model's arrays are memory-mapped and shared between workers),
+scores its chunks with score_batch_inputs and writes the probabilities,
+prediction and risk codes straight into the output columns of the same
+block. A task is a (start, stop) row range and the worker returns only
+the row count: no feature or result arrays are pickled either way.
+
+The pool (and the loaded models) live as long as the ParallelScorer, so
+repeated calls only pay for the copy in and the labels out.
+"""
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from utils.data_loader import read_model
+from utils.predictor import batch_result, prepare_batch_inputs, score_batch_inputs
+from utils.instrumentation import timed
+
+# Rows per task (a task should run long enough to hide the pool round trip)
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Columns of the shared block: features first, then what the workers write
+INPUT_FIELDS = [('ipk', np.float64), ('kehadiran', np.float64), ('status_risk', np.int8), ('valid', np.bool_)]
+OUTPUT_FIELDS = [
+    ('dropout_prob', np.float64),
+    ('safe_prob', np.float64),
+    ('actual_dropout', np.bool_),
+    ('final_prediction', np.bool_),
+    ('risk_codes', np.int8)
+]
+FIELDS = INPUT_FIELDS + OUTPUT_FIELDS
+
+# Model and scaler of the current worker process
+_model = None
+
+def _column_bytes(n, dtype):
+    # Every column starts on an 8-byte boundary
+    return -(-n * np.dtype(dtype).itemsize // 8) * 8
+
+def block_size(n):
+    """Bytes of the shared block holding n rows"""
+    return max(sum(_column_bytes(n, dtype) for _, dtype in FIELDS), 1)
+
+def block_columns(buffer, n):
+    """NumPy views of the FIELDS columns in a shared block of n rows"""
+    columns = {}
+    offset = 0
+    for name, dtype in FIELDS:
+        columns[name] = np.ndarray(n, dtype=dtype, buffer=buffer, offset=offset)
+        offset += _column_bytes(n, dtype)
+    return columns
+
+def _init_worker(prefer_compiled):
+    global _model
+    # The scaler is fitted with feature names but scored with plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    model, scaler, _ = read_model(prefer_compiled)
+    _model = (model, scaler)
+
+def _score_range(block_name, n, start, stop):
+    """Score rows start:stop of the shared block in place (runs in a worker)"""
+    model, scaler = _model
+    block = shared_memory.SharedMemory(name=block_name)
+    columns = None
+    try:
+        columns = block_columns(block.buf, n)
+        rows = slice(start, stop)
+        scored = score_batch_inputs(
+            model, scaler,
+            columns['ipk'][rows],
+            columns['kehadiran'][rows],
+            columns['status_risk'][rows],
+            columns['valid'][rows]
+        )
+        for (name, _), values in zip(OUTPUT_FIELDS, scored):
+            columns[name][rows] = values
+    finally:
+        # The views must be gone before the block can be closed
+        columns = None
+        block.close()
+    return stop - start
+
+def _ready(delay):
+    # Holds the worker for a moment so the next call goes to another one
+    time.sleep(delay)
+    return os.getpid()
+
+class ParallelScorer:
+    """
+    Process pool scoring IPK / Kehadiran / Status columns through shared memory
+
+    Use as a context manager (or call close()) so the pool is shut down.
+
+    Parameters:
+    -----------
+    workers : int, pool processes (default: os.cpu_count())
+    chunk_size : int, rows per task
+    prefer_compiled : bool, passed to read_model in every worker
+    """
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_ROWS, prefer_compiled=True):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # Workers must share this process's tracker, which unregisters each
+        # block when score() unlinks it (their own would report it as leaked)
+        resource_tracker.ensure_running()
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(prefer_compiled,)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self.pool.shutdown()
+
+    def start(self, attempts=10):
+        """
+        Start the workers (and load their models) now instead of on the first score() call
+
+        Returns the sorted pids of the workers that answered.
+        """
+        pids = set()
+        for _ in range(attempts):
+            pids.update(future.result() for future in [self.pool.submit(_ready, 0.05) for _ in range(self.workers)])
+            if len(pids) >= self.workers:
+                break
+        return sorted(pids)
+
+    @timed('parallel_score.score')
+    def score(self, ipk, kehadiran, status):
+        """
+        Score many students on the pool
+
+        Parameters and result are those of predict_dropout_risk_batch
+        (same values, row for row).
+        """
+        ipk, kehadiran, status_risk, valid = prepare_batch_inputs(ipk, kehadiran, status)
+        n = len(ipk)
+
+        block = shared_memory.SharedMemory(create=True, size=block_size(n))
+        columns = None
+        try:
+            columns = block_columns(block.buf, n)
+            columns['ipk'][:] = ipk
+            columns['kehadiran'][:] = kehadiran
+            columns['status_risk'][:] = status_risk
+            columns['valid'][:] = valid
+
+            futures = [
+                self.pool.submit(_score_range, block.name, n, start, min(start + self.chunk_size, n))
+                for start in range(0, n, self.chunk_size)
+            ]
+            scored_rows = sum(future.result() for future in futures)
+            if scored_rows != n:
+                raise RuntimeError(f"Workers scored {scored_rows} of {n} rows")
+
+            # Copied out, the block is released below
+            scored = [np.array(columns[name]) for name, _ in OUTPUT_FIELDS]
+        finally:
+            columns = None
+            block.close()
+            block.unlink()
+
+        return batch_result(valid, *scored)
+
+def predict_dropout_risk_parallel(ipk, kehadiran, status, workers=None, chunk_size=DEFAULT_CHUNK_ROWS):
+    """
+    predict_dropout_risk_batch on a temporary process pool (see ParallelScorer)
+
+    Worth it for cohorts of millions of rows; keep a ParallelScorer to
+    score several cohorts without restarting the workers.
+    """
+    with ParallelScorer(workers, chunk_size) as scorer:
+        return scorer.score(ipk, kehadiran, status)
+
+def batch_predict_parallel(df_processed, workers=None, chunk_size=DEFAULT_CHUNK_ROWS, scorer=None):
+    """
+    batch_predict on a process pool: (predictions, dropout_probs, risk_levels) lists
+
+    Uses scorer when given, otherwise a temporary ParallelScorer.
+    """
+    columns = (df_processed['IPK'], df_processed['Kehadiran'], df_processed['Status'])
+    if scorer is not None:
+        result = scorer.score(*columns)
+    else:
+        result = predict_dropout_risk_parallel(*columns, workers=workers, chunk_size=chunk_size)
+
+    return (
+        result['prediction'].tolist(),
+        result['dropout_probability'].tolist(),
+        result['risk_level'].tolist()
+    )
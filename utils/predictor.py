@@ -1,7 +1,27 @@
 import numpy as np
 import pandas as pd
 
-def predict_dropout_risk(model, scaler, ipk, kehadiran, status):
+from utils.probability_grid import lookup_probability
+from utils.risk_rules import RISK_LEVELS, condition, describe, load_rules, prediction_mask, risk_level_codes
+from utils.instrumentation import timed
+
+# Batch labels share these string objects instead of allocating one per row
+RISK_LEVEL_LABELS = np.array(RISK_LEVELS + ['UNKNOWN'], dtype=object)
+PREDICTION_LABELS = np.array(['TIDAK BERISIKO', 'RISIKO DROPOUT', 'UNKNOWN'], dtype=object)
+
+# float32 columns are rounded back to this many decimals when widened,
+# so a stored 0.7 compares as 0.7 and not as 0.699999988
+FLOAT32_DECIMALS = 6
+
+def to_float64(values):
+    """float64 array of a numeric column, undoing float32 representation error"""
+    values = np.asarray(values)
+    if values.dtype == np.float32:
+        return values.astype(np.float64).round(FLOAT32_DECIMALS)
+    return values.astype(np.float64)
+
+@timed()
+def predict_dropout_risk(model, scaler, ipk, kehadiran, status, grid=None):
     """
     Predict dropout risk for a student (REVISED - 3 features only)
     
@@ -12,54 +32,40 @@ def predict_dropout_risk(model, scaler, ipk, kehadiran, status):
     ipk : float (0-4)
     kehadiran : float (0-1)
     status : str ('AKTIF', 'LULUS', 'CUTI', 'KELUAR', 'NON AKTIF', 'REGISTRASI')
+    grid : optional probability grid (utils.probability_grid); inputs on
+           its lattice are looked up instead of calling the model
     
     Returns:
     --------
     dict : prediction results
     """
+    rules = load_rules()
+    
     # Normalize kehadiran if in percentage
     if kehadiran > 1:
         kehadiran = kehadiran / 100
     
     # Calculate Status Risk (1 = high risk, 0 = low risk)
-    status_risk = 1 if status.upper() in ['CUTI', 'KELUAR', 'NON AKTIF'] else 0
-    
-    # Create feature array (MUST MATCH: IPK, Kehadiran, Status_Risk)
-    features = np.array([[ipk, kehadiran, status_risk]])
-    
-    # Scale features
-    features_scaled = scaler.transform(features)
-    
-    # Predict
-    model_prediction = model.predict(features_scaled)[0]
-    probability = model.predict_proba(features_scaled)[0]
-    
-    # Determine actual dropout condition based on business rules
-    actual_dropout = (kehadiran < 0.7 and ipk < 2.0)
-    
-    # ENHANCED LOGIC: Use business rule + model probability
-    if actual_dropout and probability[1] > 0.05:
-        final_prediction = 1
-    elif probability[1] > 0.75:
-        final_prediction = 1
-    else:
-        final_prediction = 0
-    
-    # Adjust risk level based on actual condition
-    if actual_dropout:
-        if probability[1] > 0.3 or status_risk == 1:
-            risk_level = 'TINGGI'
-        elif probability[1] > 0.05:
-            risk_level = 'SEDANG'
-        else:
-            risk_level = 'SEDANG'
-    else:
-        if probability[1] > 0.7:
-            risk_level = 'TINGGI'
-        elif probability[1] > 0.4:
-            risk_level = 'SEDANG'
-        else:
-            risk_level = 'RENDAH'
+    status_risk = 1 if status.upper() in rules['high_risk_statuses'] else 0
+    
+    probability = None if grid is None else lookup_probability(grid, ipk, kehadiran, status_risk)
+    if probability is None:
+        # Create feature array (MUST MATCH: IPK, Kehadiran, Status_Risk)
+        features = np.array([[ipk, kehadiran, status_risk]])
+        
+        # Scale features
+        features_scaled = scaler.transform(features)
+        
+        # Predict
+        probability = model.predict_proba(features_scaled)[0]
+    
+    # Business rules + model probability (config/risk_rules.json)
+    env = {'ipk': ipk, 'kehadiran': kehadiran, 'status_risk': status_risk, 'dropout_prob': probability[1]}
+    actual_dropout = bool(condition(rules, 'actual_dropout', env))
+    final_prediction = int(bool(prediction_mask(rules, env)))
+    risk_level = RISK_LEVELS[int(risk_level_codes(rules, env))]
+    ipk_risk = bool(condition(rules, 'ipk_risk', env))
+    kehadiran_risk = bool(condition(rules, 'kehadiran_risk', env))
     
     # Prepare result
     result = {
@@ -70,9 +76,9 @@ def predict_dropout_risk(model, scaler, ipk, kehadiran, status):
         'risk_level': risk_level,
         'details': {
             'ipk': ipk,
-            'ipk_status': '❌ RENDAH (< 2.0)' if ipk < 2.0 else '✅ BAIK',
+            'ipk_status': f"❌ RENDAH ({describe(rules, 'ipk_risk')})" if ipk_risk else '✅ BAIK',
             'kehadiran': f"{kehadiran*100:.1f}%",
-            'kehadiran_status': '❌ RENDAH (< 70%)' if kehadiran < 0.7 else '✅ BAIK',
+            'kehadiran_status': f"❌ RENDAH ({describe(rules, 'kehadiran_risk')})" if kehadiran_risk else '✅ BAIK',
             'status_mahasiswa': status.upper(),
             'status_risk': '⚠️ BERISIKO' if status_risk else '✅ AMAN',
             'model_prob': f"{probability[1]:.2%}",
@@ -82,9 +88,122 @@ def predict_dropout_risk(model, scaler, ipk, kehadiran, status):
     
     return result
 
+def apply_risk_rules(ipk, kehadiran, status_risk, dropout_prob, rules=None):
+    """
+    Business rules of predict_dropout_risk over arrays (kehadiran as 0-1)
+    
+    rules defaults to the compiled config/risk_rules.json (utils.risk_rules).
+    
+    Returns:
+    --------
+    actual_dropout : bool array (the spec's actual_dropout condition)
+    final_prediction : bool array (RISIKO DROPOUT)
+    risk_codes : int array, index into RISK_LEVEL_LABELS
+    """
+    rules = rules or load_rules()
+    env = {'ipk': ipk, 'kehadiran': kehadiran, 'status_risk': status_risk, 'dropout_prob': dropout_prob}
+    actual_dropout = condition(rules, 'actual_dropout', env)
+    final_prediction = prediction_mask(rules, env)
+    risk_codes = risk_level_codes(rules, env)
+    return actual_dropout, final_prediction, risk_codes
+
+def prepare_batch_inputs(ipk, kehadiran, status):
+    """
+    Feature columns of predict_dropout_risk_batch
+    
+    Returns:
+    --------
+    ipk : float64 array
+    kehadiran : float64 array, normalized to 0-1
+    status_risk : int array (1 = high risk status)
+    valid : bool array, False where the status is missing or not a string
+            (predict_dropout_risk would fail on those rows)
+    """
+    ipk = to_float64(ipk)
+    kehadiran = to_float64(kehadiran)
+    
+    # Normalize kehadiran if in percentage
+    kehadiran = np.where(kehadiran > 1, kehadiran / 100, kehadiran)
+    
+    # Status lookups are done once per distinct status, then broadcast by code
+    status_codes, status_values = pd.factorize(pd.Series(np.asarray(status, dtype=object)))
+    status_upper = pd.Series(status_values, dtype=object).str.upper()
+    
+    # The appended False is what code -1 (missing status) picks up
+    valid = np.append(status_upper.notna().to_numpy(), False)[status_codes]
+    
+    # Calculate Status Risk (1 = high risk, 0 = low risk)
+    status_risk = np.append(status_upper.isin(load_rules()['high_risk_statuses']).to_numpy(), False).astype(int)[status_codes]
+    return ipk, kehadiran, status_risk, valid
+
+def score_batch_inputs(model, scaler, ipk, kehadiran, status_risk, valid):
+    """
+    Model probabilities and business rules for prepared feature columns
+    
+    Returns:
+    --------
+    dropout_prob, safe_prob : float arrays (0 on rows that are not valid)
+    actual_dropout, final_prediction, risk_codes : see apply_risk_rules
+    """
+    n = len(ipk)
+    dropout_prob = np.zeros(n)
+    safe_prob = np.zeros(n)
+    if valid.any():
+        # Create feature matrix (MUST MATCH: IPK, Kehadiran, Status_Risk)
+        features = np.column_stack([ipk[valid], kehadiran[valid], status_risk[valid]])
+        probability = model.predict_proba(scaler.transform(features))
+        safe_prob[valid] = probability[:, 0]
+        dropout_prob[valid] = probability[:, 1]
+    
+    actual_dropout, final_prediction, risk_codes = apply_risk_rules(ipk, kehadiran, status_risk, dropout_prob)
+    return dropout_prob, safe_prob, actual_dropout, final_prediction, risk_codes
+
+def batch_result(valid, dropout_prob, safe_prob, actual_dropout, final_prediction, risk_codes):
+    """predict_dropout_risk_batch result dict of scored columns (labels shared, UNKNOWN where not valid)"""
+    risk_level = RISK_LEVEL_LABELS[risk_codes]
+    prediction = PREDICTION_LABELS[final_prediction.astype(int)]
+    prediction[~valid] = PREDICTION_LABELS[2]
+    risk_level[~valid] = RISK_LEVEL_LABELS[3]
+    
+    return {
+        'prediction': prediction,
+        'actual_dropout_condition': actual_dropout & valid,
+        'dropout_probability': dropout_prob,
+        'safe_probability': safe_prob,
+        'risk_level': risk_level
+    }
+
+@timed()
+def predict_dropout_risk_batch(model, scaler, ipk, kehadiran, status):
+    """
+    Vectorized version of predict_dropout_risk for many students at once
+    
+    Builds the (n, 3) feature matrix in one go, calls the scaler and
+    predict_proba once, and applies the business rules with NumPy masks.
+    Gives the same labels as calling predict_dropout_risk row by row.
+    
+    Parameters:
+    -----------
+    model : trained model
+    scaler : fitted scaler
+    ipk : array-like of float (0-4)
+    kehadiran : array-like of float (0-1 or 0-100)
+    status : array-like of str
+    
+    Returns:
+    --------
+    dict : arrays 'prediction', 'actual_dropout_condition',
+           'dropout_probability', 'safe_probability', 'risk_level'
+           (rows that cannot be scored get 'UNKNOWN' and probability 0)
+    """
+    ipk, kehadiran, status_risk, valid = prepare_batch_inputs(ipk, kehadiran, status)
+    scored = score_batch_inputs(model, scaler, ipk, kehadiran, status_risk, valid)
+    return batch_result(valid, *scored)
+
+@timed()
 def batch_predict(model, scaler, df_processed):
     """
-    Predict for multiple students (REVISED)
+    Predict for multiple students (REVISED - vectorized)
     
     Parameters:
     -----------
@@ -97,24 +216,15 @@ def batch_predict(model, scaler, df_processed):
     predictions : list of risk levels
     dropout_probs : list of dropout probabilities
     """
-    predictions = []
-    dropout_probs = []
-    risk_levels = []
-    
-    for _, row in df_processed.iterrows():
-        try:
-            result = predict_dropout_risk(
-                model, scaler,
-                row['IPK'], 
-                row['Kehadiran'],
-                row['Status']
-            )
-            predictions.append(result['prediction'])
-            dropout_probs.append(result['dropout_probability'])
-            risk_levels.append(result['risk_level'])
-        except Exception as e:
-            predictions.append('UNKNOWN')
-            dropout_probs.append(0)
-            risk_levels.append('UNKNOWN')
-    
-    return predictions, dropout_probs, risk_levels
\ No newline at end of file
+    result = predict_dropout_risk_batch(
+        model, scaler,
+        df_processed['IPK'],
+        df_processed['Kehadiran'],
+        df_processed['Status']
+    )
+    
+    return (
+        result['prediction'].tolist(),
+        result['dropout_probability'].tolist(),
+        result['risk_level'].tolist()
+    )
@@ -1,5 +1,24 @@
 import pandas as pd
 import numpy as np
+from utils.predictor import to_float64
+from utils.risk_rules import condition, load_rules, risk_score
+from utils.instrumentation import timed
+
+# Status encoding
+STATUS_MAPPING = {
+    'AKTIF': 0,
+    'LULUS': 1,
+    'CUTI': 2,
+    'KELUAR': 3,
+    'NON AKTIF': 4,
+    'REGISTRASI': 5
+}
+
+# Lower edges of IPK categories 1-4 (see categorize_ipk)
+IPK_CATEGORY_BINS = [2.0, 2.75, 3.0, 3.5]
+
+# Kehadiran Category: 0=Sangat Rendah, 1=Rendah, 2=Sedang, 3=Baik
+KEHADIRAN_CATEGORY_BINS = [0, 0.5, 0.7, 0.85, 1.0]
 
 def categorize_ipk(ipk):
     """Categorize IPK into performance levels (REVISED)"""
@@ -16,66 +35,76 @@ def categorize_ipk(ipk):
     else:
         return 0  # Kurang (Berisiko)
 
-def process_data(df):
-    """Process raw data for prediction (REVISED)"""
-    df_processed = df.copy()
+def categorize_ipk_array(ipk):
+    """Vectorized categorize_ipk for a whole IPK column"""
+    ipk = to_float64(ipk)
+    return np.where(np.isnan(ipk), 0, np.digitize(ipk, IPK_CATEGORY_BINS))
+
+# Columns whose missing values are filled (with the median by default)
+FILL_COLUMNS = ['IPK', 'SKS', 'Kehadiran']
+
+@timed()
+def process_data(df, copy=True, fill_values=None):
+    """
+    Process raw data for prediction (REVISED - vectorized)
+    
+    With copy=False the feature columns are added to df in place, which
+    saves a full copy when the caller no longer needs the raw frame.
+    fill_values ({column: value}) replaces the per-frame medians used for
+    missing values, so chunks of a larger file are filled consistently.
+    """
+    df_processed = df.copy() if copy else df
+    rules = load_rules()
     
     # Handle missing values first
-    if 'IPK' in df_processed.columns:
-        df_processed['IPK'].fillna(df_processed['IPK'].median(), inplace=True)
-    if 'SKS' in df_processed.columns:
-        df_processed['SKS'].fillna(df_processed['SKS'].median(), inplace=True)
-    if 'Kehadiran' in df_processed.columns:
-        df_processed['Kehadiran'].fillna(df_processed['Kehadiran'].median(), inplace=True)
+    for col in FILL_COLUMNS:
+        if col in df_processed.columns:
+            fill = fill_values[col] if fill_values is not None and col in fill_values else df_processed[col].median()
+            df_processed[col] = df_processed[col].fillna(fill)
     
-    # Create target variable (REVISED - based on IPK AND Kehadiran)
-    KEHADIRAN_THRESHOLD = 0.7
-    IPK_THRESHOLD = 2.0
+    ipk = to_float64(df_processed['IPK'])
+    kehadiran = to_float64(df_processed['Kehadiran'])
     
-    df_processed['Target'] = df_processed.apply(
-        lambda row: 1 if (row['Kehadiran'] < KEHADIRAN_THRESHOLD and row['IPK'] < IPK_THRESHOLD) else 0,
-        axis=1
-    )
+    # Create target variable (the actual_dropout condition of config/risk_rules.json)
+    env = {'ipk': ipk, 'kehadiran': kehadiran}
+    ipk_risk = condition(rules, 'ipk_risk', env)
+    kehadiran_risk = condition(rules, 'kehadiran_risk', env)
+    df_processed['Target'] = np.where(condition(rules, 'actual_dropout', env), 1, 0)
     
-    # Status encoding
-    status_mapping = {
-        'AKTIF': 0,
-        'LULUS': 1,
-        'CUTI': 2,
-        'KELUAR': 3,
-        'NON AKTIF': 4,
-        'REGISTRASI': 5
-    }
-    df_processed['Status_Encoded'] = df_processed['Status'].map(status_mapping)
+    # Status lookups are done once per distinct status, then broadcast by code
+    # (code -1 = missing status, which picks up the appended NaN / 0)
+    status_codes, status_values = pd.factorize(df_processed['Status'])
+    status_values = pd.Series(np.asarray(status_values, dtype=object))
     
-    # Status Risk (CUTI, KELUAR, NON AKTIF = High Risk)
-    df_processed['Status_Risk'] = df_processed['Status'].apply(
-        lambda x: 1 if x.upper() in ['CUTI', 'KELUAR', 'NON AKTIF'] else 0
-    )
+    status_encoded = np.append(status_values.map(STATUS_MAPPING).to_numpy(dtype=float), np.nan)
+    df_processed['Status_Encoded'] = status_encoded[status_codes]
+    if not np.isnan(df_processed['Status_Encoded']).any():
+        df_processed['Status_Encoded'] = df_processed['Status_Encoded'].astype(int)
+    
+    # Status Risk (high_risk_statuses of the rule spec, e.g. CUTI, KELUAR, NON AKTIF)
+    status_risk = status_values.str.upper().isin(rules['high_risk_statuses']).to_numpy().astype(int)
+    df_processed['Status_Risk'] = np.append(status_risk, 0)[status_codes]
+    env['status_risk'] = df_processed['Status_Risk'].to_numpy()
     
     # IPK Category
-    df_processed['IPK_Category'] = df_processed['IPK'].apply(categorize_ipk)
+    df_processed['IPK_Category'] = categorize_ipk_array(ipk)
     
-    # IPK Risk (IPK < 2.0)
-    df_processed['IPK_Risk'] = (df_processed['IPK'] < IPK_THRESHOLD).astype(int)
+    # IPK Risk (e.g. IPK < 2.0)
+    df_processed['IPK_Risk'] = ipk_risk.astype(int)
     
-    # Kehadiran Category
-    df_processed['Kehadiran_Category'] = pd.cut(
-        df_processed['Kehadiran'], 
-        bins=[0, 0.5, 0.7, 0.85, 1.0],
-        labels=[0, 1, 2, 3],  # 0=Sangat Rendah, 1=Rendah, 2=Sedang, 3=Baik
-        include_lowest=True
+    # Kehadiran Category (right-closed bins; out of range or missing -> 0)
+    kehadiran_in_range = (kehadiran >= KEHADIRAN_CATEGORY_BINS[0]) & (kehadiran <= KEHADIRAN_CATEGORY_BINS[-1])
+    df_processed['Kehadiran_Category'] = np.where(
+        kehadiran_in_range,
+        np.digitize(kehadiran, KEHADIRAN_CATEGORY_BINS[1:-1], right=True),
+        0
     )
-    df_processed['Kehadiran_Category'] = pd.to_numeric(df_processed['Kehadiran_Category'], errors='coerce').fillna(0).astype(int)
     
-    # Kehadiran Risk (Kehadiran < 70%)
-    df_processed['Kehadiran_Risk'] = (df_processed['Kehadiran'] < KEHADIRAN_THRESHOLD).astype(int)
+    # Kehadiran Risk (e.g. Kehadiran < 70%)
+    df_processed['Kehadiran_Risk'] = kehadiran_risk.astype(int)
     
-    # Combined Risk Score (0-4)
-    df_processed['Risk_Score'] = (
-        df_processed['IPK_Risk'] * 2 +  # IPK rendah = 2 poin
-        df_processed['Kehadiran_Risk'] * 2 +  # Kehadiran rendah = 2 poin
-        df_processed['Status_Risk'] * 1  # Status berisiko = 1 poin
-    ).clip(upper=4)
+    # Combined Risk Score (weighted conditions, capped; default IPK rendah = 2
+    # poin, Kehadiran rendah = 2 poin, Status berisiko = 1 poin, max 4)
+    df_processed['Risk_Score'] = risk_score(rules, env)
     
-    return df_processed
\ No newline at end of file
+    return df_processed
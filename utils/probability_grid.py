@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+
+from utils.data_loader import CACHE_DIR
+from utils.risk_rules import load_rules, probability_cutoffs
+from utils.instrumentation import timed
+
+# Input lattice of the Prediksi Individu form: IPK 0-4 in 0.01 steps,
+# Kehadiran 0-100% in 1% steps, Status_Risk 0/1
+GRID_IPK = np.round(np.arange(401) * 0.01, 2)
+GRID_KEHADIRAN = np.round(np.arange(101) * 0.01, 2)
+GRID_STATUS_RISK = np.array([0, 1])
+
+# Inputs closer than this to a lattice point are answered from the grid
+LATTICE_TOLERANCE = 1e-9
+
+# Saved grids, memory-mapped by every process that loads the same model
+GRID_CACHE_DIR = CACHE_DIR / "probability_grid"
+
+@timed()
+def build_probability_grid(model, scaler, cache_key=None):
+    """
+    Model class probabilities for every point of the input lattice
+
+    One predict_proba call over 401 x 101 x 2 points (~81k rows). With a
+    cache_key (e.g. the model fingerprint) the array is saved to
+    GRID_CACHE_DIR and returned as a read-only memory map, so replicas on
+    one host share it; grids of other keys are removed.
+
+    Returns:
+    --------
+    dict : 'ipk', 'kehadiran', 'status_risk' (lattice axes) and 'proba'
+           of shape (401, 101, 2, n_classes) - float32, or float64 if
+           float32 would change a business-rule comparison
+    """
+    if cache_key is not None:
+        cache_path = GRID_CACHE_DIR / f"{cache_key}.npy"
+        if cache_path.exists():
+            try:
+                return _grid(np.load(cache_path, mmap_mode='r', allow_pickle=False))
+            except (OSError, ValueError):
+                pass
+
+    ipk, kehadiran, status_risk = np.meshgrid(GRID_IPK, GRID_KEHADIRAN, GRID_STATUS_RISK, indexing='ij')
+    features = np.column_stack([ipk.ravel(), kehadiran.ravel(), status_risk.ravel()])
+
+    proba = model.predict_proba(scaler.transform(features))
+    proba = proba.reshape(len(GRID_IPK), len(GRID_KEHADIRAN), len(GRID_STATUS_RISK), -1)
+
+    proba32 = proba.astype(np.float32)
+    # Kept as float32 only if no grid point crosses a probability cut-off of
+    # the risk rules when rounded
+    lossless = all(
+        np.array_equal(compare(proba32[..., 1], value), compare(proba[..., 1], value))
+        for compare, value in probability_cutoffs(load_rules())
+    )
+
+    proba = proba32 if lossless else proba
+
+    if cache_key is not None:
+        try:
+            _save_grid(proba, cache_path)
+            proba = np.load(cache_path, mmap_mode='r', allow_pickle=False)
+        except OSError:
+            # Read-only cache directory etc. -- keep the in-memory grid
+            pass
+    return _grid(proba)
+
+def _grid(proba):
+    return {
+        'ipk': GRID_IPK,
+        'kehadiran': GRID_KEHADIRAN,
+        'status_risk': GRID_STATUS_RISK,
+        'proba': proba
+    }
+
+def _save_grid(proba, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp.npy')
+    np.save(tmp_path, proba)
+    tmp_path.replace(path)
+    for old in path.parent.glob('*.npy'):
+        if old != path and not old.name.endswith('.tmp.npy'):
+            old.unlink(missing_ok=True)
+
+def _lattice_index(axis, value):
+    if not math.isfinite(value):
+        return None
+    step = axis[1] - axis[0]
+    i = int(round((value - axis[0]) / step))
+    if 0 <= i < len(axis) and abs(axis[i] - value) <= LATTICE_TOLERANCE:
+        return i
+    return None
+
+def lookup_probability(grid, ipk, kehadiran, status_risk):
+    """
+    Class probabilities of one input from the grid (O(1) indexing)
+
+    kehadiran is a fraction (0-1). Returns None when the input is not on
+    the lattice, so the caller can fall back to the model.
+    """
+    i = _lattice_index(grid['ipk'], ipk)
+    k = _lattice_index(grid['kehadiran'], kehadiran)
+    if i is None or k is None or status_risk not in (0, 1):
+        return None
+    return grid['proba'][i, k, int(status_risk)]
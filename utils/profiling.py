@@ -0,0 +1,146 @@
+"""
+Call-stack profiles of one function call (standard library only)
+
+profile_call() runs a function (the dashboard runs a page's show()) under
+cProfile and, at the same time, a thread that samples the calling
+thread's stack every SAMPLE_INTERVAL seconds. Both are written to
+PROFILE_DIR:
+
+    <stamp>-<label>.prof     cProfile stats (python -m pstats, snakeviz, ...)
+    <stamp>-<label>.folded   collapsed stacks, one "outer;...;inner count" line per
+                             distinct stack (flamegraph.pl, speedscope, inferno)
+
+Nothing here is imported unless profiling is switched on.
+"""
+import cProfile
+import functools
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from utils.data_loader import BASE_DIR, CACHE_DIR
+
+PROFILE_DIR = CACHE_DIR / "profiles"
+
+# Seconds between stack samples (the thread also waits for the GIL, so the
+# real rate is bounded by sys.getswitchinterval())
+SAMPLE_INTERVAL = 0.001
+
+# Functions listed in the report tables
+TOP_FUNCTIONS = 20
+
+# Profiles kept in PROFILE_DIR (oldest removed first)
+PROFILE_KEEP = 20
+
+@functools.lru_cache(maxsize=None)
+def _short_path(filename):
+    """Path relative to the project, or the last two parts for library files"""
+    path = Path(filename)
+    try:
+        return path.resolve().relative_to(BASE_DIR).as_posix()
+    except (OSError, ValueError):
+        return '/'.join(path.parts[-2:])
+
+@functools.lru_cache(maxsize=None)
+def _frame_name(code):
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread below a boundary frame until stop() is called"""
+
+    def __init__(self, thread_id, boundary, interval=SAMPLE_INTERVAL):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.boundary = boundary
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.boundary:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+def _function_rows(stats, key):
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': name if filename == '~' else f"{name} ({_short_path(filename)}:{line})",
+            'calls': calls,
+            'own_s': own,
+            'cumulative_s': cumulative
+        })
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+def _prune(profile_dir, keep):
+    profiles = sorted(profile_dir.glob('*.prof'))
+    for old in profiles[:-keep] if keep else profiles:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.folded').unlink(missing_ok=True)
+
+def profile_call(function, *args, label='run', profile_dir=PROFILE_DIR, **kwargs):
+    """
+    Call function(*args, **kwargs) under cProfile and the stack sampler
+
+    Returns:
+    --------
+    result : what function returned
+    report : dict with 'label', 'seconds', 'samples', 'profile_path',
+             'collapsed_path' (None if PROFILE_DIR is not writable),
+             'top_own' and 'top_cumulative' (TOP_FUNCTIONS rows of function,
+             calls, own_s, cumulative_s)
+    """
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), sys._getframe())
+    sampler.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        profiler.disable()
+        seconds = time.perf_counter() - start
+        sampler.stop()
+
+    stats = pstats.Stats(profiler)
+    report = {
+        'label': label,
+        'seconds': seconds,
+        'samples': sum(sampler.stacks.values()),
+        'profile_path': None,
+        'collapsed_path': None,
+        'top_own': _function_rows(stats, 'own_s'),
+        'top_cumulative': _function_rows(stats, 'cumulative_s')
+    }
+
+    stem = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{label}"
+    try:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profile_path = profile_dir / f"{stem}.prof"
+        collapsed_path = profile_dir / f"{stem}.folded"
+        stats.dump_stats(profile_path)
+        with open(collapsed_path, 'w') as f:
+            for stack, count in sorted(sampler.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        report['profile_path'] = str(profile_path)
+        report['collapsed_path'] = str(collapsed_path)
+        _prune(profile_dir, PROFILE_KEEP)
+    except OSError:
+        # Read-only cache directory -- the report is still shown
+        pass
+    return result, report
@@ -0,0 +1,330 @@
+"""
+Declarative dropout risk rules (config/risk_rules.json) compiled to NumPy masks
+
+The spec defines named conditions over the scoring inputs
+
+    ipk            IPK (0-4)
+    kehadiran      Kehadiran as a fraction (0-1)
+    status_risk    1 for a high-risk status (listed in "high_risk_statuses"), else 0
+    dropout_prob   model probability of dropout (0-1)
+
+and builds the prediction, the risk level and the Risk_Score from them.
+An expression is one of
+
+    {"column": "ipk", "op": "<", "value": 2.0}     comparison (<, <=, >, >=, ==, !=)
+    {"all": [expr, ...]}, {"any": [expr, ...]}     and / or
+    {"not": expr}
+    "name"                                         a condition defined earlier in "conditions"
+
+The conditions ipk_risk, kehadiran_risk and actual_dropout are required
+(process_data, the risk rules and the trend warnings use them) and may
+only depend on ipk and kehadiran, since they are evaluated before there is
+a status or a model probability. Risk_Score terms may not depend on
+dropout_prob.
+compile_rules() turns every expression into a function of an input dict
+once; the functions work on arrays of any length and on plain scalars, so
+the per-student and batch paths share the same rules. load_rules()
+compiles the spec file again only when it changes.
+"""
+import functools
+import hashlib
+import json
+import operator
+import os
+from pathlib import Path
+
+import numpy as np
+
+from utils.data_loader import BASE_DIR
+
+RULES_PATH = Path(os.environ.get('DROPOUT_RISK_RULES') or BASE_DIR / "config" / "risk_rules.json")
+
+INPUTS = ['ipk', 'kehadiran', 'status_risk', 'dropout_prob']
+REQUIRED_CONDITIONS = ['ipk_risk', 'kehadiran_risk', 'actual_dropout']
+
+# What the required conditions and the Risk_Score terms may depend on
+REQUIRED_CONDITION_INPUTS = ['ipk', 'kehadiran']
+RISK_SCORE_INPUTS = ['ipk', 'kehadiran', 'status_risk']
+
+# Risk levels in code order (utils.predictor.RISK_LEVEL_LABELS adds UNKNOWN)
+RISK_LEVELS = ['TINGGI', 'SEDANG', 'RENDAH']
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# Labels used by describe()
+INPUT_LABELS = {'ipk': 'IPK', 'kehadiran': 'Kehadiran', 'status_risk': 'Status_Risk', 'dropout_prob': 'Probabilitas'}
+PERCENT_INPUTS = ['kehadiran', 'dropout_prob']
+
+def _compile(expr, conditions):
+    """Function of an input dict for one expression (named conditions are memoized in the dict)"""
+    if isinstance(expr, str):
+        if expr not in conditions:
+            raise ValueError(f"Unknown condition: {expr}")
+        function = conditions[expr]
+
+        def named(env):
+            if expr not in env:
+                env[expr] = function(env)
+            return env[expr]
+        return named
+
+    if not isinstance(expr, dict) or len(expr.keys() & {'column', 'all', 'any', 'not'}) != 1:
+        raise ValueError(f"Invalid rule expression: {expr!r}")
+
+    if 'column' in expr:
+        column, op, value = expr['column'], expr.get('op'), expr.get('value')
+        if column not in INPUTS:
+            raise ValueError(f"Unknown rule input: {column}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown rule operator: {op}")
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"Rule value must be a number: {value!r}")
+        compare = OPERATORS[op]
+        return lambda env: compare(env[column], value)
+
+    if 'not' in expr:
+        inner = _compile(expr['not'], conditions)
+        return lambda env: np.logical_not(inner(env))
+
+    key = 'all' if 'all' in expr else 'any'
+    if not isinstance(expr[key], list) or not expr[key]:
+        raise ValueError(f"'{key}' needs a non-empty list of expressions")
+    parts = [_compile(part, conditions) for part in expr[key]]
+    combine = np.logical_and if key == 'all' else np.logical_or
+    # The result that decides an 'any' (True) or an 'all' (False) on its own
+    decisive = key == 'any'
+
+    def combined(env):
+        first = parts[0](env)
+        if np.isscalar(first):
+            # One student: stop at the first deciding part, like plain and / or
+            for part in parts[1:]:
+                if bool(first) == decisive:
+                    break
+                first = part(env)
+            return bool(first)
+        return functools.reduce(combine, (part(env) for part in parts[1:]), first)
+    return combined
+
+def _inputs(expr, condition_inputs):
+    """Inputs an expression reads, directly or through the named conditions it uses"""
+    if isinstance(expr, str):
+        return condition_inputs[expr]
+    if 'column' in expr:
+        return {expr['column']}
+    if 'not' in expr:
+        return _inputs(expr['not'], condition_inputs)
+    return set().union(*(_inputs(part, condition_inputs) for part in expr['all' if 'all' in expr else 'any']))
+
+def compile_rules(spec):
+    """
+    Validate a rule spec and compile its expressions
+
+    Returns:
+    --------
+    dict : 'spec', 'digest' (SHA-1 of the canonical JSON), 'high_risk_statuses',
+           'conditions' ({name: function}), 'prediction' (function),
+           'risk_levels' ([(code, function)] in match order), 'default_level'
+           (code), 'risk_score' (weights and max)
+    """
+    conditions = {}
+    condition_inputs = {}
+    for name, expr in spec.get('conditions', {}).items():
+        if name in INPUTS:
+            raise ValueError(f"Condition name clashes with an input: {name}")
+        conditions[name] = _compile(expr, conditions)
+        condition_inputs[name] = _inputs(expr, condition_inputs)
+    missing = [name for name in REQUIRED_CONDITIONS if name not in conditions]
+    if missing:
+        raise ValueError(f"Rule spec is missing conditions: {', '.join(missing)}")
+    for name in REQUIRED_CONDITIONS:
+        extra = sorted(condition_inputs[name] - set(REQUIRED_CONDITION_INPUTS))
+        if extra:
+            raise ValueError(
+                f"Condition {name} may only depend on {' and '.join(REQUIRED_CONDITION_INPUTS)}, "
+                f"not on {', '.join(extra)}"
+            )
+
+    levels = spec['risk_level']
+    risk_levels = []
+    for rule in levels['rules']:
+        if rule['level'] not in RISK_LEVELS:
+            raise ValueError(f"Unknown risk level: {rule['level']}")
+        risk_levels.append((RISK_LEVELS.index(rule['level']), _compile(rule['when'], conditions)))
+    if levels['default'] not in RISK_LEVELS:
+        raise ValueError(f"Unknown risk level: {levels['default']}")
+
+    weights = spec['risk_score']['weights']
+    for name in weights:
+        if name not in INPUTS and name not in conditions:
+            raise ValueError(f"Unknown Risk_Score term: {name}")
+        extra = sorted(condition_inputs.get(name, {name}) - set(RISK_SCORE_INPUTS))
+        if extra:
+            raise ValueError(f"Risk_Score term {name} may not depend on {', '.join(extra)}")
+
+    return {
+        'spec': spec,
+        'digest': hashlib.sha1(json.dumps(spec, sort_keys=True, separators=(',', ':')).encode()).hexdigest(),
+        'high_risk_statuses': [str(status).upper() for status in spec['high_risk_statuses']],
+        'conditions': conditions,
+        'prediction': _compile(spec['prediction'], conditions),
+        'risk_levels': risk_levels,
+        'default_level': RISK_LEVELS.index(levels['default']),
+        'risk_score': {'weights': weights, 'max': spec['risk_score'].get('max')}
+    }
+
+@functools.lru_cache(maxsize=4)
+def _load(path, mtime_ns, size):
+    with open(path) as f:
+        return compile_rules(json.load(f))
+
+def load_rules(path=None):
+    """Compiled rules of the spec file (default RULES_PATH), recompiled when the file changes"""
+    path = RULES_PATH if path is None else Path(path)
+    stat = os.stat(path)
+    return _load(str(path), stat.st_mtime_ns, stat.st_size)
+
+def condition(rules, name, env):
+    """Mask of a named condition; env is a dict of inputs, computed conditions are added to it"""
+    if name not in env:
+        env[name] = rules['conditions'][name](env)
+    return env[name]
+
+def prediction_mask(rules, env):
+    """True where the prediction is RISIKO DROPOUT (needs dropout_prob)"""
+    return rules['prediction'](env)
+
+def risk_level_codes(rules, env):
+    """Index into RISK_LEVELS of the first matching risk level rule (needs dropout_prob)"""
+    if np.isscalar(env['dropout_prob']):
+        # One student: stop at the first match instead of building every mask
+        for code, function in rules['risk_levels']:
+            if function(env):
+                return code
+        return rules['default_level']
+    if not rules['risk_levels']:
+        return np.full(np.shape(env['dropout_prob']), rules['default_level'])
+    codes, functions = zip(*rules['risk_levels'])
+    return np.select([function(env) for function in functions], list(codes), default=rules['default_level'])
+
+def risk_score(rules, env):
+    """Weighted sum of the Risk_Score terms, capped at the spec's max"""
+    score = sum(
+        weight * np.asarray(env[name] if name in INPUTS else condition(rules, name, env), dtype=np.int64)
+        for name, weight in rules['risk_score']['weights'].items()
+    )
+    cap = rules['risk_score']['max']
+    return score if cap is None else np.minimum(score, cap)
+
+def probability_cutoffs(rules):
+    """(operator, value) of every comparison on dropout_prob in the spec"""
+    cutoffs = []
+
+    def walk(expr):
+        if isinstance(expr, dict):
+            if expr.get('column') == 'dropout_prob':
+                cutoffs.append((OPERATORS[expr['op']], expr['value']))
+            for key in ['all', 'any']:
+                for part in expr.get(key, []):
+                    walk(part)
+            if 'not' in expr:
+                walk(expr['not'])
+
+    spec = rules['spec']
+    for expr in spec['conditions'].values():
+        walk(expr)
+    walk(spec['prediction'])
+    for rule in spec['risk_level']['rules']:
+        walk(rule['when'])
+    return cutoffs
+
+def _describe(expr, spec, nested=False):
+    if isinstance(expr, str):
+        return _describe(spec['conditions'][expr], spec, nested)
+    if 'column' in expr:
+        value = expr['value']
+        value = f"{value * 100:g}%" if expr['column'] in PERCENT_INPUTS else str(value)
+        return f"{INPUT_LABELS[expr['column']]} {expr['op']} {value}"
+    if 'not' in expr:
+        return f"BUKAN ({_describe(expr['not'], spec)})"
+    key = 'all' if 'all' in expr else 'any'
+    text = f" **{'DAN' if key == 'all' else 'ATAU'}** ".join(_describe(part, spec, True) for part in expr[key])
+    return f"({text})" if nested and len(expr[key]) > 1 else text
+
+def describe(rules, name):
+    """Markdown text of a named condition, e.g. 'IPK < 2.0 **DAN** Kehadiran < 70%'"""
+    return _describe(name, rules['spec'])
+
+def describe_prediction(rules):
+    """Markdown text of the prediction rule (when a student is RISIKO DROPOUT)"""
+    return _describe(rules['spec']['prediction'], rules['spec'])
+
+def describe_risk_levels(rules):
+    """[(level, markdown text of its condition)] of the risk level rules in match order"""
+    spec = rules['spec']
+    return [(rule['level'], _describe(rule['when'], spec)) for rule in spec['risk_level']['rules']]
+
+def _resolve(expr, spec):
+    # Follow named conditions down to an expression
+    while isinstance(expr, str):
+        expr = spec['conditions'][expr]
+    return expr
+
+def threshold(rules, name):
+    """Value of a named condition that is a single comparison (e.g. ipk_risk -> 2.0), else None"""
+    expr = _resolve(name, rules['spec'])
+    return expr['value'] if 'column' in expr else None
+
+def _probability_comparison(expr, spec):
+    # The dropout_prob comparison expr is, or None
+    expr = _resolve(expr, spec)
+    return expr if expr.get('column') == 'dropout_prob' else None
+
+def prediction_threshold(rules):
+    """
+    Probability above which every student is predicted RISIKO DROPOUT, or None
+
+    That is a '>' / '>=' comparison on dropout_prob forming the whole
+    prediction rule or one part of its top-level 'any' (0.75 by default).
+    """
+    spec = rules['spec']
+    prediction = _resolve(spec['prediction'], spec)
+    for part in prediction.get('any', [prediction]):
+        expr = _probability_comparison(part, spec)
+        if expr is not None and expr['op'] in ('>', '>='):
+            return expr['value']
+    return None
+
+def probability_bands(rules):
+    """
+    Risk level by model probability alone: [(level, low, high)] covering 0-1
+
+    Built from the risk level rules that are a single dropout_prob
+    comparison (first match wins, then the default level); rules that also
+    look at other inputs are left out, so these are the levels of students
+    no other rule catches (by default RENDAH < 0.4 < SEDANG < 0.7 < TINGGI).
+    """
+    spec = rules['spec']
+    comparisons = []
+    for rule in spec['risk_level']['rules']:
+        expr = _probability_comparison(rule['when'], spec)
+        if expr is not None:
+            comparisons.append((rule['level'], OPERATORS[expr['op']], expr['value']))
+
+    edges = sorted({0.0, 1.0} | {value for _, _, value in comparisons if 0 < value < 1})
+    bands = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        middle = (low + high) / 2
+        level = next((level for level, compare, value in comparisons if compare(middle, value)), spec['risk_level']['default'])
+        if bands and bands[-1][0] == level:
+            bands[-1] = (level, bands[-1][1], high)
+        else:
+            bands.append((level, low, high))
+    return bands
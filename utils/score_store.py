@@ -0,0 +1,207 @@
+"""
+Persisted per-row scores for incremental re-scoring
+
+The store keeps, for every student semester (a 64-bit hash of NIM,
+Angkatan, Semester), a hash of the model inputs after process_data (IPK,
+Kehadiran, Status) together with the scores computed from them. score_dataset_incremental
+processes the whole frame (cheap, vectorized) but only sends new rows and
+rows whose hash changed to the model; the others are taken from the store.
+The store is tied to the model, scaler, scoring code (predictor, risk
+rules, compiled model) and risk rule spec it was scored with and is discarded when any of them changes.
+
+Usage:
+    python -m utils.score_store [--rebuild]     # re-score the dashboard dataset and print the report
+"""
+import argparse
+import hashlib
+import json
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utils.compiled_model
+import utils.predictor
+import utils.risk_rules
+from utils.data_loader import CACHE_DIR, MODEL_PATH, SCALER_PATH, file_digest, read_dataset, read_model
+from utils.preprocessor import process_data
+from utils.predictor import PREDICTION_LABELS, RISK_LEVEL_LABELS, predict_dropout_risk_batch, to_float64
+from utils.risk_rules import load_rules
+from utils.scoring import add_score_columns
+from utils.instrumentation import timed
+
+SCORE_STORE_PATH = CACHE_DIR / "score_store.parquet"
+
+# One row per student per semester (Angkatan is the year of the semester sheet)
+KEY_COLUMNS = ['NIM', 'Angkatan', 'Semester']
+
+# Model inputs after process_data; a row is re-scored when their hash changes
+FEATURE_COLUMNS = ['IPK', 'Kehadiran', 'Status']
+
+# Bump when the layout of the store changes
+STORE_VERSION = 1
+
+def scoring_key():
+    """Digest of everything besides the row itself that decides its scores"""
+    h = hashlib.sha1(f"store-v{STORE_VERSION};".encode())
+    sources = [utils.predictor, utils.risk_rules, utils.compiled_model]
+    for path in [MODEL_PATH, SCALER_PATH] + [Path(module.__file__) for module in sources]:
+        stat = path.stat()
+        h.update(f"{path.name}:{file_digest(str(path), stat.st_mtime_ns, stat.st_size)};".encode())
+    h.update(f"rules:{load_rules()['digest']};".encode())
+    return h.hexdigest()
+
+def _row_hashes(df, numeric_columns, other_columns):
+    # Numbers are hashed as float64 so int16 / int64 / float32 storage of the
+    # same value gives the same hash; categoricals hash like their values
+    columns = {col: to_float64(pd.to_numeric(df[col], errors='coerce')) for col in numeric_columns}
+    columns.update({col: df[col].to_numpy() for col in other_columns})
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+def key_hashes(df):
+    """uint64 hash of each row's (NIM, Angkatan, Semester)"""
+    return _row_hashes(df, ['NIM', 'Angkatan'], ['Semester'])
+
+def feature_hashes(df_processed):
+    """uint64 hash of each row's model inputs (after process_data)"""
+    return _row_hashes(df_processed, ['IPK', 'Kehadiran'], ['Status'])
+
+def read_score_store(path=SCORE_STORE_PATH, key=None):
+    """Stored scores, or None if there is no usable store (or it was written under another scoring key)"""
+    try:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    except (ImportError, OSError, ValueError):
+        return None
+    metadata = table.schema.metadata or {}
+    if key is not None and metadata.get(b'scoring_key', b'').decode() != key:
+        return None
+    return table.to_pandas()
+
+def write_score_store(store, path=SCORE_STORE_PATH, key=''):
+    """Write the store atomically, tagged with its scoring key"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(store, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'scoring_key'] = key.encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    tmp_path.replace(path)
+
+@timed()
+def score_dataset_incremental(model, scaler, df, store_path=SCORE_STORE_PATH, key=None, copy=True):
+    """
+    score_dataset, re-scoring only rows that are new or changed since the last run
+
+    Rows without a complete key (or frames without the key columns), and
+    rows whose key occurs more than once, are always scored and not stored. The store is rewritten to match df.
+
+    Returns:
+    --------
+    df_scored : same frame score_dataset returns
+    report : dict with 'rows', 'reused', 'recomputed', 'store_written'
+             and 'seconds'
+    """
+    start = time.perf_counter()
+    key = scoring_key() if key is None else key
+    df_scored = process_data(df, copy=copy)
+    n = len(df_scored)
+
+    hashes = feature_hashes(df_scored)
+    has_keys = all(col in df_scored.columns for col in KEY_COLUMNS)
+    keys = key_hashes(df_scored) if has_keys else np.zeros(n, dtype=np.uint64)
+
+    # One sort of the keys serves the duplicate check, the store lookup
+    # (sorted queries are much faster than random ones) and the store write
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    duplicated = np.zeros(n, dtype=bool)
+    repeats = sorted_keys[1:] == sorted_keys[:-1]
+    duplicated[order[1:][repeats]] = True
+    duplicated[order[:-1][repeats]] = True
+    # Without the key columns no row can be matched: all are scored, none stored
+    missing_key = df_scored[KEY_COLUMNS].isna().any(axis=1).to_numpy() if has_keys else np.ones(n, dtype=bool)
+    keyed = ~(missing_key | duplicated)
+
+    prediction_codes = np.zeros(n, dtype=np.int8)
+    risk_codes = np.zeros(n, dtype=np.int8)
+    probability = np.zeros(n)
+    reused = np.zeros(n, dtype=bool)
+
+    store = read_score_store(store_path, key)
+    if store is not None and len(store):
+        # The store is sorted by Key_Hash
+        stored_keys = store['Key_Hash'].to_numpy()
+        positions = np.empty(n, dtype=np.intp)
+        positions[order] = np.minimum(np.searchsorted(stored_keys, sorted_keys), len(store) - 1)
+        found = np.flatnonzero(keyed & (stored_keys[positions] == keys))
+        positions = positions[found]
+        unchanged = store['Feature_Hash'].to_numpy()[positions] == hashes[found]
+
+        rows, positions = found[unchanged], positions[unchanged]
+        reused[rows] = True
+        prediction_codes[rows] = store['Prediction_Code'].to_numpy()[positions]
+        risk_codes[rows] = store['Risk_Code'].to_numpy()[positions]
+        probability[rows] = store['Dropout_Probability'].to_numpy()[positions]
+
+    todo = ~reused
+    if todo.any():
+        result = predict_dropout_risk_batch(
+            model, scaler,
+            to_float64(df_scored['IPK'])[todo],
+            to_float64(df_scored['Kehadiran'])[todo],
+            np.asarray(df_scored['Status'], dtype=object)[todo]
+        )
+        prediction_codes[todo] = pd.Index(PREDICTION_LABELS).get_indexer(result['prediction'])
+        risk_codes[todo] = pd.Index(RISK_LEVEL_LABELS).get_indexer(result['risk_level'])
+        probability[todo] = result['dropout_probability'] * 100  # Convert to percentage
+
+    add_score_columns(df_scored, PREDICTION_LABELS[prediction_codes], RISK_LEVEL_LABELS[risk_codes], probability)
+
+    store_written = False
+    if todo.any() or store is None or len(store) != int(keyed.sum()):
+        order = order[keyed[order]]
+        new_store = pd.DataFrame({
+            'Key_Hash': keys[order],
+            'Feature_Hash': hashes[order],
+            'Prediction_Code': prediction_codes[order],
+            'Risk_Code': risk_codes[order],
+            'Dropout_Probability': probability[order]
+        })
+        try:
+            write_score_store(new_store, store_path, key)
+            store_written = True
+        except (ImportError, OSError):
+            # Read-only cache directory etc. -- the scores are still valid
+            pass
+
+    report = {
+        'rows': n,
+        'reused': int(reused.sum()),
+        'recomputed': int(todo.sum()),
+        'store_written': store_written,
+        'seconds': round(time.perf_counter() - start, 4)
+    }
+    return df_scored, report
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score the dashboard dataset through the score store")
+    parser.add_argument('--rebuild', action='store_true', help="Drop the store first and score every row")
+    args = parser.parse_args()
+
+    # The scaler is fitted with feature names but scored with plain arrays
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    if args.rebuild:
+        SCORE_STORE_PATH.unlink(missing_ok=True)
+    model, scaler, _ = read_model()
+    _, report = score_dataset_incremental(model, scaler, read_dataset(), copy=False)
+    print(json.dumps(report, indent=4))
+
+if __name__ == "__main__":
+    main()
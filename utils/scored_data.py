@@ -0,0 +1,211 @@
+import hashlib
+
+import streamlit as st
+
+from utils.data_loader import (
+    DATA_PATH, INGESTED_DATA_PATH, MODEL_PATH, SCALER_PATH, FEATURE_COLUMNS_PATH, MODEL_EVALUATION_PATH, COMPILED_MODEL_PATH,
+    file_digest, read_dataset, read_model, read_model_evaluation
+)
+from utils.risk_rules import load_rules
+from utils.score_store import score_dataset_incremental
+from utils.aggregates import build_cube
+from utils.search_index import build_search_index
+from utils.timeseries import build_timeseries
+from utils.probability_grid import build_probability_grid
+from utils.instrumentation import cache_miss, cached_call, timed
+
+# Files whose content decides what the scored dataset looks like
+SOURCE_FILES = [
+    DATA_PATH, INGESTED_DATA_PATH, MODEL_PATH, SCALER_PATH, FEATURE_COLUMNS_PATH, MODEL_EVALUATION_PATH, COMPILED_MODEL_PATH
+]
+
+# Fingerprint seen on the previous rerun of this server process
+_last_fingerprint = None
+
+# Reused / recomputed row counts of the last scoring run in this process
+_scoring_report = None
+
+@timed()
+def dataset_fingerprint():
+    """Fingerprint of the dataset file, the model artifacts and the risk rules"""
+    h = hashlib.sha1()
+    for path in SOURCE_FILES:
+        try:
+            stat = path.stat()
+            digest = file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            digest = 'missing'
+        h.update(f"{path.name}:{digest};".encode())
+    h.update(f"rules:{load_rules()['digest']}".encode())
+    return h.hexdigest()
+
+# Cache lookups go through cached_call (utils.instrumentation), and every
+# cached body calls cache_miss(), so the performance panel and /metrics
+# can count hits and misses per cache
+
+def load_model():
+    return cached_call('model', _load_model)
+
+def load_dataset():
+    return cached_call('dataset', _load_dataset)
+
+def load_model_evaluation():
+    return cached_call('model_evaluation', _load_model_evaluation)
+
+@st.cache_resource
+def _load_model():
+    cache_miss()
+    try:
+        return read_model()
+    except Exception as e:
+        st.error(f"❌ Error loading model: {e}")
+        return None, None, None
+
+@st.cache_data
+def _load_dataset():
+    cache_miss()
+    try:
+        return read_dataset()
+    except Exception as e:
+        st.error(f"❌ Error loading data: {e}")
+        return None
+
+@st.cache_data
+def _load_model_evaluation():
+    cache_miss()
+    try:
+        return read_model_evaluation()
+    except:
+        st.warning("⚠️ Model evaluation not found.")
+        return None
+
+def invalidate_caches():
+    """Drop every cached artifact derived from the data and model files"""
+    _load_model.clear()
+    _load_dataset.clear()
+    _load_model_evaluation.clear()
+    _build_scored_dataset.clear()
+    _build_aggregate_cube.clear()
+    _build_search_index.clear()
+    _build_timeseries.clear()
+    _build_probability_grid.clear()
+
+def get_scored_dataset():
+    """
+    Processed and scored dataset shared by all pages and sessions
+    
+    The frame is built once per fingerprint and returned without copying,
+    so pages must slice it (boolean masks, column selection) and never
+    modify it in place. Returns None if the data or model cannot be loaded.
+    """
+    return cached_call('scored_dataset', _build_scored_dataset, _current_fingerprint())
+
+def get_scoring_report():
+    """
+    Report of the last (incremental) scoring run, see
+    utils.score_store.score_dataset_incremental; None before the first one
+    """
+    return _scoring_report
+
+def get_aggregate_cube():
+    """
+    Aggregate cube (see utils.aggregates) of the scored dataset
+    
+    Cached and invalidated together with get_scored_dataset(); returns None
+    if the data or model cannot be loaded.
+    """
+    return cached_call('aggregate_cube', _build_aggregate_cube, _current_fingerprint())
+
+def get_search_index():
+    """
+    NIM / Nama search index (see utils.search_index) of the scored dataset
+    
+    Cached and invalidated together with get_scored_dataset(); returns None
+    if the data or model cannot be loaded.
+    """
+    return cached_call('search_index', _build_search_index, _current_fingerprint())
+
+def get_timeseries():
+    """
+    Per-student semester history and trajectory features (see
+    utils.timeseries) of the scored dataset
+    
+    Cached and invalidated together with get_scored_dataset(); returns None
+    if the data or model cannot be loaded.
+    """
+    return cached_call('timeseries', _build_timeseries, _current_fingerprint())
+
+def get_probability_grid():
+    """
+    Model probabilities of the whole Prediksi Individu input lattice
+    (see utils.probability_grid)
+    
+    Built once per fingerprint; returns None if the model cannot be loaded.
+    """
+    return cached_call('probability_grid', _build_probability_grid, _current_fingerprint())
+
+def _current_fingerprint():
+    """Fingerprint for this rerun, clearing every cache if the files changed"""
+    global _last_fingerprint
+    
+    fingerprint = dataset_fingerprint()
+    if _last_fingerprint is not None and fingerprint != _last_fingerprint:
+        invalidate_caches()
+    _last_fingerprint = fingerprint
+    
+    return fingerprint
+
+@st.cache_resource(max_entries=1, show_spinner="Memproses prediksi untuk semua mahasiswa...")
+def _build_scored_dataset(fingerprint):
+    """
+    Run process_data and the batch scorer once for a given fingerprint
+    
+    Rows whose inputs did not change since the last run are taken from the
+    persisted score store instead of being scored again.
+    """
+    global _scoring_report
+    cache_miss()
+    
+    model, scaler, _ = load_model()
+    df = load_dataset()
+    if df is None or model is None:
+        return None
+    
+    df_scored, _scoring_report = score_dataset_incremental(model, scaler, df)
+    return df_scored
+
+@st.cache_resource(max_entries=1)
+def _build_aggregate_cube(fingerprint):
+    """Aggregate the scored dataset once for a given fingerprint"""
+    cache_miss()
+    df_scored = cached_call('scored_dataset', _build_scored_dataset, fingerprint)
+    if df_scored is None:
+        return None
+    return build_cube(df_scored)
+
+@st.cache_resource(max_entries=1)
+def _build_search_index(fingerprint):
+    """Index the scored dataset once for a given fingerprint"""
+    cache_miss()
+    df_scored = cached_call('scored_dataset', _build_scored_dataset, fingerprint)
+    if df_scored is None:
+        return None
+    return build_search_index(df_scored)
+
+@st.cache_resource(max_entries=1)
+def _build_timeseries(fingerprint):
+    """Sort the scored dataset into per-student histories once for a given fingerprint"""
+    cache_miss()
+    df_scored = cached_call('scored_dataset', _build_scored_dataset, fingerprint)
+    if df_scored is None:
+        return None
+    return build_timeseries(df_scored)
+
+@st.cache_resource(max_entries=1, show_spinner="Menyiapkan grid probabilitas...")
+def _build_probability_grid(fingerprint):
+    """Score the prediction form lattice once for a given fingerprint"""
+    cache_miss()
+    model, scaler, _ = load_model()
+    if model is None:
+        return None
+    return build_probability_grid(model, scaler, cache_key=fingerprint)
\ No newline at end of file
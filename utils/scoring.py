@@ -0,0 +1,41 @@
+import numpy as np
+
+from utils.preprocessor import process_data
+from utils.predictor import predict_dropout_risk_batch
+from utils.instrumentation import timed
+
+# Shared label objects (indexed by Target == 1) instead of one string per row
+ACTUAL_DROPOUT_LABELS = np.array(['NON-DROPOUT', 'DROPOUT'], dtype=object)
+
+@timed()
+def score_dataset(model, scaler, df, copy=True, fill_values=None):
+    """
+    Process and score a student frame (no Streamlit needed)
+
+    Adds the process_data feature columns plus Prediction, Risk_Level,
+    Dropout_Probability (in %) and Actual_Dropout. See process_data for
+    copy and fill_values.
+    """
+    df_scored = process_data(df, copy=copy, fill_values=fill_values)
+
+    result = predict_dropout_risk_batch(
+        model, scaler,
+        df_scored['IPK'],
+        df_scored['Kehadiran'],
+        df_scored['Status']
+    )
+    return add_score_columns(
+        df_scored,
+        result['prediction'],
+        result['risk_level'],
+        result['dropout_probability'] * 100  # Convert to percentage
+    )
+
+def add_score_columns(df_scored, prediction, risk_level, dropout_probability):
+    """Add the Prediction, Risk_Level, Dropout_Probability (in %) and Actual_Dropout columns"""
+    df_scored['Prediction'] = prediction
+    df_scored['Risk_Level'] = risk_level
+    df_scored['Dropout_Probability'] = dropout_probability
+    df_scored['Actual_Dropout'] = ACTUAL_DROPOUT_LABELS[(df_scored['Target'] == 1).to_numpy().astype(int)]
+
+    return df_scored
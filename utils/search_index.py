@@ -0,0 +1,59 @@
+import numpy as np
+from utils.instrumentation import timed
+
+# Sorts after every character a NIM or name can contain (prefix upper bound)
+_PREFIX_END = '\U0010ffff'
+
+@timed()
+def build_search_index(df):
+    """
+    Sorted NIM / Nama index of a student frame
+
+    NIMs are indexed as strings and names as upper-cased words, both
+    sorted, so a lookup is a binary search instead of a scan of every row.
+
+    Returns:
+    --------
+    dict : 'nim' / 'nim_rows' and 'tokens' / 'token_rows' - sorted keys
+           and the index labels of the rows they belong to
+    """
+    nim = df['NIM'].astype(str).to_numpy(dtype=str)
+    nim_order = np.argsort(nim, kind='stable')
+
+    words = df['Nama'].astype(str).str.upper().str.split().explode().dropna()
+    tokens = words.to_numpy(dtype=str)
+    token_order = np.argsort(tokens, kind='stable')
+
+    return {
+        'nim': nim[nim_order],
+        'nim_rows': df.index.to_numpy()[nim_order],
+        'tokens': tokens[token_order],
+        'token_rows': words.index.to_numpy()[token_order]
+    }
+
+def _prefix_rows(keys, rows, prefix):
+    start = np.searchsorted(keys, prefix, side='left')
+    stop = np.searchsorted(keys, prefix + _PREFIX_END, side='left')
+    return np.unique(rows[start:stop])
+
+@timed()
+def search(index, query):
+    """
+    Index labels of the rows matching a search query
+
+    A numeric query matches NIMs starting with it; otherwise every word of
+    the query must start one of the words of the name (case-insensitive).
+    Returns None for an empty query (no filtering).
+    """
+    query = str(query).strip()
+    if not query:
+        return None
+
+    if query.isdigit():
+        return _prefix_rows(index['nim'], index['nim_rows'], query)
+
+    matches = None
+    for word in query.upper().split():
+        rows = _prefix_rows(index['tokens'], index['token_rows'], word)
+        matches = rows if matches is None else np.intersect1d(matches, rows, assume_unique=True)
+    return matches
@@ -0,0 +1,334 @@
+"""
+Local HTTP scoring service (standard library only, no Streamlit)
+
+Endpoints:
+    POST /predict        {"ipk": 3.1, "kehadiran": 0.85, "status": "AKTIF", "nim": 825200001}
+    POST /predict/batch  {"students": [{"ipk": ..., "kehadiran": ..., "status": ...}, ...]}
+    GET  /health
+    GET  /metrics        request counts, latency percentiles and batch sizes
+    GET  /metrics/prometheus  span timings (utils.instrumentation) as Prometheus text
+
+The model is loaded once. Concurrent /predict requests are coalesced into
+micro-batches (up to --max-batch records, waiting at most --max-wait-ms
+for more to arrive) and scored with one predict_dropout_risk_batch call.
+/predict/batch is scored directly in one call.
+
+Usage:
+    python -m utils.service [--host 127.0.0.1] [--port 8600] [--max-batch 64] [--max-wait-ms 5]
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+import warnings
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from utils.data_loader import read_model
+from utils.instrumentation import PROMETHEUS_CONTENT_TYPE, render_prometheus
+from utils.predictor import predict_dropout_risk_batch
+
+# The scaler is fitted with feature names but scored with plain arrays
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8600
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 5
+
+# Largest /predict/batch request accepted (records)
+MAX_BULK_RECORDS = 100_000
+
+# Largest request body read (bytes): room for MAX_BULK_RECORDS generously
+# formatted records, so oversized bodies are refused before they are read
+MAX_RECORD_BYTES = 256
+MAX_BODY_BYTES = MAX_BULK_RECORDS * MAX_RECORD_BYTES
+
+# Latencies kept per endpoint for the percentiles in /metrics
+LATENCY_WINDOW = 10_000
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+class RequestTooLarge(ValueError):
+    """Request body over MAX_BODY_BYTES (answered with 413)"""
+
+def parse_record(record):
+    """(ipk, kehadiran, status, nim) of one JSON record; raises ValueError if invalid"""
+    if not isinstance(record, dict):
+        raise ValueError("Each student must be a JSON object")
+    fields = {str(key).lower(): value for key, value in record.items()}
+
+    missing = [key for key in ['ipk', 'kehadiran', 'status'] if fields.get(key) is None]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+    try:
+        ipk = float(fields['ipk'])
+        kehadiran = float(fields['kehadiran'])
+    except (TypeError, ValueError):
+        raise ValueError("ipk and kehadiran must be numbers")
+    if not isinstance(fields['status'], str):
+        raise ValueError("status must be a string")
+
+    return ipk, kehadiran, fields['status'], fields.get('nim')
+
+def score_records(model, scaler, records):
+    """Score parsed records with one vectorized call; returns one result dict per record"""
+    ipk, kehadiran, status, nim = zip(*records)
+    result = predict_dropout_risk_batch(model, scaler, np.array(ipk), np.array(kehadiran), np.array(status, dtype=object))
+
+    scored = []
+    for i in range(len(records)):
+        row = {
+            'prediction': result['prediction'][i],
+            'actual_dropout_condition': bool(result['actual_dropout_condition'][i]),
+            'dropout_probability': float(result['dropout_probability'][i]),
+            'safe_probability': float(result['safe_probability'][i]),
+            'risk_level': result['risk_level'][i]
+        }
+        if nim[i] is not None:
+            row['nim'] = nim[i]
+        scored.append(row)
+    return scored
+
+class ServiceMetrics:
+    """Thread-safe request counters, latency windows and batch size stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._requests = {}
+        self._errors = {}
+        self._latencies = {}
+        self._batches = 0
+        self._batched_records = 0
+        self._max_batch = 0
+
+    def record_request(self, endpoint, seconds, ok=True):
+        with self._lock:
+            self._requests[endpoint] = self._requests.get(endpoint, 0) + 1
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+            self._latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def record_batch(self, size):
+        with self._lock:
+            self._batches += 1
+            self._batched_records += size
+            self._max_batch = max(self._max_batch, size)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = {endpoint: np.array(values) for endpoint, values in self._latencies.items()}
+            snapshot = {
+                'uptime_s': round(time.time() - self._started, 1),
+                'requests': dict(self._requests),
+                'errors': dict(self._errors),
+                'micro_batches': {
+                    'batches': self._batches,
+                    'records': self._batched_records,
+                    'mean_size': round(self._batched_records / self._batches, 2) if self._batches else 0,
+                    'max_size': self._max_batch
+                }
+            }
+
+        snapshot['latency_ms'] = {
+            endpoint: {
+                **{f'p{p}': round(float(np.percentile(values, p)) * 1000, 3) for p in LATENCY_PERCENTILES},
+                'mean': round(float(values.mean()) * 1000, 3),
+                'samples': len(values)
+            }
+            for endpoint, values in latencies.items()
+        }
+        return snapshot
+
+class MicroBatcher:
+    """
+    Coalesces single-record predictions into batched model calls
+
+    submit() blocks the calling (request) thread until its record has been
+    scored by the background thread together with whatever other records
+    arrived within max_wait seconds (at most max_batch of them).
+    """
+
+    def __init__(self, model, scaler, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT_MS / 1000, metrics=None):
+        self.model = model
+        self.scaler = scaler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        item = {'record': record, 'done': threading.Event(), 'result': None, 'error': None}
+        self._queue.put(item)
+        item['done'].wait()
+        if item['error'] is not None:
+            raise item['error']
+        return item['result']
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = score_records(self.model, self.scaler, [item['record'] for item in batch])
+                for item, result in zip(batch, results):
+                    item['result'] = result
+            except Exception as e:
+                for item in batch:
+                    item['error'] = e
+            if self.metrics is not None:
+                self.metrics.record_batch(len(batch))
+            for item in batch:
+                item['done'].set()
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """JSON request handler; the server carries the model, batcher and metrics"""
+
+    server_version = 'DropoutScoring/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text, content_type):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body cannot be skipped without a valid length
+            self.close_connection = True
+            raise ValueError("Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise RequestTooLarge(f"Request body over {MAX_BODY_BYTES} bytes")
+        try:
+            return json.loads(self.rfile.read(length) or b'null')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+
+    def _handle(self, endpoint, action):
+        start = time.perf_counter()
+        try:
+            status, payload = action()
+        except RequestTooLarge as e:
+            status, payload = 413, {'error': str(e)}
+        except ValueError as e:
+            status, payload = 400, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+        self._send_json(status, payload)
+        self.server.metrics.record_request(endpoint, time.perf_counter() - start, ok=status < 400)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._handle('/health', lambda: (200, {'status': 'ok'}))
+        elif self.path == '/metrics':
+            self._send_json(200, self.server.metrics.snapshot())
+        elif self.path == '/metrics/prometheus':
+            self._send_text(200, render_prometheus(), PROMETHEUS_CONTENT_TYPE)
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path == '/predict':
+            self._handle('/predict', self._predict)
+        elif self.path == '/predict/batch':
+            self._handle('/predict/batch', self._predict_batch)
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def _predict(self):
+        record = parse_record(self._read_json())
+        return 200, self.server.batcher.submit(record)
+
+    def _predict_batch(self):
+        payload = self._read_json()
+        students = payload.get('students') if isinstance(payload, dict) else payload
+        if not isinstance(students, list):
+            raise ValueError("Expected {\"students\": [...]}")
+        if len(students) > MAX_BULK_RECORDS:
+            raise ValueError(f"At most {MAX_BULK_RECORDS} students per request")
+        if not students:
+            return 200, {'results': []}
+
+        records = [parse_record(student) for student in students]
+        return 200, {'results': score_records(self.server.model, self.server.scaler, records)}
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for concurrent load tests"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch=DEFAULT_MAX_BATCH,
+                  max_wait_ms=DEFAULT_MAX_WAIT_MS, model=None, scaler=None, verbose=False):
+    """
+    Build the scoring server (call serve_forever() on it)
+
+    The model and scaler are read from models/ unless given. port=0 picks
+    a free port (see server.server_address).
+    """
+    if model is None or scaler is None:
+        model, scaler, _ = read_model()
+
+    server = ScoringServer((host, port), ScoringHandler)
+    server.model = model
+    server.scaler = scaler
+    server.verbose = verbose
+    server.metrics = ServiceMetrics()
+    server.batcher = MicroBatcher(model, scaler, max_batch=max_batch, max_wait=max_wait_ms / 1000, metrics=server.metrics)
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP dropout-risk scoring service")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="Most /predict records per model call")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS, help="How long a micro-batch waits for more records")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.max_batch, args.max_wait_ms, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Scoring service on http://{host}:{port} (max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from utils.predictor import to_float64
+from utils.risk_rules import condition, load_rules
+from utils.instrumentation import timed
+
+# GANJIL (odd) comes before GENAP (even) within an academic year
+SEMESTER_ORDER = {'GANJIL': 0, 'GENAP': 1}
+
+# Trend-based early warnings (see trend_warnings)
+TREND_IPK_DROP = 0.25          # IPK fell by at least this since the previous semester
+TREND_KEHADIRAN_SLOPE = -0.10  # Kehadiran trend of at most -10 points per semester
+TREND_LOW_STREAK = 2           # latest semesters in a row with IPK or Kehadiran below the threshold
+
+TREND_WARNING_LABELS = {
+    'ipk_drop': 'IPK turun',
+    'kehadiran_decline': 'Kehadiran menurun',
+    'low_streak': 'Rendah berturut-turut'
+}
+
+def semester_period(angkatan, semester):
+    """
+    Consecutive semester number of each row (NaN if unknown)
+
+    Angkatan is the year of the semester sheet, so the period is
+    Angkatan * 2 plus 0 for GANJIL and 1 for GENAP.
+    """
+    year = to_float64(pd.to_numeric(pd.Series(angkatan), errors='coerce'))
+    term = pd.Series(np.asarray(semester, dtype=object)).str.upper().map(SEMESTER_ORDER).to_numpy(dtype=float)
+    return year * 2 + term
+
+@timed()
+def build_timeseries(df):
+    """
+    Per-student semester history of a scored frame
+
+    Rows are sorted by (NIM, semester period); the history of the i-th
+    student in 'nim' is rows offsets[i]:offsets[i + 1] of every array, so
+    it is sliced without scanning. Rows without NIM or semester are left out.
+
+    Returns:
+    --------
+    dict : 'nim' (sorted unique NIMs), 'offsets', 'rows' (index labels),
+           'period', 'ipk', 'kehadiran', 'dropout_probability' and
+           'features' (trajectory_features, one row per NIM)
+    """
+    nim = to_float64(pd.to_numeric(df['NIM'], errors='coerce'))
+    period = semester_period(df['Angkatan'], df['Semester'])
+    valid = np.flatnonzero(~np.isnan(nim) & ~np.isnan(period))
+
+    order = valid[np.lexsort((period[valid], nim[valid]))]
+    nim_sorted = nim[order].astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, nim_sorted[1:] != nim_sorted[:-1]]) if len(order) else np.zeros(0, dtype=np.int64)
+
+    ts = {
+        'nim': nim_sorted[starts],
+        'offsets': np.append(starts, len(order)),
+        'rows': df.index.to_numpy()[order],
+        'period': period[order].astype(np.int64),
+        'ipk': to_float64(df['IPK'])[order],
+        'kehadiran': to_float64(df['Kehadiran'])[order],
+        'dropout_probability': to_float64(df['Dropout_Probability'])[order] if 'Dropout_Probability' in df.columns else np.full(len(order), np.nan)
+    }
+    ts['features'] = trajectory_features(ts)
+    return ts
+
+def student_history(ts, nim):
+    """Semester history of one NIM as a DataFrame (empty if the NIM is unknown)"""
+    i = np.searchsorted(ts['nim'], nim)
+    if i == len(ts['nim']) or ts['nim'][i] != nim:
+        i, start, stop = 0, 0, 0
+    else:
+        start, stop = ts['offsets'][i], ts['offsets'][i + 1]
+
+    period = ts['period'][start:stop]
+    return pd.DataFrame({
+        'Tahun': period // 2,
+        'Semester': np.where(period % 2 == 0, 'GANJIL', 'GENAP'),
+        'IPK': ts['ipk'][start:stop],
+        'Kehadiran': ts['kehadiran'][start:stop],
+        'Dropout_Probability': ts['dropout_probability'][start:stop]
+    }, index=pd.Index(ts['rows'][start:stop], name='row'))
+
+def trajectory_features(ts):
+    """
+    Trajectory features of every student at their latest semester (vectorized over all students)
+
+    Returns:
+    --------
+    DataFrame indexed by NIM : n_semesters, last_row (index label of the
+           latest semester), ipk, ipk_delta (change since the previous
+           semester), kehadiran, kehadiran_slope (least-squares change per
+           semester), low_streak (latest consecutive semesters with IPK or
+           Kehadiran below the threshold) and max_low_streak
+    """
+    offsets = ts['offsets']
+    starts, counts = offsets[:-1], np.diff(offsets)
+    ends = offsets[1:] - 1
+    n = offsets[-1]
+    if len(starts) == 0:
+        columns = ['n_semesters', 'last_row', 'ipk', 'ipk_delta', 'kehadiran', 'kehadiran_slope', 'low_streak', 'max_low_streak']
+        return pd.DataFrame(columns=columns, index=pd.Index(ts['nim'], name='NIM'))
+
+    ipk, kehadiran = ts['ipk'], ts['kehadiran']
+    has_previous = counts >= 2
+    previous = np.where(has_previous, ends - 1, ends)
+    ipk_delta = np.where(has_previous, ipk[ends] - ipk[previous], np.nan)
+
+    # Least-squares slope per student from segment sums (x relative to the first semester)
+    x = (ts['period'] - np.repeat(ts['period'][starts], counts)).astype(np.float64)
+    y = np.nan_to_num(kehadiran)
+    sum_x = np.add.reduceat(x, starts)
+    sum_y = np.add.reduceat(y, starts)
+    sum_xx = np.add.reduceat(x * x, starts)
+    sum_xy = np.add.reduceat(x * y, starts)
+    denominator = counts * sum_xx - sum_x ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(denominator > 0, (counts * sum_xy - sum_x * sum_y) / denominator, np.nan)
+
+    # Length of the run of low semesters ending at each row: distance to the
+    # last non-low row, or to the row before the student's first semester
+    rules = load_rules()
+    env = {'ipk': ipk, 'kehadiran': kehadiran}
+    low = condition(rules, 'ipk_risk', env) | condition(rules, 'kehadiran_risk', env)
+    position = np.arange(n)
+    reset = np.where(~low, position, -1)
+    reset[starts] = np.maximum(reset[starts], starts - 1)
+    run = position - np.maximum.accumulate(reset)
+
+    return pd.DataFrame({
+        'n_semesters': counts,
+        'last_row': ts['rows'][ends],
+        'ipk': ipk[ends],
+        'ipk_delta': ipk_delta,
+        'kehadiran': kehadiran[ends],
+        'kehadiran_slope': slope,
+        'low_streak': run[ends],
+        'max_low_streak': np.maximum.reduceat(run, starts)
+    }, index=pd.Index(ts['nim'], name='NIM'))
+
+def trend_warnings(features, ipk_drop=TREND_IPK_DROP, kehadiran_slope=TREND_KEHADIRAN_SLOPE, low_streak=TREND_LOW_STREAK):
+    """
+    Boolean early-warning flags per student (one column per TREND_WARNING_LABELS key)
+
+    Students with a single semester only get the low_streak flag (if low_streak <= 1).
+    """
+    return pd.DataFrame({
+        'ipk_drop': (features['ipk_delta'] <= -ipk_drop).to_numpy(),
+        'kehadiran_decline': (features['kehadiran_slope'] <= kehadiran_slope).to_numpy(),
+        'low_streak': (features['low_streak'] >= low_streak).to_numpy()
+    }, index=features.index)
@@ -0,0 +1,416 @@
+"""
+Training and evaluation of the candidate models that rebuilds models/
+
+Replaces the training notebook: the clean dataset is processed with
+process_data, split 80/20 (stratified on Target) and scaled with a
+StandardScaler fitted on the training part. Every candidate model is
+cross-validated with 5 stratified folds on the training part and fitted
+once more on all of it for the test metrics; the rows a model is fitted
+on are oversampled with SMOTE (imbalanced-learn), the rows it is scored
+on never are. These 7 x 6 fits run in
+parallel, one process per core (the models themselves use one thread
+each), and every fitted fold is cached under data/.cache/training keyed
+by its data, model parameters and library versions, so a retrain only
+fits what changed. All splits and models are seeded, so the same data
+gives the same models.
+
+Written to the output directory:
+
+    best_dropout_model.pkl   best model by Dropout F1, then CV accuracy, then AUC
+    scaler.pkl               StandardScaler of IPK, Kehadiran, Status_Risk
+    feature_columns.json
+    model_evaluation.json    metrics and fit / predict timings of every model
+    compiled_model.npz       (models/ only) see utils.compiled_model
+
+Usage:
+    python -m utils.train [--workers 4] [--output-dir models] [--no-cache] [--no-smote]
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from utils.data_loader import CACHE_DIR, MODEL_PATH, read_dataset
+from utils.preprocessor import process_data
+
+MODELS_DIR = MODEL_PATH.parent
+
+FEATURES = ['IPK', 'Kehadiran', 'Status_Risk']
+TARGET = 'Target'
+TARGET_NAMES = ['Non-Dropout', 'Dropout']
+
+TEST_SIZE = 0.2
+CV_FOLDS = 5
+RANDOM_STATE = 42
+
+# Fitted folds, one joblib file per (data, model, parameters, fold)
+TRAINING_CACHE_DIR = CACHE_DIR / "training"
+
+# Fold label of the fit on the whole training part (evaluated on the test part)
+FINAL_FOLD = 'final'
+
+def candidate_models(scale_pos_weight=1.0):
+    """
+    Unfitted candidate models by name, in report order
+
+    Models run single-threaded because the folds are already spread over
+    the cores. XGBoost is left out when it is not installed.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+
+    models = {
+        'Logistic Regression': LogisticRegression(max_iter=1000, class_weight='balanced', random_state=RANDOM_STATE),
+        'Decision Tree': DecisionTreeClassifier(max_depth=5, min_samples_leaf=5, class_weight='balanced', random_state=RANDOM_STATE),
+        'Random Forest': RandomForestClassifier(
+            n_estimators=50,
+            max_depth=5,
+            min_samples_split=10,
+            min_samples_leaf=5,
+            max_samples=0.8,
+            max_features='sqrt',
+            class_weight='balanced',
+            random_state=RANDOM_STATE,
+            n_jobs=1
+        ),
+        'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, max_depth=3, learning_rate=0.1, random_state=RANDOM_STATE)
+    }
+    try:
+        from xgboost import XGBClassifier
+        models['XGBoost'] = XGBClassifier(
+            n_estimators=100,
+            max_depth=3,
+            learning_rate=0.1,
+            scale_pos_weight=scale_pos_weight,
+            eval_metric='logloss',
+            random_state=RANDOM_STATE,
+            n_jobs=1
+        )
+    except ImportError:
+        pass
+    models['SVM'] = SVC(kernel='rbf', probability=True, class_weight='balanced', random_state=RANDOM_STATE)
+    models['Naive Bayes'] = GaussianNB()
+    return models
+
+def _library_versions():
+    import joblib
+    import sklearn
+    versions = {'sklearn': sklearn.__version__, 'joblib': joblib.__version__, 'numpy': np.__version__}
+    try:
+        import xgboost
+        versions['xgboost'] = xgboost.__version__
+    except ImportError:
+        pass
+    return versions
+
+def _task_key(name, estimator, fold, X_fit, y_fit, X_eval, resample, versions):
+    h = hashlib.sha1()
+    h.update(f"{name};{fold};{resample};{sorted(estimator.get_params().items())!r};{sorted(versions.items())!r};".encode())
+    for array in [X_fit, y_fit, X_eval]:
+        h.update(f"{array.dtype.str}{array.shape};".encode())
+        h.update(np.ascontiguousarray(array).tobytes())
+    return h.hexdigest()
+
+def _fit_task(task):
+    """
+    Fit one model on one split and score the evaluation rows (runs in a worker)
+
+    Returns the fitted estimator, the evaluation probabilities and
+    predictions and the fit / predict seconds; read from the cache file
+    when it exists and written to it otherwise.
+    """
+    import joblib
+
+    cache_path = task['cache_path']
+    if cache_path is not None and cache_path.exists():
+        try:
+            result = joblib.load(cache_path)
+            result['cached'] = True
+            return result
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+
+    X_fit, y_fit = task['X_fit'], task['y_fit']
+    start = time.perf_counter()
+    if task['resample']:
+        from imblearn.over_sampling import SMOTE
+        X_fit, y_fit = SMOTE(random_state=RANDOM_STATE).fit_resample(X_fit, y_fit)
+    resample_s = time.perf_counter() - start
+
+    estimator = task['estimator']
+    start = time.perf_counter()
+    estimator.fit(X_fit, y_fit)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proba = estimator.predict_proba(task['X_eval'])[:, 1]
+    prediction = estimator.predict(task['X_eval'])
+    predict_s = time.perf_counter() - start
+
+    result = {
+        'estimator': estimator,
+        'proba': proba,
+        'prediction': np.asarray(prediction),
+        'fit_rows': len(y_fit),
+        'resample_s': resample_s,
+        'fit_s': fit_s,
+        'predict_s': predict_s,
+        'cached': False
+    }
+    if cache_path is not None:
+        try:
+            tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+            joblib.dump(result, tmp_path)
+            tmp_path.replace(cache_path)
+        except OSError:
+            # Read-only cache directory etc. -- the fit is still valid
+            pass
+    return result
+
+def training_data(df=None):
+    """Features and target of the clean dataset (X as a float64 DataFrame, y as int)"""
+    df_processed = process_data(read_dataset() if df is None else df)
+    X = df_processed[FEATURES].astype(np.float64)
+    y = df_processed[TARGET].astype(int)
+    return X, y
+
+def _evaluate(y_true, proba, prediction):
+    from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
+
+    tn, fp, fn, tp = confusion_matrix(y_true, prediction, labels=[0, 1]).ravel()
+    return {
+        'accuracy': float(accuracy_score(y_true, prediction)),
+        'classification_report': classification_report(
+            y_true, prediction, labels=[0, 1], target_names=TARGET_NAMES, output_dict=True, zero_division=0
+        ),
+        'auc_score': float(roc_auc_score(y_true, proba)) if len(np.unique(y_true)) == 2 else None,
+        'confusion_matrix': {'tn': int(tn), 'fp': int(fp), 'fn': int(fn), 'tp': int(tp)}
+    }
+
+def _selection_key(metrics):
+    return (
+        metrics['classification_report']['Dropout']['f1-score'],
+        metrics['cv_mean'],
+        metrics['auc_score'] or 0.0
+    )
+
+def _write_atomic(path, write):
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    write(tmp_path)
+    tmp_path.replace(path)
+
+def _smote_available():
+    try:
+        import imblearn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def train_models(df=None, output_dir=MODELS_DIR, workers=None, use_cache=True, smote=True, cache_dir=TRAINING_CACHE_DIR):
+    """
+    Cross-validate and fit every candidate model and write the best one to output_dir
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Clean dataset (default: read_dataset())
+    output_dir : Path
+        Where the artifacts are written (models/ by default)
+    workers : int
+        Worker processes (default: one per core; 1 fits in this process)
+    use_cache : bool
+        Reuse and store fitted folds under cache_dir
+    smote : bool
+        Oversample the fitting rows with SMOTE (skipped if imbalanced-learn
+        is not installed)
+
+    Returns:
+    --------
+    evaluation : dict written to model_evaluation.json
+    summary : dict with the best model, task counts and wall time
+    """
+    import joblib
+    from sklearn.base import clone
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold, train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    start = time.perf_counter()
+    X, y = training_data(df)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, stratify=y, random_state=RANDOM_STATE
+    )
+    scaler = StandardScaler().fit(X_train)
+    X_train_scaled = scaler.transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    y_train = y_train.to_numpy()
+    y_test = y_test.to_numpy()
+
+    positives = int(y_train.sum())
+    models = candidate_models(scale_pos_weight=(len(y_train) - positives) / max(positives, 1))
+    versions = _library_versions()
+    resample = smote and _smote_available()
+    folds = list(StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=RANDOM_STATE).split(X_train_scaled, y_train))
+
+    if use_cache:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    tasks = []
+    for name, estimator in models.items():
+        splits = [(fold, X_train_scaled[fit], y_train[fit], X_train_scaled[held_out]) for fold, (fit, held_out) in enumerate(folds)]
+        splits.append((FINAL_FOLD, X_train_scaled, y_train, X_test_scaled))
+        for fold, X_fit, y_fit, X_eval in splits:
+            key = _task_key(name, estimator, fold, X_fit, y_fit, X_eval, resample, versions)
+            tasks.append({
+                'name': name,
+                'fold': fold,
+                'estimator': clone(estimator),
+                'X_fit': X_fit,
+                'y_fit': y_fit,
+                'X_eval': X_eval,
+                'resample': resample,
+                'cache_path': cache_dir / f"{key}.joblib" if use_cache else None
+            })
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_fit_task, tasks))
+    else:
+        results = [_fit_task(task) for task in tasks]
+    fit_wall_s = time.perf_counter() - start
+
+    evaluation = {}
+    final_estimators = {}
+    for name in models:
+        model_results = [(task, result) for task, result in zip(tasks, results) if task['name'] == name]
+        cv_scores, cv_fit_s, cv_predict_s = [], [], []
+        for task, result in model_results:
+            if task['fold'] == FINAL_FOLD:
+                final = result
+                continue
+            held_out = folds[task['fold']][1]
+            cv_scores.append(float(np.mean(result['prediction'] == y_train[held_out])))
+            cv_fit_s.append(result['fit_s'])
+            cv_predict_s.append(result['predict_s'])
+
+        metrics = _evaluate(y_test, final['proba'], final['prediction'])
+        evaluation[name] = {
+            'accuracy': metrics['accuracy'],
+            'cv_mean': float(np.mean(cv_scores)),
+            'cv_std': float(np.std(cv_scores)),
+            'classification_report': metrics['classification_report'],
+            'auc_score': metrics['auc_score'],
+            'confusion_matrix': metrics['confusion_matrix'],
+            'timings': {
+                'fit_rows': final['fit_rows'],
+                'resample_s': round(final['resample_s'], 4),
+                'fit_s': round(final['fit_s'], 4),
+                'predict_s': round(final['predict_s'], 4),
+                'predict_rows': len(y_test),
+                'cv_fit_mean_s': round(float(np.mean(cv_fit_s)), 4),
+                'cv_predict_mean_s': round(float(np.mean(cv_predict_s)), 4),
+                'cached_fits': sum(result['cached'] for _, result in model_results)
+            }
+        }
+        final_estimators[name] = final['estimator']
+
+    # Ties keep report order
+    best_model = max(evaluation, key=lambda name: _selection_key(evaluation[name]))
+
+    evaluation['dataset_info'] = {
+        'total_samples': len(X),
+        'total_features': len(FEATURES),
+        'dropout_rate': float(y.mean()),
+        'train_size': len(X_train),
+        'test_size': len(X_test),
+        'features': FEATURES,
+        'best_model': best_model,
+        'training': {
+            'cv_folds': CV_FOLDS,
+            'random_state': RANDOM_STATE,
+            'resampling': 'SMOTE' if resample else None,
+            'workers': workers,
+            'fits': len(tasks),
+            'cached_fits': sum(result['cached'] for result in results),
+            'wall_time_s': round(fit_wall_s, 3),
+            'fit_cpu_s': round(sum(result['resample_s'] + result['fit_s'] + result['predict_s'] for result in results), 3),
+            'versions': versions
+        }
+    }
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(output_dir / MODEL_PATH.name, lambda path: joblib.dump(final_estimators[best_model], path))
+    _write_atomic(output_dir / 'scaler.pkl', lambda path: joblib.dump(scaler, path))
+    for filename, content in [('feature_columns.json', FEATURES), ('model_evaluation.json', evaluation)]:
+        def write_json(path, content=content):
+            with open(path, 'w') as f:
+                json.dump(content, f, indent=4)
+        _write_atomic(output_dir / filename, write_json)
+
+    # The compiled model is tied to models/ and only exists for forests
+    compiled = False
+    if output_dir.resolve() == MODELS_DIR.resolve():
+        from utils.compiled_model import save_compiled_model
+        from utils.data_loader import COMPILED_MODEL_PATH
+        if isinstance(final_estimators[best_model], RandomForestClassifier):
+            save_compiled_model(final_estimators[best_model], scaler)
+            compiled = True
+        else:
+            COMPILED_MODEL_PATH.unlink(missing_ok=True)
+
+    # Forget fits of earlier data / parameters
+    if use_cache:
+        used = {task['cache_path'].name for task in tasks}
+        for old in cache_dir.glob('*.joblib'):
+            if old.name not in used:
+                old.unlink(missing_ok=True)
+
+    summary = {
+        'best_model': best_model,
+        'fits': len(tasks),
+        'cached_fits': evaluation['dataset_info']['training']['cached_fits'],
+        'workers': workers,
+        'resampling': evaluation['dataset_info']['training']['resampling'],
+        'compiled_model': compiled,
+        'output_dir': str(output_dir),
+        'wall_time_s': round(time.perf_counter() - start, 3)
+    }
+    return evaluation, summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the candidate models and rebuild the model artifacts")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument('--output-dir', type=Path, default=MODELS_DIR)
+    parser.add_argument('--no-cache', action='store_true', help="Fit every fold again and leave the fold cache alone")
+    parser.add_argument('--no-smote', action='store_true', help="Fit on the original rows (class weights only)")
+    args = parser.parse_args()
+
+    evaluation, summary = train_models(
+        output_dir=args.output_dir,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        smote=not args.no_smote
+    )
+
+    print(f"{'model':<20} {'accuracy':>9} {'cv_mean':>8} {'F1 dropout':>11} {'AUC':>7} {'fit (s)':>8} {'predict (s)':>12}")
+    for name, metrics in evaluation.items():
+        if name == 'dataset_info':
+            continue
+        auc = metrics['auc_score']
+        print(f"{name:<20} {metrics['accuracy']:>9.4f} {metrics['cv_mean']:>8.4f} "
+              f"{metrics['classification_report']['Dropout']['f1-score']:>11.4f} {auc if auc is not None else float('nan'):>7.4f} "
+              f"{metrics['timings']['fit_s']:>8.4f} {metrics['timings']['predict_s']:>12.4f}")
+    print(json.dumps(summary, indent=4))
+
+if __name__ == "__main__":
+    main()